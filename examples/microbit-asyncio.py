@@ -0,0 +1,30 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import logging
+
+from kaspersmicrobit import AsyncKaspersMicrobit
+from kaspersmicrobit.services.accelerometer import AccelerometerData
+from kaspersmicrobit.services.leddisplay import Image
+
+logging.basicConfig(level=logging.INFO)
+
+# example {
+
+
+def accelerometer_data(data: AccelerometerData):
+    print(f"Accelerometer data: {data}")
+
+
+async def main():
+    async with await AsyncKaspersMicrobit.find_one_microbit() as microbit:
+        print(f"Current temperature: {await microbit.temperature.read()}")
+        await microbit.led.show(Image.HAPPY)
+        await microbit.accelerometer.notify(accelerometer_data)
+
+        await asyncio.sleep(5)
+
+
+asyncio.run(main())
+# }
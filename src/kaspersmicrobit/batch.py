@@ -0,0 +1,99 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Any, Optional
+
+
+@dataclass
+class NotificationBatch:
+    """
+    A number of notifications of the same characteristic, received one after the other.
+
+    Attributes:
+        data (bytearray): the data of all notifications, concatenated
+        timestamps (array): the time at which each notification was received, in seconds since the epoch
+            (an array of doubles)
+    """
+    data: bytearray
+    timestamps: array
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class NotificationBatcher:
+    """
+    Collects notifications into NotificationBatches. Must be called on the event loop that receives the
+    notifications: the max_latency timer is scheduled on that loop.
+    """
+
+    def __init__(self, deliver: Callable[[Any, NotificationBatch], Any], max_batch: int,
+                 max_latency: Optional[float] = None):
+        """
+        Args:
+            deliver: called with the sender and the batch, when a batch is handed over
+            max_batch (int): a batch is handed over when it has this number of notifications
+            max_latency (float): a batch is handed over at the latest this number of seconds after its first
+                notification, 0 hands over every notification right away, None waits until the batch is full
+
+        Raises:
+            ValueError: when max_batch is smaller than 1 or max_latency is negative
+        """
+        NotificationBatcher.validate(max_batch, max_latency)
+        self._deliver = deliver
+        self._max_batch = 1 if max_latency == 0 else max_batch
+        self._max_latency = max_latency if max_latency else None
+        self._sender = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._data = bytearray()
+        self._timestamps = array('d')
+        self._closed = False
+
+    @staticmethod
+    def validate(max_batch: int, max_latency: Optional[float]) -> None:
+        """
+        Raises:
+            ValueError: when max_batch is smaller than 1 or max_latency is negative
+        """
+        if max_batch < 1:
+            raise ValueError(f'max_batch must be at least 1, not {max_batch}')
+        if max_latency is not None and max_latency < 0:
+            raise ValueError(f'max_latency can not be negative, not {max_latency}')
+
+    def add(self, sender: Any, data: bytearray) -> None:
+        if self._closed:
+            return
+        if not self._timestamps:
+            self._sender = sender
+            if self._max_latency is not None:
+                self._timer = asyncio.get_running_loop().call_later(self._max_latency, self.flush)
+
+        self._data += data
+        self._timestamps.append(time.time())
+        if len(self._timestamps) >= self._max_batch:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Hands over the notifications collected so far, if any, without waiting for the batch to be full
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._timestamps:
+            batch = NotificationBatch(self._data, self._timestamps)
+            self._data = bytearray()
+            self._timestamps = array('d')
+            self._deliver(self._sender, batch)
+
+    def close(self) -> None:
+        """
+        Hands over the last, partial batch. Notifications that are added after close are ignored.
+        """
+        self.flush()
+        self._closed = True
@@ -3,20 +3,40 @@
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import asyncio
 import concurrent.futures
+import inspect
 import logging
+import time
+import zlib
 from abc import ABCMeta, abstractmethod
 from concurrent.futures import ThreadPoolExecutor
-from typing import Union, Callable
-from bleak import BleakClient, BleakGATTCharacteristic
-from threading import Thread
+from dataclasses import dataclass
+from enum import Enum
+from typing import Union, Callable, Dict, Tuple, Any, List, Optional, Awaitable, TypeVar
+from bleak import BleakClient, BleakGATTCharacteristic, BleakGATTServiceCollection
+from threading import Thread, Lock
 from .bluetoothprofile.characteristics import Characteristic
 from .bluetoothprofile.services import Service
+from .batch import NotificationBatch, NotificationBatcher
+from .dispatch import Dispatch, DispatchMode, NotificationBuffer, Subscription, create_dispatcher
 from .errors import BluetoothCharacteristicNotFound, BluetoothServiceNotFound
+from .metrics import DeviceMetrics, DeviceStats
+from .trace import GattOperation, TraceEvent, TraceListener
 
 logger = logging.getLogger(__name__)
 
 ByteData = Union[bytes, bytearray, memoryview]
 
+DEFAULT_ATT_MTU = 23
+"""The ATT MTU every Bluetooth Low Energy connection starts with, leaving 20 bytes for the data of a write"""
+
+T = TypeVar('T')
+
+NotificationListener = Callable[[Service, Characteristic, bytearray], None]
+"""
+A function that is called with the service, the characteristic and the data of every notification received from a
+micro:bit, see `BluetoothDevice.add_notification_listener`
+"""
+
 
 class BluetoothEventLoop(metaclass=ABCMeta):
     @abstractmethod
@@ -31,13 +51,52 @@ class BluetoothEventLoop(metaclass=ABCMeta):
     def create_future(self) -> asyncio.Future:
         pass
 
+    def for_device(self, address: str) -> 'BluetoothEventLoop':
+        """
+        Returns the event loop that communicates with the device with the given address. By default that is this
+        event loop, `ThreadEventLoopPool` spreads devices over several event loops.
+        """
+        return self
+
+
+@dataclass(frozen=True)
+class EventLoopLag:
+    """
+    How late an event loop runs the work that is scheduled on it. When the lag grows, the event loop is too busy:
+    notifications are handled later than they arrive, and commands are sent later than requested.
+
+    Attributes:
+        name (str): the name of the thread of the event loop
+        last (float): the lag of the last measurement, in seconds
+        mean (float): the average lag of all measurements, in seconds
+        max (float): the largest lag measured, in seconds
+        samples (int): the number of measurements
+    """
+    name: str
+    last: float
+    mean: float
+    max: float
+    samples: int
+
 
 class ThreadEventLoop(BluetoothEventLoop):
     _singleton = None
 
-    def __init__(self):
+    def __init__(self, name: str = None, lag_interval: float = None):
+        """
+        Args:
+            name (str): the name of the thread running the event loop (optional)
+            lag_interval (float): measure the lag of the event loop every lag_interval seconds, see `lag` (optional,
+                by default the lag is not measured)
+        """
         self.loop = asyncio.new_event_loop()
-        Thread(target=ThreadEventLoop._start_background_loop, args=(self.loop,), daemon=True).start()
+        self._thread = Thread(target=ThreadEventLoop._start_background_loop, args=(self.loop,), name=name, daemon=True)
+        self._lag_interval = lag_interval
+        self._lag_last = self._lag_total = self._lag_max = 0.0
+        self._lag_samples = 0
+        self._thread.start()
+        if lag_interval:
+            self.loop.call_soon_threadsafe(self._schedule_lag_measurement)
 
     @staticmethod
     def _start_background_loop(loop: asyncio.AbstractEventLoop) -> None:
@@ -52,6 +111,29 @@ class ThreadEventLoop(BluetoothEventLoop):
     def create_future(self) -> asyncio.Future:
         return self.loop.create_future()
 
+    def lag(self) -> Optional[EventLoopLag]:
+        """
+        Returns:
+            The lag of this event loop, None when it is not measured (no lag_interval was given)
+        """
+        if not self._lag_interval:
+            return None
+        samples = self._lag_samples
+        return EventLoopLag(self._thread.name, self._lag_last, self._lag_total / samples if samples else 0.0,
+                            self._lag_max, samples)
+
+    def _schedule_lag_measurement(self) -> None:
+        expected = self.loop.time() + self._lag_interval
+        self.loop.call_at(expected, self._measure_lag, expected)
+
+    def _measure_lag(self, expected: float) -> None:
+        lag = max(self.loop.time() - expected, 0.0)
+        self._lag_last = lag
+        self._lag_total += lag
+        self._lag_max = max(self._lag_max, lag)
+        self._lag_samples += 1
+        self._schedule_lag_measurement()
+
     @staticmethod
     def single_thread():
         if not ThreadEventLoop._singleton:
@@ -60,92 +142,250 @@ class ThreadEventLoop(BluetoothEventLoop):
         return ThreadEventLoop._singleton
 
 
-class BluetoothDevice:
-    _callback_executor = ThreadPoolExecutor()
+class LoopAssignment(Enum):
+    """How `ThreadEventLoopPool` chooses the event loop of a device"""
+    ROUND_ROBIN = 'round_robin'
+    """Devices are given the event loops of the pool one after the other"""
+    ADDRESS_HASH = 'address_hash'
+    """The event loop is chosen by a hash of the address, a device always gets the same loop, across runs"""
+
+
+class ThreadEventLoopPool(BluetoothEventLoop):
+    """
+    A number of event loops, each running on its own thread, that the devices are spread over. With many
+    micro:bits a single event loop can become a bottleneck: all communication and all notifications of all
+    micro:bits are handled by the one thread that runs it.
+
+    A device keeps the event loop it was given for as long as the pool exists. Work that does not belong to a device,
+    such as scanning for micro:bits, runs on the first event loop.
+
+    Example:
+    ```python
+    pool = ThreadEventLoopPool(size=4)
+    microbits = [KaspersMicrobit(address, loop=pool) for address in addresses]
+    ...
+    print(pool.lag())
+    ```
+    """
+
+    def __init__(self, size: int = 4, assignment: LoopAssignment = LoopAssignment.ROUND_ROBIN,
+                 lag_interval: Optional[float] = 1.0):
+        """
+        Args:
+            size (int): the number of event loops (and threads)
+            assignment (LoopAssignment): how the event loop of a device is chosen
+            lag_interval (float): measure the lag of the event loops every lag_interval seconds, None to not measure
+        """
+        if size < 1:
+            raise ValueError('A ThreadEventLoopPool needs at least one event loop')
+        self.loops = [ThreadEventLoop(f'kaspersmicrobit-loop-{i}', lag_interval) for i in range(size)]
+        self._assignment = assignment
+        self._assigned: Dict[str, ThreadEventLoop] = {}
+        self._next = 0
+        self._lock = Lock()
 
-    def __init__(self, client: BleakClient, loop: BluetoothEventLoop = None):
-        self._loop = loop if loop else ThreadEventLoop.single_thread()
-        self._client = client
+    def run_async(self, coroutine) -> concurrent.futures.Future:
+        return self.loops[0].run_async(coroutine)
 
-    def __enter__(self):
-        self.connect()
+    def wrap_future(self, future: concurrent.futures.Future) -> asyncio.Future:
+        return self.loops[0].wrap_future(future)
+
+    def create_future(self) -> asyncio.Future:
+        return self.loops[0].create_future()
+
+    def for_device(self, address: str) -> ThreadEventLoop:
+        with self._lock:
+            loop = self._assigned.get(address)
+            if loop is None:
+                if self._assignment == LoopAssignment.ADDRESS_HASH:
+                    loop = self.loops[zlib.crc32(str(address).encode('utf-8')) % len(self.loops)]
+                else:
+                    loop = self.loops[self._next % len(self.loops)]
+                    self._next += 1
+                self._assigned[address] = loop
+            return loop
+
+    def devices(self) -> Dict[str, str]:
+        """
+        Returns:
+            The name of the thread of the event loop of every device, by address
+        """
+        with self._lock:
+            return {address: loop._thread.name for address, loop in self._assigned.items()}
+
+    def lag(self) -> List[EventLoopLag]:
+        """
+        Returns:
+            The lag of every event loop of the pool, empty when the lag is not measured
+        """
+        return [lag for lag in (loop.lag() for loop in self.loops) if lag]
+
+
+class AsyncBluetoothDevice:
+    """
+    The asyncio counterpart of `BluetoothDevice`. All communication with the micro:bit happens directly on the
+    event loop of the caller, there is no background thread involved. Notification callbacks are called on that
+    same event loop, so they should return quickly and must not block.
+    """
+
+    def __init__(self, client: BleakClient, max_writes_in_flight: int = 8):
+        self._client = client
+        self._max_writes_in_flight = max_writes_in_flight
+        self._write_slots: Optional[asyncio.Semaphore] = None
+        self._mtu = DEFAULT_ATT_MTU
+        self._gatt_services: BleakGATTServiceCollection = None
+        self._gatt_characteristics: Dict[Tuple[Service, Characteristic], BleakGATTCharacteristic] = {}
+        self._notification_listeners: List[NotificationListener] = []
+        self._trace_listeners: List[TraceListener] = []
+
+    async def __aenter__(self):
+        await self.connect()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.disconnect()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
 
-    def connect(self) -> None:
+    async def connect(self) -> None:
         logger.info("(%s) Connecting...", self._client.address)
-        self._loop.run_async(self._client.connect()).result()
-        logger.info("(%s) Connected", self._client.address)
+        await self._client.connect()
+        self._cache_gatt_characteristics()
+        mtu = getattr(self._client, 'mtu_size', None)
+        self._mtu = mtu if isinstance(mtu, int) and mtu > DEFAULT_ATT_MTU else DEFAULT_ATT_MTU
+        logger.info("(%s) Connected, MTU=%d", self._client.address, self._mtu)
 
-    def disconnect(self) -> None:
+    async def disconnect(self) -> None:
         logger.info("(%s) Disconnecting...", self._client.address)
-        self._loop.run_async(self._client.disconnect()).result()
+        await self._client.disconnect()
+        self._clear_gatt_characteristics()
         logger.info("(%s) Disconnected", self._client.address)
 
-    def read(self, service: Service, characteristic: Characteristic) -> bytearray:
-        logger.info("(%s) Reading %s %s", self._client.address, service, characteristic)
+    async def read(self, service: Service, characteristic: Characteristic) -> bytearray:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("(%s) Reading %s %s", self._client.address, service, characteristic)
         gatt_characteristic = self._find_gatt_attribute(service, characteristic)
-        result = self._loop.run_async(self._client.read_gatt_char(gatt_characteristic)).result()
-        logger.info("(%s) Read %s %s, data=%s", self._client.address, service, characteristic, result)
+        started = time.perf_counter() if self._trace_listeners else None
+        try:
+            result = await self._client.read_gatt_char(gatt_characteristic)
+        except Exception as e:
+            if started is not None:
+                self._trace(GattOperation.READ, service, characteristic, 0, started, e)
+            raise
+        if started is not None:
+            self._trace(GattOperation.READ, service, characteristic, len(result), started)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("(%s) Read %s %s, data=%s", self._client.address, service, characteristic, result)
         return result
 
-    def write(self, service: Service, characteristic: Characteristic, data: ByteData) -> None:
-        logger.info("(%s) Writing %s %s, data=%s", self._client.address, service, characteristic, data)
+    async def write(self, service: Service, characteristic: Characteristic, data: ByteData,
+                    without_response: bool = False) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("(%s) Writing %s %s, data=%s", self._client.address, service, characteristic, data)
         gatt_characteristic = self._find_gatt_attribute(service, characteristic)
-        self._loop.run_async(self._client.write_gatt_char(gatt_characteristic, data)).result()
-        logger.info("(%s) Written %s %s", self._client.address, service, characteristic)
-
-    def notify(self, service: Service, characteristic: Characteristic,
-               callback: Callable[[BleakGATTCharacteristic, bytearray], None]) -> None:
-        def wrap_try_catch(fn: Callable[[BleakGATTCharacteristic, bytearray], None]):
-            def suggest_do_in_tkinter(sender: BleakGATTCharacteristic, data: bytearray) -> None:
-                try:
-                    fn(sender, data)
-                except RuntimeError as e:
-                    message, = e.args
-                    if message == "main thread is not in main loop":
-                        raise RuntimeError(
-                            """You tried to call tkinter API from within a KaspersMicrobit notification callback.
-                            This is probably not what you want. If your really want to do this wrap your callback in
-                            kaspersmicrobit.tkinter.do_in_tkinter(tk, your_callback)""") from e
-                    raise e
-
-            return suggest_do_in_tkinter
-
-        def do_on_callback_executor(fn: Callable[[BleakGATTCharacteristic, bytearray], None]):
-            async def submit_to_executor(sender: BleakGATTCharacteristic, data: bytearray):
-                await self._loop.wrap_future(BluetoothDevice._callback_executor.submit(fn, sender, data))
-
-            return submit_to_executor
-
+        started = time.perf_counter() if self._trace_listeners else None
+        try:
+            if without_response and 'write-without-response' in gatt_characteristic.properties:
+                await self._client.write_gatt_char(gatt_characteristic, data, response=False)
+            else:
+                await self._client.write_gatt_char(gatt_characteristic, data)
+        except Exception as e:
+            if started is not None:
+                self._trace(GattOperation.WRITE, service, characteristic, len(data), started, e)
+            raise
+        if started is not None:
+            self._trace(GattOperation.WRITE, service, characteristic, len(data), started)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("(%s) Written %s %s", self._client.address, service, characteristic)
+
+    async def write_nowait(self, service: Service, characteristic: Characteristic, data: ByteData,
+                           without_response: bool = False) -> asyncio.Task:
+        """
+        Starts a write and returns a task that completes when the write is done. Writes start in the order in
+        which write_nowait is called. When max_writes_in_flight writes are in progress, this waits until one of
+        them is done before it starts the next one.
+        """
+        if self._write_slots is None:
+            self._write_slots = asyncio.Semaphore(self._max_writes_in_flight)
+        await self._write_slots.acquire()
+        task = asyncio.ensure_future(self.write(service, characteristic, data, without_response))
+        task.add_done_callback(lambda _: self._write_slots.release())
+        return task
+
+    async def notify(self, service: Service, characteristic: Characteristic,
+                     callback: Callable[[BleakGATTCharacteristic, bytearray], None]) -> None:
         logger.info("(%s) Enable notify %s %s", self._client.address, service, characteristic)
         gatt_characteristic = self._find_gatt_attribute(service, characteristic)
-        self._loop.run_async(
-            self._client.start_notify(gatt_characteristic, do_on_callback_executor(wrap_try_catch(callback)))
-        ).result()
+        started = time.perf_counter() if self._trace_listeners else None
+        await self._client.start_notify(gatt_characteristic, self._tell_listeners(service, characteristic, callback))
+        if started is not None:
+            self._trace(GattOperation.NOTIFY, service, characteristic, 0, started)
         logger.info("(%s) Enabled notify %s %s", self._client.address, service, characteristic)
 
-    def wait_for(self, service: Service, characteristic: Characteristic) -> concurrent.futures.Future[ByteData]:
+    async def wait_for(self, service: Service, characteristic: Characteristic) -> asyncio.Future:
+        """
+        Starts listening for notifications of the given characteristic, and returns a future that completes with
+        the data of the first notification. Notifications are stopped after the first notification was received.
+        """
         gatt_characteristic = self._find_gatt_attribute(service, characteristic)
-        asyncio_future = self._loop.create_future()
+        asyncio_future = asyncio.get_running_loop().create_future()
         address = self._client.address
 
         def set_result_and_stop_notify(sender, data):
-            asyncio_future.set_result(data)
-            logger.info("(%s) %s %s data received=%s", address, service, characteristic, data)
+            if not asyncio_future.done():
+                asyncio_future.set_result(data)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("(%s) %s %s data received=%s", address, service, characteristic, data)
 
-        logger.info("(%s) Wait for notify %s %s", address, service, characteristic)
-        self._loop.run_async(self._client.start_notify(gatt_characteristic, set_result_and_stop_notify)).result()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("(%s) Wait for notify %s %s", address, service, characteristic)
+        await self._client.start_notify(gatt_characteristic,
+                                        self._tell_listeners(service, characteristic, set_result_and_stop_notify))
 
         async def await_future_and_stop_notify():
-            future = await asyncio_future
+            data = await asyncio_future
             await self._client.stop_notify(gatt_characteristic)
-            logger.info("(%s) Stopped waiting for notify %s %s", self._client.address, service, characteristic)
-            return future
-
-        return self._loop.run_async(await_future_and_stop_notify())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("(%s) Stopped waiting for notify %s %s", address, service, characteristic)
+            return data
+
+        return asyncio.ensure_future(await_future_and_stop_notify())
+
+    def add_trace_listener(self, listener: TraceListener) -> None:
+        """
+        Registers a function that is called with a TraceEvent for every read, write, subscription and notification
+        of this device. The listener is called on the event loop and should return quickly.
+        """
+        self._trace_listeners = self._trace_listeners + [listener]
+
+    def remove_trace_listener(self, listener: TraceListener) -> None:
+        self._trace_listeners = [registered for registered in self._trace_listeners if registered != listener]
+
+    def mtu(self) -> int:
+        """
+        Returns the ATT MTU that was negotiated when connecting. Some Bluetooth stacks (BlueZ) always report 23.
+        """
+        return self._mtu
+
+    def max_write_size(self, service: Service, characteristic: Characteristic, without_response: bool = False) -> int:
+        """
+        Returns the maximum number of bytes that can be sent in one write packet to the characteristic
+        """
+        if without_response:
+            gatt_characteristic = self._find_gatt_attribute(service, characteristic)
+            if 'write-without-response' in gatt_characteristic.properties:
+                return gatt_characteristic.max_write_without_response_size
+        return self._mtu - 3
+
+    def add_notification_listener(self, listener: NotificationListener) -> None:
+        """
+        Registers a function that is called with the raw data of every notification of this device, before the
+        data is handed to the callback. The listener is called on the event loop and should return quickly.
+        """
+        self._notification_listeners = self._notification_listeners + [listener]
+
+    def remove_notification_listener(self, listener: NotificationListener) -> None:
+        self._notification_listeners = [
+            registered for registered in self._notification_listeners if registered != listener
+        ]
 
     def is_service_available(self, service: Service) -> bool:
         return not self._get_gatt_service(service) is None
@@ -156,7 +396,72 @@ class BluetoothDevice:
     def name(self) -> str:
         return self._client.name
 
+    def _tell_listeners(self, service: Service, characteristic: Characteristic, callback: Callable):
+        if inspect.iscoroutinefunction(callback):
+            async def tell_listeners_then_await_callback(sender: BleakGATTCharacteristic, data: bytearray):
+                if self._notification_listeners or self._trace_listeners:
+                    self._notification_received(service, characteristic, data)
+                await callback(sender, data)
+
+            return tell_listeners_then_await_callback
+        else:
+            def tell_listeners_then_callback(sender: BleakGATTCharacteristic, data: bytearray):
+                if self._notification_listeners or self._trace_listeners:
+                    self._notification_received(service, characteristic, data)
+                return callback(sender, data)
+
+            return tell_listeners_then_callback
+
+    def _notification_received(self, service: Service, characteristic: Characteristic, data: bytearray) -> None:
+        for listener in self._notification_listeners:
+            try:
+                listener(service, characteristic, data)
+            except Exception:
+                logger.exception("(%s) Exception in notification listener", self.address())
+        if self._trace_listeners:
+            self._trace(GattOperation.NOTIFICATION, service, characteristic, len(data))
+
+    def _trace(self, operation: GattOperation, service: Service, characteristic: Characteristic, size: int,
+               started: float = None, error: Exception = None) -> None:
+        event = TraceEvent(operation, self.address(), service, characteristic, size,
+                           time.perf_counter() - started if started is not None else None, error)
+        for listener in self._trace_listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("(%s) Exception in trace listener", self.address())
+
     def _find_gatt_attribute(self, service: Service, characteristic: Characteristic) -> BleakGATTCharacteristic:
+        gatt_services = self._client.services
+        if gatt_services is not self._gatt_services:
+            # the services were (re)discovered since the cache was built, e.g. after a service changed indication
+            self._clear_gatt_characteristics()
+            self._gatt_services = gatt_services
+
+        key = (service, characteristic)
+        gatt_characteristic = self._gatt_characteristics.get(key)
+        if gatt_characteristic is None:
+            gatt_characteristic = self._lookup_gatt_attribute(service, characteristic)
+            self._gatt_characteristics[key] = gatt_characteristic
+
+        return gatt_characteristic
+
+    def _cache_gatt_characteristics(self) -> None:
+        self._clear_gatt_characteristics()
+        self._gatt_services = self._client.services
+        for gatt_service in self._gatt_services:
+            service = Service.lookup(gatt_service.uuid)
+            if service:
+                for gatt_characteristic in gatt_service.characteristics:
+                    characteristic = Characteristic.lookup(gatt_characteristic.uuid)
+                    if characteristic:
+                        self._gatt_characteristics[(service, characteristic)] = gatt_characteristic
+
+    def _clear_gatt_characteristics(self) -> None:
+        self._gatt_services = None
+        self._gatt_characteristics = {}
+
+    def _lookup_gatt_attribute(self, service: Service, characteristic: Characteristic) -> BleakGATTCharacteristic:
         gatt_service = self._get_gatt_service(service)
         if not gatt_service:
             raise BluetoothServiceNotFound(self._client, service)
@@ -169,3 +474,323 @@ class BluetoothDevice:
 
     def _get_gatt_service(self, service):
         return self._client.services.get_service(service.value)
+
+
+class BluetoothDevice:
+    _callback_executor = ThreadPoolExecutor()
+
+    def __init__(self, client: BleakClient, loop: BluetoothEventLoop = None, max_writes_in_flight: int = 8):
+        self._client = client
+        self._use(AsyncBluetoothDevice(client, max_writes_in_flight), loop)
+
+    def _use(self, device: AsyncBluetoothDevice, loop: Optional[BluetoothEventLoop]) -> None:
+        self._device = device
+        self._loop = (loop if loop else ThreadEventLoop.single_thread()).for_device(device.address())
+        self._workers = []
+        self._subscriptions: List[Subscription] = []
+        self._batchers: Dict[Tuple[Service, Characteristic], NotificationBatcher] = {}
+        self._metrics: Optional[DeviceMetrics] = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    def connect(self) -> None:
+        self._loop.run_async(self._device.connect()).result()
+
+    def disconnect(self) -> None:
+        try:
+            self._loop.run_async(self._device.disconnect()).result()
+        finally:
+            # the last, partial batches are handed to the workers before they stop
+            self._close_batchers(list(self._batchers.values()))
+            self._batchers.clear()
+            self._stop_workers()
+
+    def read(self, service: Service, characteristic: Characteristic) -> bytearray:
+        return self._loop.run_async(self._device.read(service, characteristic)).result()
+
+    def write(self, service: Service, characteristic: Characteristic, data: ByteData,
+              without_response: bool = False) -> None:
+        self._loop.run_async(self._device.write(service, characteristic, data, without_response)).result()
+
+    def write_nowait(self, service: Service, characteristic: Characteristic, data: ByteData,
+                     without_response: bool = False) -> concurrent.futures.Future:
+        """
+        Starts a write without waiting for it to complete. Writes are sent in the order in which they were started.
+        At most max_writes_in_flight writes are in progress at the same time: when that many are in progress, this
+        method waits until one of them is done.
+
+        Args:
+            service (Service): the service of the characteristic
+            characteristic (Characteristic): the characteristic to write
+            data (ByteData): the data to write
+            without_response (bool): use write-without-response when the characteristic supports it. The micro:bit
+                does not confirm such writes, so they are faster, but data can get lost when it arrives faster than
+                the micro:bit processes it.
+
+        Returns:
+            a future that completes when the write is done, or fails with the error of the write
+        """
+        future = concurrent.futures.Future()
+
+        async def start_write():
+            task = await self._device.write_nowait(service, characteristic, data, without_response)
+            task.add_done_callback(lambda done: _copy_outcome(done, future))
+
+        self._loop.run_async(start_write()).result()
+        return future
+
+    def notify(self, service: Service, characteristic: Characteristic,
+               callback: Callable[[BleakGATTCharacteristic, bytearray], None],
+               dispatch: Dispatch = None) -> Subscription:
+        def do_on_callback_executor(fn: Callable[[BleakGATTCharacteristic, bytearray], None]):
+            async def submit_to_executor(sender: BleakGATTCharacteristic, data: bytearray):
+                await self._loop.wrap_future(BluetoothDevice._callback_executor.submit(fn, sender, data))
+
+            return submit_to_executor
+
+        dispatch = dispatch if dispatch else Dispatch.executor()
+        callback = self._timed(service, characteristic, _suggest_do_in_tkinter(callback))
+        if dispatch.mode == DispatchMode.EXECUTOR and not dispatch.is_buffered():
+            dispatched_callback, buffer = do_on_callback_executor(callback), None
+        else:
+            dispatched_callback, buffer = self._dispatch(characteristic, callback, dispatch)
+
+        self._loop.run_async(self._device.notify(service, characteristic, dispatched_callback)).result()
+        self._replace_batcher(service, characteristic, None)
+        return self._subscribed(Subscription(service, characteristic, buffer))
+
+    def notify_batch(self, service: Service, characteristic: Characteristic,
+                     callback: Callable[[NotificationBatch], None], max_batch: int = 32, max_latency_ms: int = 100,
+                     dispatch: Dispatch = None) -> Subscription:
+        """
+        Like notify, but the callback is called with a NotificationBatch of up to max_batch notifications. A batch
+        is handed over when it is full, or max_latency_ms after its first notification arrived: 0 hands over every
+        notification right away, None waits until the batch is full. Batches are always handed over in order. The
+        last, partial batch is handed over on disconnect, or when the characteristic is subscribed to again.
+
+        Raises:
+            ValueError: when max_batch is smaller than 1 or max_latency_ms is negative
+        """
+        max_latency = max_latency_ms / 1000 if max_latency_ms is not None else None
+        NotificationBatcher.validate(max_batch, max_latency)
+        dispatch = dispatch if dispatch else Dispatch.executor()
+        deliver, buffer = self._dispatch(characteristic, self._timed(
+            service, characteristic, _suggest_do_in_tkinter(lambda sender, batch: callback(batch))), dispatch)
+        batcher = NotificationBatcher(deliver, max_batch, max_latency)
+
+        self._loop.run_async(self._device.notify(service, characteristic, batcher.add)).result()
+        self._replace_batcher(service, characteristic, batcher)
+        return self._subscribed(Subscription(service, characteristic, buffer))
+
+    def wait_for(self, service: Service, characteristic: Characteristic) -> concurrent.futures.Future[ByteData]:
+        asyncio_future = self._loop.run_async(self._device.wait_for(service, characteristic)).result()
+
+        async def await_future():
+            return await asyncio_future
+
+        return self._loop.run_async(await_future())
+
+    def run_async(self, command: Callable[[AsyncBluetoothDevice], Awaitable[T]]) -> concurrent.futures.Future:
+        """
+        Runs a coroutine on the event loop of this device, with the AsyncBluetoothDevice this device delegates to.
+        This lets code that is written for asyncio, like `kaspersmicrobit.services.io_pin.AsyncPwmSequencer`, drive
+        this device without a thread of its own.
+
+        Args:
+            command: a function that receives the AsyncBluetoothDevice and returns an awaitable
+
+        Returns:
+            a future with the result of the awaitable
+        """
+        return self._loop.run_async(command(self._device))
+
+    def add_notification_listener(self, listener: NotificationListener) -> None:
+        """
+        Registers a function that is called with the service, the characteristic and the raw data of every
+        notification of this device. Listeners are called on the Bluetooth event loop thread, before the
+        notification is dispatched to its callback, so they should return quickly. This is used for instance by
+        `kaspersmicrobit.recorder.NotificationRecorder`.
+
+        Args:
+            listener (NotificationListener): the function to call for every notification
+        """
+        self._device.add_notification_listener(listener)
+
+    def remove_notification_listener(self, listener: NotificationListener) -> None:
+        """
+        Stops calling a listener that was registered with add_notification_listener
+
+        Args:
+            listener (NotificationListener): the function that should no longer be called
+        """
+        self._device.remove_notification_listener(listener)
+
+    def mtu(self) -> int:
+        """
+        Returns the ATT MTU (maximum transmission unit) that was negotiated with the micro:bit when connecting.
+        Before connecting, and with Bluetooth stacks that do not report it (such as BlueZ), this is 23.
+
+        Returns:
+            the negotiated ATT MTU in bytes
+        """
+        return self._device.mtu()
+
+    def max_write_size(self, service: Service, characteristic: Characteristic, without_response: bool = False) -> int:
+        """
+        Returns the maximum number of bytes that fit in one write packet to a characteristic, given the negotiated
+        MTU. Note that a characteristic can accept less than that: the micro:bit accepts at most 20 bytes per UART
+        write for instance.
+
+        Args:
+            service (Service): the service of the characteristic
+            characteristic (Characteristic): the characteristic that is written
+            without_response (bool): whether write-without-response is used
+
+        Returns:
+            the maximum number of bytes per write packet
+        """
+        return self._device.max_write_size(service, characteristic, without_response)
+
+    def add_trace_listener(self, listener: TraceListener) -> None:
+        """
+        Registers a function that is called with a `TraceEvent` for every read, write, subscription and
+        notification of this device. The events tell the operation, the characteristic, the number of bytes and
+        how long the operation took. When no trace listener is registered, nothing is measured.
+
+        Example:
+        ```python
+        device.add_trace_listener(lambda event: print(json.dumps(dataclasses.asdict(event), default=str)))
+        ```
+
+        Args:
+            listener (TraceListener): the function to call for every operation, it is called on the Bluetooth event
+                loop thread and should return quickly
+        """
+        self._device.add_trace_listener(listener)
+
+    def remove_trace_listener(self, listener: TraceListener) -> None:
+        """
+        Stops calling a listener that was registered with add_trace_listener
+
+        Args:
+            listener (TraceListener): the function that should no longer be called
+        """
+        self._device.remove_trace_listener(listener)
+
+    def enable_metrics(self) -> DeviceMetrics:
+        """
+        Starts collecting metrics of this device: the number of reads, writes and notifications and the bytes
+        transferred per characteristic, latency histograms of reads and writes, how long notification callbacks
+        run, and how many notifications wait in, or were dropped from, the notification queues. The durations of
+        callbacks are only measured for notifications subscribed to after metrics were enabled.
+
+        When metrics are not enabled, nothing is measured.
+
+        Returns:
+            DeviceMetrics: the metrics, see also `stats`
+        """
+        if not self._metrics:
+            self._metrics = DeviceMetrics(self.address())
+            for subscription in self._subscriptions:
+                self._metrics.watch(subscription)
+            self.add_trace_listener(self._metrics.on_trace_event)
+        return self._metrics
+
+    def disable_metrics(self) -> None:
+        """
+        Stops collecting metrics. The callbacks that were measured are no longer timed.
+        """
+        if self._metrics:
+            self.remove_trace_listener(self._metrics.on_trace_event)
+            self._metrics.stop()
+            self._metrics = None
+
+    def stats(self) -> Optional[DeviceStats]:
+        """
+        Returns a snapshot of the metrics of this device, see `enable_metrics`. Use
+        `kaspersmicrobit.metrics.to_prometheus` to export them for Prometheus.
+
+        Returns:
+            DeviceStats: the metrics per characteristic, or None when metrics are not enabled
+        """
+        return self._metrics.stats() if self._metrics else None
+
+    def is_service_available(self, service: Service) -> bool:
+        return self._device.is_service_available(service)
+
+    def address(self) -> str:
+        return self._device.address()
+
+    def name(self) -> str:
+        return self._device.name()
+
+    def _timed(self, service: Service, characteristic: Characteristic, fn: Callable[..., Any]) -> Callable[..., Any]:
+        return self._metrics.timed_callback(service, characteristic, fn) if self._metrics else fn
+
+    def _subscribed(self, subscription: Subscription) -> Subscription:
+        self._subscriptions.append(subscription)
+        if self._metrics:
+            self._metrics.watch(subscription)
+        return subscription
+
+    def _dispatch(self, characteristic: Characteristic, fn: Callable[[BleakGATTCharacteristic, Any], None],
+                  dispatch: Dispatch) -> Tuple[Callable[[BleakGATTCharacteristic, Any], Any], NotificationBuffer]:
+        dispatched, buffer, worker = create_dispatcher(
+            fn, dispatch, BluetoothDevice._callback_executor, name=f'{self.address()} {characteristic}')
+        if worker:
+            self._workers.append(worker)
+        return dispatched, buffer
+
+    def _replace_batcher(self, service: Service, characteristic: Characteristic,
+                         batcher: Optional[NotificationBatcher]) -> None:
+        replaced = self._batchers.pop((service, characteristic), None)
+        if batcher:
+            self._batchers[(service, characteristic)] = batcher
+        if replaced:
+            self._close_batchers([replaced])
+
+    def _close_batchers(self, batchers: List[NotificationBatcher]) -> None:
+        async def close():
+            for batcher in batchers:
+                batcher.close()
+
+        if batchers:
+            self._loop.run_async(close()).result()
+
+    def _stop_workers(self) -> None:
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+
+def _copy_outcome(task: asyncio.Future, future: concurrent.futures.Future) -> None:
+    # the caller may have cancelled the future in the meantime, then there is nothing to copy
+    if not future.set_running_or_notify_cancel():
+        return
+    if task.cancelled():
+        future.cancel()
+    elif task.exception():
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+def _suggest_do_in_tkinter(fn: Callable[[BleakGATTCharacteristic, Any], None]):
+    def suggest_do_in_tkinter(sender: BleakGATTCharacteristic, data: Any) -> None:
+        try:
+            fn(sender, data)
+        except RuntimeError as e:
+            message, = e.args
+            if message == "main thread is not in main loop":
+                raise RuntimeError(
+                    """You tried to call tkinter API from within a KaspersMicrobit notification callback.
+                    This is probably not what you want. If your really want to do this wrap your callback in
+                    kaspersmicrobit.tkinter.do_in_tkinter(tk, your_callback)""") from e
+            raise e
+
+    return suggest_do_in_tkinter
@@ -0,0 +1,330 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from enum import Enum
+from threading import Thread, Condition, Lock
+from typing import Callable, Any, Optional, Tuple
+
+from .bluetoothprofile.characteristics import Characteristic
+from .bluetoothprofile.services import Service
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchMode(Enum):
+    """The ways a notification callback can be invoked"""
+    EXECUTOR = 'executor'
+    """The callback runs on a thread pool shared by all micro:bits (the default)"""
+    INLINE = 'inline'
+    """The callback runs directly on the thread that communicates with the micro:bit"""
+    WORKER = 'worker'
+    """The callback runs on a thread dedicated to this notification, fed by a queue"""
+
+
+class OverflowPolicy(Enum):
+    """What happens with a new notification when the queue of waiting notifications is full"""
+    DROP_NEWEST = 'drop_newest'
+    """The new notification is dropped"""
+    DROP_OLDEST = 'drop_oldest'
+    """The oldest waiting notification is dropped to make room for the new one"""
+    LATEST = 'latest'
+    """Only the most recent notification is kept waiting, it replaces the one that was waiting (if any)"""
+    BLOCK = 'block'
+    """
+    Bluetooth communication with the micro:bit stops until there is room in the queue. Do not call methods of the
+    micro:bit from a callback with this policy, they could wait forever.
+    """
+
+
+@dataclass(frozen=True)
+class Dispatch:
+    """
+    Determines how the callback you pass to a notify method is invoked when a notification arrives.
+
+    - `Dispatch.executor()`: (the default) each notification is handed to a thread pool shared by all micro:bits.
+      This is the safest choice: your callback may take its time and may call other methods of the micro:bit.
+      When you give a queue_size, notifications wait in a queue of that size, and are handled one after the other.
+    - `Dispatch.inline()`: the callback is called directly on the thread that communicates with the micro:bit.
+      This has the lowest overhead, but while your callback runs no other Bluetooth communication can happen. Only
+      use this for callbacks that are very fast, and never call methods of the micro:bit from such a callback:
+      they would wait forever.
+    - `Dispatch.worker(queue_size)`: a thread is started for this notification only. Notifications are put in a
+      queue of at most queue_size elements, and processed in order by that thread.
+    - `Dispatch.latest()`: only the most recent notification is passed to your callback, notifications that arrive
+      while your callback is still busy replace each other. This is what you want for a user interface or a control
+      loop that reacts to sensor data such as the accelerometer: it never falls behind.
+
+    What happens when the queue is full is determined by the OverflowPolicy. The number of dropped notifications
+    can be found on the `Subscription` returned by the notify method.
+
+    Example:
+    ```python
+    microbit.accelerometer.notify(move_ball, dispatch=Dispatch.latest())
+    microbit.magnetometer.notify_data(log_data, dispatch=Dispatch.worker(queue_size=100))
+    ```
+
+    Attributes:
+        mode (DispatchMode): how the callback is invoked
+        queue_size (int): the maximum number of notifications waiting to be processed, None means unlimited
+        overflow (OverflowPolicy): what to do with a new notification when the queue is full
+    """
+    mode: DispatchMode = DispatchMode.EXECUTOR
+    queue_size: Optional[int] = None
+    overflow: OverflowPolicy = OverflowPolicy.DROP_NEWEST
+
+    @staticmethod
+    def executor(queue_size: int = None, overflow: OverflowPolicy = OverflowPolicy.DROP_NEWEST) -> 'Dispatch':
+        """
+        Args:
+            queue_size (int): the maximum number of notifications waiting to be processed (optional)
+            overflow (OverflowPolicy): what to do with a new notification when the queue is full
+
+        Returns:
+            A Dispatch that runs callbacks on the shared thread pool
+        """
+        return Dispatch(DispatchMode.EXECUTOR, queue_size, overflow)
+
+    @staticmethod
+    def inline() -> 'Dispatch':
+        """
+        Returns:
+            A Dispatch that runs callbacks directly on the Bluetooth communication thread
+        """
+        return Dispatch(DispatchMode.INLINE)
+
+    @staticmethod
+    def worker(queue_size: int = 64, overflow: OverflowPolicy = OverflowPolicy.DROP_NEWEST) -> 'Dispatch':
+        """
+        Args:
+            queue_size (int): the maximum number of notifications waiting to be processed
+            overflow (OverflowPolicy): what to do with a new notification when the queue is full
+
+        Returns:
+            A Dispatch that runs callbacks on a dedicated thread
+        """
+        return Dispatch(DispatchMode.WORKER, queue_size, overflow)
+
+    @staticmethod
+    def latest() -> 'Dispatch':
+        """
+        Returns:
+            A Dispatch that runs callbacks on the shared thread pool, with only the latest notification waiting
+        """
+        return Dispatch(DispatchMode.EXECUTOR, 1, OverflowPolicy.LATEST)
+
+    def is_buffered(self) -> bool:
+        return self.mode != DispatchMode.INLINE and \
+            (self.queue_size is not None or self.overflow == OverflowPolicy.LATEST)
+
+    def is_ordered(self) -> bool:
+        """
+        Returns:
+            True when notifications are handled one at a time, in the order they arrived. Only an executor dispatch
+            without a queue_size hands every notification to the thread pool on its own.
+        """
+        return self.mode != DispatchMode.EXECUTOR or self.is_buffered()
+
+
+class NotificationBuffer:
+    """
+    A thread safe queue of notifications, of limited size, that applies an OverflowPolicy when it is full.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, overflow: OverflowPolicy = OverflowPolicy.DROP_NEWEST):
+        self._queue_size = 1 if overflow == OverflowPolicy.LATEST else queue_size
+        self._overflow = overflow
+        self._deque = deque()
+        self._condition = Condition()
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._deque)
+
+    def put(self, item: Any) -> bool:
+        with self._condition:
+            self.received += 1
+            if self._queue_size is not None and len(self._deque) >= self._queue_size:
+                if self._overflow == OverflowPolicy.BLOCK:
+                    while len(self._deque) >= self._queue_size and not self._closed:
+                        self._condition.wait()
+                elif self._overflow == OverflowPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    self._deque.popleft()
+                    self.dropped += 1
+
+            if self._closed:
+                self.dropped += 1
+                return False
+
+            self._deque.append(item)
+            self._condition.notify_all()
+            return True
+
+    def get(self) -> Optional[Any]:
+        """
+        Waits for the next item, returns None when the buffer is closed and empty
+        """
+        with self._condition:
+            while not self._deque and not self._closed:
+                self._condition.wait()
+            return self._pop()
+
+    def poll(self) -> Optional[Any]:
+        """
+        Returns the next item, or None if there is none
+        """
+        with self._condition:
+            return self._pop()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _pop(self) -> Optional[Any]:
+        if not self._deque:
+            return None
+        item = self._deque.popleft()
+        self._condition.notify_all()
+        return item
+
+
+class NotificationWorker:
+    """
+    A thread that calls a callback for every item put in its buffer, in order.
+    """
+
+    def __init__(self, callback: Callable[..., None], buffer: NotificationBuffer, name: str = None):
+        self._callback = callback
+        self._buffer = buffer
+        self._thread = Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, *args: Any) -> bool:
+        return self._buffer.put(args)
+
+    def stop(self) -> None:
+        self._buffer.close()
+
+    def join(self, timeout: float = None) -> None:
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            args = self._buffer.get()
+            if args is None:
+                return
+            try:
+                self._callback(*args)
+            except Exception:
+                logger.exception("Exception in notification callback on %s", self._thread.name)
+
+
+class ExecutorDrain:
+    """
+    Calls a callback for every item put in its buffer, in order, on an executor. As long as there are items in
+    the buffer, at most one task is submitted to the executor.
+    """
+
+    def __init__(self, callback: Callable[..., None], buffer: NotificationBuffer, executor: Executor):
+        self._callback = callback
+        self._buffer = buffer
+        self._executor = executor
+        self._lock = Lock()
+        self._draining = False
+
+    def submit(self, *args: Any) -> bool:
+        accepted = self._buffer.put(args)
+        with self._lock:
+            if self._draining:
+                return accepted
+            self._draining = True
+
+        self._executor.submit(self._drain)
+        return accepted
+
+    def _drain(self) -> None:
+        while True:
+            args = self._buffer.poll()
+            if args is None:
+                with self._lock:
+                    if not len(self._buffer):
+                        self._draining = False
+                        return
+                continue
+            try:
+                self._callback(*args)
+            except Exception:
+                logger.exception("Exception in notification callback")
+
+
+def create_dispatcher(callback: Callable[..., None], dispatch: Dispatch, executor: Executor, name: str = None) \
+        -> Tuple[Callable[..., Any], Optional[NotificationBuffer], Optional[NotificationWorker]]:
+    """
+    Wraps a callback so that it is invoked as described by dispatch.
+
+    Returns:
+        the function to call for every notification, the buffer of the waiting notifications (None for inline
+        dispatch) and the worker thread that was started (only for worker dispatch)
+    """
+    if dispatch.mode == DispatchMode.INLINE:
+        return callback, None, None
+
+    buffer = NotificationBuffer(dispatch.queue_size, dispatch.overflow)
+    if dispatch.mode == DispatchMode.WORKER:
+        worker = NotificationWorker(callback, buffer, name=name)
+        return worker.submit, buffer, worker
+
+    return ExecutorDrain(callback, buffer, executor).submit, buffer, None
+
+
+class Subscription:
+    """
+    Returned by the notify methods. Gives insight in the notifications that are waiting to be handled by your
+    callback, and in how many notifications were dropped because your callback could not keep up.
+
+    Attributes:
+        service (Service): the service of the notification
+        characteristic (Characteristic): the characteristic of the notification
+    """
+
+    def __init__(self, service: Service, characteristic: Characteristic, buffer: NotificationBuffer = None):
+        self.service = service
+        self.characteristic = characteristic
+        self._buffer = buffer
+
+    def is_buffered(self) -> bool:
+        """
+        Returns:
+            True when the notifications wait in a queue, that is counted by pending, dropped and received
+        """
+        return self._buffer is not None
+
+    def pending(self) -> int:
+        """
+        Returns:
+            The number of notifications waiting to be handled by the callback
+        """
+        return len(self._buffer) if self._buffer is not None else 0
+
+    def dropped(self) -> int:
+        """
+        Returns:
+            The number of notifications that were dropped because the queue was full
+        """
+        return self._buffer.dropped if self._buffer is not None else 0
+
+    def received(self) -> Optional[int]:
+        """
+        Returns:
+            The number of notifications received, None when this is not counted (unbuffered dispatch)
+        """
+        return self._buffer.received if self._buffer is not None else None
@@ -0,0 +1,252 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import logging
+from typing import Iterable, Union, List, Dict, Callable, Awaitable, Any, TypeVar
+
+from .bluetoothdevice import BluetoothDevice, BluetoothEventLoop, ThreadEventLoop
+from .dispatch import Dispatch, Subscription, create_dispatcher, NotificationWorker
+from .kaspersmicrobit import AsyncKaspersMicrobit
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+Command = Callable[[AsyncKaspersMicrobit], Awaitable[T]]
+"""A function that sends a command to one micro:bit, for instance `lambda microbit: microbit.led.show(image)`"""
+
+Subscribe = Callable[[AsyncKaspersMicrobit, Callable[[Any], None]], Awaitable[Any]]
+"""
+A function that subscribes a callback to the notifications of one micro:bit, for instance
+`lambda microbit, callback: microbit.accelerometer.notify(callback)`
+"""
+
+
+class AsyncMicrobitFleet:
+    """
+    The asyncio counterpart of `MicrobitFleet`. All micro:bits are driven from the event loop of the caller.
+    """
+
+    def __init__(self, microbits: Iterable[Union[str, AsyncKaspersMicrobit]], max_concurrent_connects: int = 4):
+        """
+        Args:
+            microbits: the addresses of the micro:bits, or AsyncKaspersMicrobit objects
+            max_concurrent_connects (int): the maximum number of micro:bits that are connecting at the same time
+        """
+        self.microbits: List[AsyncKaspersMicrobit] = [
+            microbit if isinstance(microbit, AsyncKaspersMicrobit) else AsyncKaspersMicrobit(microbit)
+            for microbit in microbits
+        ]
+        self.connected: List[AsyncKaspersMicrobit] = []
+        self._max_concurrent_connects = max_concurrent_connects
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    async def connect(self) -> Dict[str, Exception]:
+        """
+        See `MicrobitFleet.connect`
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrent_connects)
+
+        async def connect(microbit: AsyncKaspersMicrobit):
+            async with semaphore:
+                await microbit.connect()
+
+        to_connect = [microbit for microbit in self.microbits if microbit not in self.connected]
+        results = await asyncio.gather(*[connect(microbit) for microbit in to_connect], return_exceptions=True)
+
+        failures = {}
+        for microbit, result in zip(to_connect, results):
+            if isinstance(result, BaseException):
+                logger.warning("(%s) Could not connect: %s", microbit.address(), result)
+                failures[microbit.address()] = result
+            else:
+                self.connected.append(microbit)
+        return failures
+
+    async def disconnect(self) -> Dict[str, Exception]:
+        """
+        See `MicrobitFleet.disconnect`
+        """
+        connected, self.connected = self.connected, []
+        return self._failures(connected, await asyncio.gather(
+            *[microbit.disconnect() for microbit in connected], return_exceptions=True))
+
+    async def run(self, command: Command) -> Dict[str, Union[T, Exception]]:
+        """
+        See `MicrobitFleet.run`
+        """
+        connected = list(self.connected)
+        results = await asyncio.gather(*[command(microbit) for microbit in connected], return_exceptions=True)
+        return {microbit.address(): result for microbit, result in zip(connected, results)}
+
+    async def notify(self, subscribe: Subscribe, callback: Callable[[str, Any], None]) -> Dict[str, Exception]:
+        """
+        Subscribes to the notifications of all connected micro:bits. The callback is called on the event loop,
+        with the address of the micro:bit and the data of the notification.
+
+        See `MicrobitFleet.notify`
+        """
+        def tag_with_address(address: str):
+            return lambda data: callback(address, data)
+
+        connected = list(self.connected)
+        return self._failures(connected, await asyncio.gather(
+            *[subscribe(microbit, tag_with_address(microbit.address())) for microbit in connected],
+            return_exceptions=True))
+
+    @staticmethod
+    async def find(timeout: int = 3, max_concurrent_connects: int = 4) -> 'AsyncMicrobitFleet':
+        """
+        See `MicrobitFleet.find`
+        """
+        return AsyncMicrobitFleet(await AsyncKaspersMicrobit.find_microbits(timeout), max_concurrent_connects)
+
+    @staticmethod
+    def _failures(microbits: List[AsyncKaspersMicrobit], results: List[Any]) -> Dict[str, Exception]:
+        return {
+            microbit.address(): result
+            for microbit, result in zip(microbits, results)
+            if isinstance(result, BaseException)
+        }
+
+
+class MicrobitFleet:
+    """
+    Drives a group of micro:bits, for instance all micro:bits of a classroom. The micro:bits are connected
+    concurrently, commands are sent to all of them in parallel, and their notifications are merged into one stream,
+    tagged with the address of the micro:bit that sent them. All communication happens on one event loop.
+
+    A micro:bit that could not be connected is left out, the others keep working. Commands and subscriptions
+    return the exceptions that occurred per micro:bit, instead of raising them.
+
+    Example:
+    ```python
+    with MicrobitFleet.find(timeout=10) as fleet:
+        fleet.run(lambda microbit: microbit.led.show(Image.HAPPY))
+        fleet.notify(lambda microbit, callback: microbit.buttons.on_button_a(press=callback),
+                     lambda address, button: print(f'{address} pressed {button}'))
+        time.sleep(60)
+    ```
+    """
+
+    def __init__(self, microbits: Iterable[Union[str, AsyncKaspersMicrobit]], max_concurrent_connects: int = 4,
+                 loop: BluetoothEventLoop = None):
+        """
+        Args:
+            microbits: the addresses of the micro:bits, or AsyncKaspersMicrobit objects
+            max_concurrent_connects (int): the maximum number of micro:bits that are connecting at the same time.
+                Connecting to many devices at once is unreliable with some Bluetooth adapters.
+            loop (BluetoothEventLoop): the event loop on which all micro:bits are driven (optional)
+        """
+        self._loop = loop if loop else ThreadEventLoop.single_thread()
+        self._fleet = AsyncMicrobitFleet(microbits, max_concurrent_connects)
+        self._workers: List[NotificationWorker] = []
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect()
+
+    @property
+    def microbits(self) -> List[AsyncKaspersMicrobit]:
+        """All micro:bits of this fleet"""
+        return self._fleet.microbits
+
+    @property
+    def connected(self) -> List[AsyncKaspersMicrobit]:
+        """The micro:bits of this fleet that are connected"""
+        return self._fleet.connected
+
+    def connect(self) -> Dict[str, Exception]:
+        """
+        Connects to all micro:bits of the fleet that are not connected yet, at most max_concurrent_connects at a
+        time. You can call connect again to retry the micro:bits that failed.
+
+        Returns:
+            The exceptions of the micro:bits that could not be connected, by address
+        """
+        return self._loop.run_async(self._fleet.connect()).result()
+
+    def disconnect(self) -> Dict[str, Exception]:
+        """
+        Disconnects all connected micro:bits
+
+        Returns:
+            The exceptions of the micro:bits that could not be disconnected, by address
+        """
+        try:
+            return self._loop.run_async(self._fleet.disconnect()).result()
+        finally:
+            workers, self._workers = self._workers, []
+            for worker in workers:
+                worker.stop()
+
+    def run(self, command: Command, timeout: float = None) -> Dict[str, Union[T, Exception]]:
+        """
+        Sends a command to all connected micro:bits in parallel, and waits until all of them are done.
+
+        Example:
+        ```python
+        fleet.run(lambda microbit: microbit.led.show(Image.HEART))
+        temperatures = fleet.run(lambda microbit: microbit.temperature.read())
+        ```
+
+        Args:
+            command (Command): a function that receives an AsyncKaspersMicrobit and returns an awaitable
+            timeout (float): the maximum number of seconds to wait (optional)
+
+        Returns:
+            The result of the command, or the exception it raised, by address
+        """
+        return self._loop.run_async(self._fleet.run(command)).result(timeout)
+
+    def notify(self, subscribe: Subscribe, callback: Callable[[str, Any], None],
+               dispatch: Dispatch = None) -> Subscription:
+        """
+        Subscribes to the same notifications of all connected micro:bits. The notifications of all micro:bits are
+        merged: the callback is called with the address of the micro:bit and the data of the notification.
+
+        Args:
+            subscribe (Subscribe): a function that subscribes a callback to the notifications of one micro:bit
+            callback: the function that is called with the address and the data of every notification
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch` (optional,
+                by default the callback runs on the thread pool that runs the callbacks of all micro:bits, one
+                notification after the other)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
+        """
+        dispatched, buffer, worker = create_dispatcher(
+            callback, dispatch if dispatch else Dispatch.executor(), BluetoothDevice._callback_executor, name='fleet')
+        if worker:
+            self._workers.append(worker)
+        failures = self._loop.run_async(self._fleet.notify(subscribe, dispatched)).result()
+        for address, exception in failures.items():
+            logger.warning("(%s) Could not subscribe: %s", address, exception)
+        return Subscription(None, None, buffer)
+
+    @staticmethod
+    def find(timeout: int = 3, max_concurrent_connects: int = 4, loop: BluetoothEventLoop = None) -> 'MicrobitFleet':
+        """
+        Scans for micro:bits and returns a fleet with all micro:bits that were found
+
+        Args:
+            timeout: maximum scanning time (in seconds)
+            max_concurrent_connects (int): the maximum number of micro:bits that are connecting at the same time
+            loop (BluetoothEventLoop): the event loop on which all micro:bits are driven (optional)
+
+        Returns:
+            MicrobitFleet: a fleet, that could be empty if no micro:bits were found
+        """
+        loop = loop if loop else ThreadEventLoop.single_thread()
+        microbits = loop.run_async(AsyncKaspersMicrobit.find_microbits(timeout)).result()
+        return MicrobitFleet(microbits, max_concurrent_connects, loop)
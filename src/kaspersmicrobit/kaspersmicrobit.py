@@ -5,18 +5,18 @@ from typing import List, Union
 
 from bleak import BleakClient, BleakScanner
 
-from .bluetoothdevice import BluetoothDevice, BluetoothEventLoop, ThreadEventLoop
+from .bluetoothdevice import BluetoothDevice, BluetoothEventLoop, ThreadEventLoop, AsyncBluetoothDevice
 from .errors import KaspersMicrobitNotFound
-from .services.device_information import DeviceInformationService
-from .services.generic_access import GenericAccessService
-from .services.buttons import ButtonService
-from .services.temperature import TemperatureService
-from .services.accelerometer import AccelerometerService
-from .services.events import EventService
-from .services.uart import UartService
-from .services.magnetometer import MagnetometerService
-from .services.io_pin import IOPinService
-from .services.led import LedService
+from .services.device_information import DeviceInformationService, AsyncDeviceInformationService
+from .services.generic_access import GenericAccessService, AsyncGenericAccessService
+from .services.buttons import ButtonService, AsyncButtonService
+from .services.temperature import TemperatureService, AsyncTemperatureService
+from .services.accelerometer import AccelerometerService, AsyncAccelerometerService
+from .services.events import EventService, AsyncEventService
+from .services.uart import UartService, AsyncUartService
+from .services.magnetometer import MagnetometerService, AsyncMagnetometerService
+from .services.io_pin import IOPinService, AsyncIOPinService
+from .services.led import LedService, AsyncLedService
 
 
 class KaspersMicrobit:
@@ -76,17 +76,20 @@ class KaspersMicrobit:
     See Also: https://makecode.microbit.org/device
     """
 
-    def __init__(self, address_or_bluetoothdevice: Union[str, BluetoothDevice]):
+    def __init__(self, address_or_bluetoothdevice: Union[str, BluetoothDevice], loop: BluetoothEventLoop = None):
         """
         Create a KaspersMicrobit object with a given Bluetooth address.
 
         Args:
             address_or_bluetoothdevice: the bluetooth address of the micro:bit
+            loop (BluetoothEventLoop): you can leave this empty, this determines which thread communicates with the
+                micro:bit, for instance a `kaspersmicrobit.bluetoothdevice.ThreadEventLoopPool` shared by many
+                micro:bits. Not used when a BluetoothDevice is given.
         """
         if isinstance(address_or_bluetoothdevice, BluetoothDevice):
             self._device = address_or_bluetoothdevice
         else:
-            self._device = BluetoothDevice(BleakClient(address_or_bluetoothdevice))
+            self._device = BluetoothDevice(BleakClient(address_or_bluetoothdevice), loop)
 
         self.device_information = DeviceInformationService(self._device)
         self.generic_access = GenericAccessService(self._device)
@@ -144,6 +147,16 @@ class KaspersMicrobit:
         """
         return self._device.address()
 
+    def bluetooth_device(self) -> BluetoothDevice:
+        """
+        Returns the BluetoothDevice this micro:bit communicates through, for instance to record its notifications
+        with a `kaspersmicrobit.recorder.NotificationRecorder`
+
+        Returns:
+            The BluetoothDevice of the micro:bit
+        """
+        return self._device
+
     def name(self) -> str:
         """
         Returns the name of this micro:bit.
@@ -219,3 +232,161 @@ class KaspersMicrobit:
             device_name: device_name == f'BBC micro:bit [{microbit_name.strip()}]' \
             if microbit_name \
             else device_name and device_name.startswith('BBC micro:bit')
+
+
+class AsyncKaspersMicrobit:
+    """
+    The asyncio variant of `KaspersMicrobit`. Use this class when your application already runs an asyncio event
+    loop: all communication with the micro:bit happens directly on that loop, no extra threads are used. This makes
+    it possible to talk to many micro:bits at the same time from a single event loop.
+
+    All methods that communicate with the micro:bit are coroutines. Notification callbacks are called on the event
+    loop, so they should return quickly.
+
+    Example:
+    ```python
+    async def main():
+        async with await AsyncKaspersMicrobit.find_one_microbit() as microbit:
+            await microbit.buttons.on_button_a(press=pressed)
+            await microbit.temperature.notify(lambda temp: print(f'{temp}°C'))
+            await asyncio.sleep(25)
+
+    asyncio.run(main())
+    ```
+
+    Attributes:
+        device_information (AsyncDeviceInformationService):
+            To request information about the maker of your micro:bit
+        generic_access (AsyncGenericAccessService):
+            To request information about your micro:bit
+        buttons (AsyncButtonService):
+            To notify you when one of the two buttons on the micro:bit is pressed (or released)
+        temperature (AsyncTemperatureService):
+            To request the temperature of the environment of the micro:bit (or to be notified)
+        accelerometer (AsyncAccelerometerService):
+            To notify you of acceleration (movement, collision,...) of the micro:bit
+        events (AsyncEventService):
+            To subscribe to receive events from various components of the micro:bit
+        uart (AsyncUartService):
+            To send or receive text to the micro:bit
+        io_pin (AsyncIOPinService):
+            Control, read, configure the I/O contacts (pins) on the micro:bit
+        led (AsyncLedService):
+            Control the LEDs of the micro:bit
+        magnetometer (AsyncMagnetometerService):
+            To read the data from the magnetometer, or to be notified.
+    """
+
+    def __init__(self, address_or_bluetoothdevice: Union[str, AsyncBluetoothDevice]):
+        """
+        Create an AsyncKaspersMicrobit object with a given Bluetooth address.
+
+        Args:
+            address_or_bluetoothdevice: the bluetooth address of the micro:bit
+        """
+        if isinstance(address_or_bluetoothdevice, AsyncBluetoothDevice):
+            self._device = address_or_bluetoothdevice
+        else:
+            self._device = AsyncBluetoothDevice(BleakClient(address_or_bluetoothdevice))
+
+        self.device_information = AsyncDeviceInformationService(self._device)
+        self.generic_access = AsyncGenericAccessService(self._device)
+        self.buttons = AsyncButtonService(self._device)
+        self.temperature = AsyncTemperatureService(self._device)
+        self.accelerometer = AsyncAccelerometerService(self._device)
+        self.events = AsyncEventService(self._device)
+        self.uart = AsyncUartService(self._device)
+        self.io_pin = AsyncIOPinService(self._device)
+        self.led = AsyncLedService(self._device)
+        self.magnetometer = AsyncMagnetometerService(self._device)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    async def connect(self) -> None:
+        """
+        Connect to the micro:bit. See `KaspersMicrobit.connect` for troubleshooting tips.
+        """
+        await self._device.connect()
+
+    async def disconnect(self) -> None:
+        """
+        Disconnect the micro:bit.
+        You must be connected to this micro:bit to successfully invoke this method.
+        """
+        await self._device.disconnect()
+
+    def address(self) -> str:
+        """
+        Returns the Bluetooth address of this micro:bit
+
+        Returns:
+            The address of the micro:bit
+        """
+        return self._device.address()
+
+    def bluetooth_device(self) -> AsyncBluetoothDevice:
+        """
+        Returns the AsyncBluetoothDevice this micro:bit communicates through
+
+        Returns:
+            The AsyncBluetoothDevice of the micro:bit
+        """
+        return self._device
+
+    def name(self) -> str:
+        """
+        Returns the name of this micro:bit.
+
+        Returns:
+            The name of the micro:bit
+        """
+        return self._device.name()
+
+    @staticmethod
+    async def find_microbits(timeout: int = 3) -> List['AsyncKaspersMicrobit']:
+        """
+        Scans for Bluetooth devices. Returns a list of micro:bits found within the timeout
+
+        Args:
+             timeout: maximum scanning time (in seconds)
+
+        Returns:
+            A list of micro:bits found, this can also be empty if no micro:bits were found
+        """
+        devices = await BleakScanner.discover(timeout)
+        name_filter = KaspersMicrobit._name_filter()
+        return [
+            AsyncKaspersMicrobit(AsyncBluetoothDevice(BleakClient(d)))
+            for d in devices
+            if name_filter(d.name)
+        ]
+
+    @staticmethod
+    async def find_one_microbit(microbit_name: str = None, timeout: int = 3) -> 'AsyncKaspersMicrobit':
+        """
+        Scans for Bluetooth devices. Returns exactly 1 micro:bit if one is found.
+        See `KaspersMicrobit.find_one_microbit`
+
+        Args:
+             microbit_name: the name of the micro:bit. This is optional.
+             timeout: maximum scanning time (in seconds)
+
+        Returns:
+            AsyncKaspersMicrobit: The micro:bit found
+
+        Raises:
+            KaspersMicrobitNotFound: if no micro:bit was found
+        """
+        def name_filter(d, ad):
+            return KaspersMicrobit._name_filter(microbit_name)(ad.local_name)
+
+        device = await BleakScanner.find_device_by_filter(filterfunc=name_filter, timeout=timeout)
+        if device:
+            return AsyncKaspersMicrobit(AsyncBluetoothDevice(BleakClient(device)))
+        else:
+            raise KaspersMicrobitNotFound(microbit_name, await BleakScanner.discover(timeout))
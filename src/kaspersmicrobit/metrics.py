@@ -0,0 +1,353 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import time
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, Tuple, List, Optional, Callable, Any, Iterable
+
+from .bluetoothprofile.characteristics import Characteristic
+from .bluetoothprofile.services import Service
+from .dispatch import Subscription
+from .trace import TraceEvent, GattOperation
+
+_SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+
+
+class LatencyHistogram:
+    """
+    Counts durations in buckets of (almost) constant relative size, like an HDR histogram: every power of two
+    microseconds is divided in 16 buckets, so percentiles are accurate to about 6%, whatever the duration.
+    """
+
+    def __init__(self):
+        self._counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        index = _bucket_index(int(seconds * 1_000_000))
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+        self._counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Args:
+            percentile (float): a number between 0 and 100
+
+        Returns:
+            The duration in seconds that percentile percent of the recorded durations do not exceed
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, round(percentile / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(max(_bucket_upper_bound(index) / 1_000_000, self.min), self.max)
+        return self.max
+
+    def stats(self) -> Optional['LatencyStats']:
+        if not self.count:
+            return None
+        return LatencyStats(self.count, self.total / self.count, self.min, self.max,
+                            self.percentile(50), self.percentile(90), self.percentile(99))
+
+
+def _bucket_index(microseconds: int) -> int:
+    if microseconds < _SUB_BUCKETS:
+        return max(microseconds, 0)
+    shift = microseconds.bit_length() - _SUB_BUCKET_BITS - 1
+    return _SUB_BUCKETS * (shift + 1) + (microseconds >> shift) - _SUB_BUCKETS
+
+
+def _bucket_upper_bound(index: int) -> int:
+    if index < _SUB_BUCKETS:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return ((index % _SUB_BUCKETS + _SUB_BUCKETS + 1) << shift) - 1
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    """
+    Summary of a number of durations, all in seconds
+
+    Attributes:
+        count (int): the number of durations
+        mean (float): the average duration
+        min (float): the shortest duration
+        max (float): the longest duration
+        p50 (float): the median duration
+        p90 (float): 90% of the durations were at most this long
+        p99 (float): 99% of the durations were at most this long
+    """
+    count: int
+    mean: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+
+
+@dataclass(frozen=True)
+class CharacteristicStats:
+    """
+    The metrics of one characteristic of a micro:bit
+
+    Attributes:
+        service (Service): the service of the characteristic
+        characteristic (Characteristic): the characteristic
+        reads (int): the number of reads
+        writes (int): the number of writes
+        notifications (int): the number of notifications received
+        errors (int): the number of reads and writes that failed
+        bytes_read (int): the number of bytes read
+        bytes_written (int): the number of bytes written
+        bytes_received (int): the number of bytes received in notifications
+        notifications_per_second (float): the average number of notifications per second since metrics were enabled
+        read_latency (LatencyStats): how long reads took, None if there were none
+        write_latency (LatencyStats): how long writes took, None if there were none
+        callback_duration (LatencyStats): how long the notification callbacks ran, None if there were none
+        pending (int): the number of notifications waiting to be handled by a callback, None when no notification
+            of the characteristic is dispatched through a queue (for instance with the default `Dispatch.executor()`)
+            so that this is not known
+        dropped (int): the number of notifications dropped because a callback could not keep up
+    """
+    service: Service
+    characteristic: Characteristic
+    reads: int = 0
+    writes: int = 0
+    notifications: int = 0
+    errors: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    bytes_received: int = 0
+    notifications_per_second: float = 0.0
+    read_latency: Optional[LatencyStats] = None
+    write_latency: Optional[LatencyStats] = None
+    callback_duration: Optional[LatencyStats] = None
+    pending: Optional[int] = None
+    dropped: int = 0
+
+
+@dataclass(frozen=True)
+class DeviceStats:
+    """
+    A snapshot of the metrics of a micro:bit, see `BluetoothDevice.stats`
+
+    Attributes:
+        address (str): the address of the micro:bit
+        elapsed (float): the number of seconds since metrics were enabled
+        characteristics (List[CharacteristicStats]): the metrics per characteristic that was used
+    """
+    address: str
+    elapsed: float
+    characteristics: List[CharacteristicStats] = field(default_factory=list)
+
+    def characteristic(self, characteristic: Characteristic) -> Optional[CharacteristicStats]:
+        """
+        Returns:
+            the metrics of the given characteristic, None when it was not used
+        """
+        return next((stats for stats in self.characteristics if stats.characteristic == characteristic), None)
+
+
+class _CharacteristicMetrics:
+    def __init__(self):
+        self.counts = {operation: 0 for operation in GattOperation}
+        self.bytes = {operation: 0 for operation in GattOperation}
+        self.errors = 0
+        self.read_latency = LatencyHistogram()
+        self.write_latency = LatencyHistogram()
+        self.callback_duration = LatencyHistogram()
+
+
+class DeviceMetrics:
+    """
+    Collects the metrics of one micro:bit: the number of operations and bytes per characteristic, latency
+    histograms of reads and writes, the duration of notification callbacks and the state of the notification
+    queues. Created by `BluetoothDevice.enable_metrics`, it is fed by the trace events of the device.
+    """
+
+    def __init__(self, address: str):
+        self._address = address
+        self._started = time.monotonic()
+        self._lock = Lock()
+        self._characteristics: Dict[Tuple[Service, Characteristic], _CharacteristicMetrics] = {}
+        self._subscriptions: List[Subscription] = []
+        self._measuring = True
+
+    def on_trace_event(self, event: TraceEvent) -> None:
+        with self._lock:
+            metrics = self._metrics(event.service, event.characteristic)
+            if event.error is not None:
+                metrics.errors += 1
+                return
+            metrics.counts[event.operation] += 1
+            metrics.bytes[event.operation] += event.size
+            if event.operation == GattOperation.READ:
+                metrics.read_latency.record(event.latency)
+            elif event.operation == GattOperation.WRITE:
+                metrics.write_latency.record(event.latency)
+
+    def timed_callback(self, service: Service, characteristic: Characteristic,
+                       callback: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wraps a notification callback so that its duration is recorded. After `stop` the wrapper calls the callback
+        right away, without measuring it.
+        """
+        def timed(*args):
+            if not self._measuring:
+                return callback(*args)
+            started = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                duration = time.perf_counter() - started
+                with self._lock:
+                    self._metrics(service, characteristic).callback_duration.record(duration)
+
+        return timed
+
+    def stop(self) -> None:
+        """
+        Stops measuring the callbacks that were wrapped by timed_callback
+        """
+        self._measuring = False
+
+    def watch(self, subscription: Subscription) -> None:
+        """
+        Includes the pending and dropped notifications of a subscription in the metrics
+        """
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._metrics(subscription.service, subscription.characteristic)
+
+    def stats(self) -> DeviceStats:
+        """
+        Returns:
+            a snapshot of the metrics
+        """
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            return DeviceStats(self._address, elapsed, [
+                self._characteristic_stats(service, characteristic, metrics, elapsed)
+                for (service, characteristic), metrics in self._characteristics.items()
+            ])
+
+    def _characteristic_stats(self, service: Service, characteristic: Characteristic,
+                              metrics: _CharacteristicMetrics, elapsed: float) -> CharacteristicStats:
+        subscriptions = [s for s in self._subscriptions if s.characteristic == characteristic]
+        buffered = [s for s in subscriptions if s.is_buffered()]
+        return CharacteristicStats(
+            service, characteristic,
+            reads=metrics.counts[GattOperation.READ],
+            writes=metrics.counts[GattOperation.WRITE],
+            notifications=metrics.counts[GattOperation.NOTIFICATION],
+            errors=metrics.errors,
+            bytes_read=metrics.bytes[GattOperation.READ],
+            bytes_written=metrics.bytes[GattOperation.WRITE],
+            bytes_received=metrics.bytes[GattOperation.NOTIFICATION],
+            notifications_per_second=metrics.counts[GattOperation.NOTIFICATION] / elapsed if elapsed else 0.0,
+            read_latency=metrics.read_latency.stats(),
+            write_latency=metrics.write_latency.stats(),
+            callback_duration=metrics.callback_duration.stats(),
+            pending=sum(s.pending() for s in buffered) if buffered else None,
+            dropped=sum(s.dropped() for s in subscriptions),
+        )
+
+    def _metrics(self, service: Service, characteristic: Characteristic) -> _CharacteristicMetrics:
+        metrics = self._characteristics.get((service, characteristic))
+        if metrics is None:
+            metrics = self._characteristics[(service, characteristic)] = _CharacteristicMetrics()
+        return metrics
+
+
+def to_prometheus(stats: Iterable[DeviceStats]) -> str:
+    """
+    Formats the metrics of one or more micro:bits in the Prometheus text exposition format
+
+    Example:
+    ```python
+    print(to_prometheus([microbit_1.stats(), microbit_2.stats()]))
+    ```
+
+    Args:
+        stats: snapshots of the metrics of micro:bits, see `BluetoothDevice.stats`
+
+    Returns:
+        the metrics as text, ready to be served on a /metrics endpoint
+    """
+    counters = [
+        ('operations_total', 'Number of GATT operations', lambda s: [
+            ({'operation': 'read'}, s.reads), ({'operation': 'write'}, s.writes),
+            ({'operation': 'notification'}, s.notifications)]),
+        ('errors_total', 'Number of failed GATT reads and writes', lambda s: [({}, s.errors)]),
+        ('bytes_total', 'Number of bytes transferred', lambda s: [
+            ({'operation': 'read'}, s.bytes_read), ({'operation': 'write'}, s.bytes_written),
+            ({'operation': 'notification'}, s.bytes_received)]),
+        ('dropped_notifications_total', 'Notifications dropped because a callback could not keep up',
+         lambda s: [({}, s.dropped)]),
+    ]
+    gauges = [
+        ('pending_notifications', 'Notifications waiting to be handled by a callback', lambda s: [({}, s.pending)]),
+    ]
+    summaries = [
+        ('read_latency_seconds', 'Duration of GATT reads', lambda s: s.read_latency),
+        ('write_latency_seconds', 'Duration of GATT writes', lambda s: s.write_latency),
+        ('callback_duration_seconds', 'Duration of notification callbacks', lambda s: s.callback_duration),
+    ]
+
+    stats = list(stats)
+    lines = []
+    for metric_type, metrics in (('counter', counters), ('gauge', gauges)):
+        for name, help_text, samples in metrics:
+            lines += [f'# HELP kaspersmicrobit_{name} {help_text}', f'# TYPE kaspersmicrobit_{name} {metric_type}']
+            for device_stats, characteristic_stats in _all_characteristic_stats(stats):
+                for labels, value in samples(characteristic_stats):
+                    if value is None:
+                        continue
+                    lines.append(f'kaspersmicrobit_{name}'
+                                 f'{_labels(device_stats, characteristic_stats, labels)} {value}')
+
+    for name, help_text, latency in summaries:
+        lines += [f'# HELP kaspersmicrobit_{name} {help_text}', f'# TYPE kaspersmicrobit_{name} summary']
+        for device_stats, characteristic_stats in _all_characteristic_stats(stats):
+            latency_stats = latency(characteristic_stats)
+            if latency_stats is None:
+                continue
+            for quantile, value in (('0.5', latency_stats.p50), ('0.9', latency_stats.p90),
+                                    ('0.99', latency_stats.p99)):
+                lines.append(f'kaspersmicrobit_{name}'
+                             f'{_labels(device_stats, characteristic_stats, {"quantile": quantile})} {value}')
+            labels = _labels(device_stats, characteristic_stats, {})
+            lines.append(f'kaspersmicrobit_{name}_sum{labels} {latency_stats.mean * latency_stats.count}')
+            lines.append(f'kaspersmicrobit_{name}_count{labels} {latency_stats.count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _all_characteristic_stats(stats: List[DeviceStats]):
+    return ((device_stats, characteristic_stats)
+            for device_stats in stats
+            for characteristic_stats in device_stats.characteristics)
+
+
+def _labels(device_stats: DeviceStats, characteristic_stats: CharacteristicStats, extra: Dict[str, str]) -> str:
+    labels = {'address': device_stats.address, 'characteristic': characteristic_stats.characteristic.name, **extra}
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,343 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Records the notifications of one or more micro:bits to a compact binary file, and reads them back.
+
+A recording starts with an 8 byte header (the magic bytes `KMBR` and a version number), followed by records.
+Every record starts with a header of 14 bytes: the length of the payload (uint32), the time at which the
+notification was received (float64, seconds since the epoch) and a channel number (uint16), all little endian. The
+payload is the data of the notification, exactly as it was received.
+
+A channel is the combination of a micro:bit address, a service and a characteristic. The first time a channel is
+used in a recording, a record with channel number 0xFFFF defines it: its payload is the channel number (uint16)
+followed by the address, the service uuid and the characteristic uuid separated by zero bytes. This keeps the
+records of the notifications small, while the recording still describes itself.
+
+Example:
+```python
+with KaspersMicrobit.find_one_microbit() as microbit, NotificationRecorder('session.kmbr') as recorder:
+    recorder.attach(microbit)
+    microbit.accelerometer.notify(lambda data: None)
+    time.sleep(3600)
+
+with NotificationLog('session.kmbr') as log:
+    for notification in log:
+        print(notification.timestamp, notification.characteristic, notification.data)
+```
+"""
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+from dataclasses import dataclass
+from threading import Lock, Condition, Thread
+from typing import Dict, Tuple, Union, List, Iterator, Callable, overload
+
+from .bluetoothdevice import BluetoothDevice, ByteData
+from .bluetoothprofile.characteristics import Characteristic
+from .bluetoothprofile.services import Service
+
+logger = logging.getLogger(__name__)
+
+_FILE_HEADER = struct.Struct('<4sHH')
+_MAGIC = b'KMBR'
+_VERSION = 1
+_RECORD_HEADER = struct.Struct('<IdH')
+_CHANNEL_NUMBER = struct.Struct('<H')
+_DEFINE_CHANNEL = 0xFFFF
+_MAX_CHANNELS = _DEFINE_CHANNEL
+
+PathLike = Union[str, bytes, os.PathLike]
+ChannelKey = Tuple[str, Service, Characteristic]
+
+
+@dataclass(frozen=True)
+class RecordedNotification:
+    """
+    A notification read from a recording
+
+    Attributes:
+        timestamp (float): the time at which the notification was received, in seconds since the epoch
+        address (str): the Bluetooth address of the micro:bit that sent the notification
+        service (Service): the service of the notification
+        characteristic (Characteristic): the characteristic of the notification
+        data (bytes): the data of the notification, exactly as it was received
+    """
+    timestamp: float
+    address: str
+    service: Service
+    characteristic: Characteristic
+    data: bytes
+
+
+class NotificationRecorder:
+    """
+    Appends the raw data of every notification to a file. The data is not decoded: recording is cheap enough to
+    capture hours of accelerometer or magnetometer data of several micro:bits.
+
+    Records are appended to a buffer in memory, that is all that happens on the thread that communicates with the
+    micro:bit. A writer thread of the recorder writes the buffer to the file when it is full, and syncs the file to
+    disk at most every fsync_interval seconds, so that only the last moments of a recording can be lost when the
+    computer crashes. Recording to an existing file appends to it.
+    """
+
+    def __init__(self, path: PathLike, buffer_size: int = 64 * 1024, fsync_interval: float = 1.0):
+        """
+        Args:
+            path: the file to record to
+            buffer_size (int): the number of bytes kept in memory before they are written to the file
+            fsync_interval (float): the maximum number of seconds between two syncs of the file to disk, None to only
+                sync when the recorder is closed
+        """
+        self._file = open(path, 'ab')
+        self._buffer_size = buffer_size
+        self._fsync_interval = fsync_interval
+        self._lock = Lock()
+        self._buffer_full = Condition(self._lock)
+        self._file_lock = Lock()
+        self._buffer = bytearray()
+        self._channels: Dict[ChannelKey, int] = {}
+        self._listeners: Dict[BluetoothDevice, Callable] = {}
+        self._unsynced = False
+        self._closing = False
+        if self._file.tell() == 0:
+            self._buffer += _FILE_HEADER.pack(_MAGIC, _VERSION, 0)
+        self._writer = Thread(target=self._write_in_background, name='kaspersmicrobit-recorder', daemon=True)
+        self._writer.start()
+
+    def __enter__(self) -> 'NotificationRecorder':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def attach(self, device: Union[BluetoothDevice, 'kaspersmicrobit.KaspersMicrobit']) -> None:  # noqa: F821
+        """
+        Starts recording all notifications of a device. Notifications are only received for characteristics that
+        something subscribed to, for instance with `AccelerometerService.notify`.
+
+        Args:
+            device: the BluetoothDevice or KaspersMicrobit to record
+        """
+        device = _bluetooth_device(device)
+        address = device.address()
+
+        def record(service: Service, characteristic: Characteristic, data: bytearray):
+            self.record(address, service, characteristic, data)
+
+        self._listeners[device] = record
+        device.add_notification_listener(record)
+
+    def detach(self, device: Union[BluetoothDevice, 'kaspersmicrobit.KaspersMicrobit']) -> None:  # noqa: F821
+        """
+        Stops recording the notifications of a device
+
+        Args:
+            device: the BluetoothDevice or KaspersMicrobit that was attached
+        """
+        device = _bluetooth_device(device)
+        listener = self._listeners.pop(device, None)
+        if listener:
+            device.remove_notification_listener(listener)
+
+    def record(self, address: str, service: Service, characteristic: Characteristic, data: ByteData,
+               timestamp: float = None) -> None:
+        """
+        Appends one notification to the recording. This only adds it to the buffer, the buffer is written to the
+        file by the writer thread.
+
+        Args:
+            address (str): the address of the micro:bit that sent the notification
+            service (Service): the service of the notification
+            characteristic (Characteristic): the characteristic of the notification
+            data: the data of the notification
+            timestamp (float): the time the notification was received, by default now
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            channel = self._channels.get((address, service, characteristic))
+            if channel is None:
+                channel = self._define_channel(address, service, characteristic, timestamp)
+
+            self._buffer += _RECORD_HEADER.pack(len(data), timestamp, channel)
+            self._buffer += data
+            if len(self._buffer) >= self._buffer_size:
+                self._buffer_full.notify()
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Writes the buffered records to the file
+
+        Args:
+            fsync (bool): also sync the file to disk
+        """
+        self._write_buffer(fsync)
+
+    def close(self) -> None:
+        """
+        Stops recording the attached devices, writes the buffered records and closes the file
+        """
+        for device in list(self._listeners):
+            self.detach(device)
+        with self._lock:
+            self._closing = True
+            self._buffer_full.notify()
+        self._writer.join()
+        if not self._file.closed:
+            self.flush(fsync=True)
+            self._file.close()
+
+    def _define_channel(self, address: str, service: Service, characteristic: Characteristic, timestamp: float) -> int:
+        channel = len(self._channels)
+        if channel >= _MAX_CHANNELS:
+            raise ValueError(f'A recording can contain at most {_MAX_CHANNELS} channels')
+
+        definition = _CHANNEL_NUMBER.pack(channel) + \
+            b'\0'.join(value.encode('utf-8') for value in (address, service.value, characteristic.value))
+        self._buffer += _RECORD_HEADER.pack(len(definition), timestamp, _DEFINE_CHANNEL)
+        self._buffer += definition
+        self._channels[(address, service, characteristic)] = channel
+        return channel
+
+    def _write_in_background(self) -> None:
+        last_fsync = time.monotonic()
+        while True:
+            timeout = None if self._fsync_interval is None else \
+                max(last_fsync + self._fsync_interval - time.monotonic(), 0)
+            with self._lock:
+                self._buffer_full.wait_for(lambda: self._closing or len(self._buffer) >= self._buffer_size, timeout)
+                if self._closing:
+                    return
+            fsync = self._fsync_interval is not None and time.monotonic() - last_fsync >= self._fsync_interval
+            try:
+                self._write_buffer(fsync)
+            except Exception:
+                logger.exception("Could not write the recording")
+            if fsync:
+                last_fsync = time.monotonic()
+
+    def _write_buffer(self, fsync: bool) -> None:
+        with self._file_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, bytearray()
+            if buffer:
+                self._file.write(buffer)
+                self._file.flush()
+                self._unsynced = True
+            if fsync and self._unsynced:
+                os.fsync(self._file.fileno())
+                self._unsynced = False
+
+
+class NotificationLog:
+    """
+    A recording made by `NotificationRecorder`, opened for reading. The file is memory mapped: only the record
+    headers are read when the log is opened, the data of a notification is read when it is accessed. Notifications
+    can be accessed in any order by their index.
+
+    A record that was only partially written, for instance because the recording process crashed, is ignored.
+    """
+
+    def __init__(self, path: PathLike):
+        """
+        Args:
+            path: the file to read
+
+        Raises:
+            ValueError: when the file is not a recording
+        """
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        if len(self._mmap) < _FILE_HEADER.size or \
+                _FILE_HEADER.unpack_from(self._mmap)[0:2] != (_MAGIC, _VERSION):
+            self.close()
+            raise ValueError(f'{path!r} is not a recording of micro:bit notifications')
+
+        self._channels: List[ChannelKey] = []
+        self._offsets = array('Q')
+        self._channel_indexes = array('H')
+        self._index()
+
+    def __enter__(self) -> 'NotificationLog':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @overload
+    def __getitem__(self, index: int) -> RecordedNotification: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[RecordedNotification]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        offset = self._offsets[index]
+        length, timestamp, _ = _RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + _RECORD_HEADER.size
+        address, service, characteristic = self._channels[self._channel_indexes[index]]
+        return RecordedNotification(timestamp, address, service, characteristic, self._mmap[start:start + length])
+
+    def __iter__(self) -> Iterator[RecordedNotification]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def timestamp(self, index: int) -> float:
+        """
+        Returns the time at which a notification was received, without reading its data
+
+        Args:
+            index (int): the index of the notification in the log
+
+        Returns:
+            the time in seconds since the epoch
+        """
+        return _RECORD_HEADER.unpack_from(self._mmap, self._offsets[index])[1]
+
+    def channels(self) -> List[ChannelKey]:
+        """
+        Returns:
+            all combinations of (address, service, characteristic) that appear in the log
+        """
+        return list(dict.fromkeys(self._channels))
+
+    def close(self) -> None:
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+    def _index(self) -> None:
+        channel_indexes: Dict[int, int] = {}
+        offset = _FILE_HEADER.size
+        end = len(self._mmap)
+        while offset + _RECORD_HEADER.size <= end:
+            length, _, channel = _RECORD_HEADER.unpack_from(self._mmap, offset)
+            start = offset + _RECORD_HEADER.size
+            if start + length > end:
+                break
+
+            if channel == _DEFINE_CHANNEL:
+                (defined,) = _CHANNEL_NUMBER.unpack_from(self._mmap, start)
+                address, service, characteristic = \
+                    self._mmap[start + _CHANNEL_NUMBER.size:start + length].decode('utf-8').split('\0')
+                channel_indexes[defined] = len(self._channels)
+                self._channels.append((address, Service(service), Characteristic(characteristic)))
+            else:
+                self._offsets.append(offset)
+                self._channel_indexes.append(channel_indexes[channel])
+            offset = start + length
+
+
+def _bluetooth_device(device):
+    return device if hasattr(device, 'add_notification_listener') else device.bluetooth_device()
@@ -0,0 +1,211 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import concurrent.futures
+import inspect
+import logging
+import time
+from typing import Union, Optional, Dict, Tuple, Callable, List, Any, Awaitable
+
+from .bluetoothdevice import AsyncBluetoothDevice, BluetoothDevice, BluetoothEventLoop, ByteData, GattOperation
+from .bluetoothprofile.characteristics import Characteristic
+from .bluetoothprofile.services import Service
+from .recorder import NotificationLog, PathLike
+
+logger = logging.getLogger(__name__)
+
+AS_FAST_AS_POSSIBLE = None
+"""Pass this as speed to replay a recording without waiting between notifications"""
+
+
+class AsyncReplayBluetoothDevice(AsyncBluetoothDevice):
+    """
+    The asyncio counterpart of `ReplayBluetoothDevice`
+    """
+
+    def __init__(self, log: Union[NotificationLog, PathLike], speed: Optional[float] = 1.0, address: str = None):
+        if speed is not AS_FAST_AS_POSSIBLE and speed <= 0:
+            raise ValueError(f'The speed must be greater than 0, not {speed}')
+        super().__init__(client=None)
+        # a log that is passed in belongs to the caller, a log that is opened here is closed on disconnect
+        self._owns_log = not isinstance(log, NotificationLog)
+        self._log = NotificationLog(log) if self._owns_log else log
+        self._speed = speed
+        self._clock = time.monotonic
+        self._sleep = asyncio.sleep
+        channels = self._log.channels()
+        self._address = address if address else (channels[0][0] if channels else '')
+        self._values: Dict[Tuple[Service, Characteristic], bytes] = {}
+        self._callbacks: Dict[Tuple[Service, Characteristic], Callable[[Any, bytearray], Any]] = {}
+        self._waiters: Dict[Tuple[Service, Characteristic], List[asyncio.Future]] = {}
+        self._playback: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        logger.info("(%s) Connected to replay", self._address)
+
+    async def disconnect(self) -> None:
+        if self._playback:
+            self._playback.cancel()
+            self._playback = None
+        self._callbacks.clear()
+        if self._owns_log:
+            self._log.close()
+        logger.info("(%s) Disconnected from replay", self._address)
+
+    async def read(self, service: Service, characteristic: Characteristic) -> bytearray:
+        """
+        Returns the last value that was written to, or replayed for this characteristic. Before the replay reached
+        the first notification of a characteristic, its first recorded value is returned.
+
+        Raises:
+            LookupError: when the characteristic was never written, and does not appear in the recording
+        """
+        key = (service, characteristic)
+        if key not in self._values:
+            for notification in self._notifications():
+                if (notification.service, notification.characteristic) == key:
+                    self._values[key] = notification.data
+                    break
+            else:
+                raise LookupError(f'{characteristic} was not written and does not appear in the recording')
+        if self._trace_listeners:
+            self._trace(GattOperation.READ, service, characteristic, len(self._values[key]), time.perf_counter())
+        return bytearray(self._values[key])
+
+    async def write(self, service: Service, characteristic: Characteristic, data: ByteData,
+                    without_response: bool = False) -> None:
+        logger.debug("(%s) Writing %s %s, data=%s", self._address, service, characteristic, data)
+        self._values[(service, characteristic)] = bytes(data)
+        if self._trace_listeners:
+            self._trace(GattOperation.WRITE, service, characteristic, len(data), time.perf_counter())
+
+    async def notify(self, service: Service, characteristic: Characteristic,
+                     callback: Callable[[Any, bytearray], None]) -> None:
+        self._callbacks[(service, characteristic)] = callback
+
+    async def wait_for(self, service: Service, characteristic: Characteristic) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((service, characteristic), []).append(future)
+        return future
+
+    async def start(self) -> asyncio.Task:
+        """
+        Starts replaying the recorded notifications, and returns a task that completes when all notifications were
+        replayed. Subscribe to the notifications you need before calling start.
+        """
+        if self._playback is None or self._playback.done():
+            self._playback = asyncio.ensure_future(self._replay())
+        return self._playback
+
+    def max_write_size(self, service: Service, characteristic: Characteristic, without_response: bool = False) -> int:
+        return self._mtu - 3
+
+    def is_service_available(self, service: Service) -> bool:
+        recorded_services = {channel_service for address, channel_service, _ in self._log.channels()
+                             if address == self._address}
+        return service in recorded_services or any(service == value_service for value_service, _ in self._values)
+
+    def address(self) -> str:
+        return self._address
+
+    def name(self) -> str:
+        return f'replay of {self._address}'
+
+    def _notifications(self):
+        return (notification for notification in self._log if notification.address == self._address)
+
+    async def _replay(self) -> None:
+        started = self._clock()
+        first_timestamp = None
+        replayed = 0
+        logger.info("(%s) Replay started at speed %s", self._address, self._speed)
+        for notification in self._notifications():
+            if self._speed is AS_FAST_AS_POSSIBLE:
+                await self._sleep(0)
+            else:
+                if first_timestamp is None:
+                    first_timestamp = notification.timestamp
+                delay = (notification.timestamp - first_timestamp) / self._speed - (self._clock() - started)
+                await self._sleep(max(delay, 0))
+
+            self._deliver(notification.service, notification.characteristic, bytearray(notification.data))
+            replayed += 1
+        logger.info("(%s) Replay ended, %d notifications replayed", self._address, replayed)
+
+    def _deliver(self, service: Service, characteristic: Characteristic, data: bytearray) -> None:
+        key = (service, characteristic)
+        self._values[key] = bytes(data)
+        if self._notification_listeners or self._trace_listeners:
+            self._notification_received(service, characteristic, data)
+
+        for waiter in self._waiters.pop(key, []):
+            if not waiter.done():
+                waiter.set_result(data)
+
+        callback = self._callbacks.get(key)
+        if callback:
+            try:
+                result = callback(None, data)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(self._await_callback(result))
+            except Exception:
+                logger.exception("(%s) Exception in notification callback", self._address)
+
+    async def _await_callback(self, result: Awaitable) -> None:
+        try:
+            await result
+        except Exception:
+            logger.exception("(%s) Exception in notification callback", self._address)
+
+
+class ReplayBluetoothDevice(BluetoothDevice):
+    """
+    A BluetoothDevice that replays the notifications of a recording made with
+    `kaspersmicrobit.recorder.NotificationRecorder`, instead of communicating with a micro:bit. This allows you to
+    test and benchmark code that handles notifications without a micro:bit or even a Bluetooth adapter.
+
+    Notifications are replayed through the same dispatch as a real micro:bit (see `kaspersmicrobit.dispatch`), with
+    the timing of the recording, at a multiple of that speed, or as fast as possible. Writes are remembered, and
+    reads return the last written or replayed value. The sender passed to the notification callbacks is None.
+
+    Example:
+    ```python
+    device = ReplayBluetoothDevice('session.kmbr', speed=10)
+    with KaspersMicrobit(device) as microbit:
+        microbit.accelerometer.notify(print)
+        device.start().result()
+    ```
+    """
+
+    def __init__(self, log: Union[NotificationLog, PathLike], speed: Optional[float] = 1.0, address: str = None,
+                 loop: BluetoothEventLoop = None):
+        """
+        Args:
+            log: the recording, or the path of the recording to replay. A recording opened from a path is closed
+                on disconnect, a NotificationLog that is passed in is left open
+            speed (float): 1 to replay with the timing of the recording, 10 to replay 10 times as fast,...
+                AS_FAST_AS_POSSIBLE (None) to replay without waiting between notifications
+            address (str): the micro:bit to replay when the recording contains several micro:bits (optional, by
+                default the first micro:bit of the recording)
+            loop (BluetoothEventLoop): the event loop on which the notifications are replayed (optional)
+
+        Raises:
+            ValueError: when the speed is 0 or negative, or the file is not a recording
+        """
+        self._client = None
+        self._use(AsyncReplayBluetoothDevice(log, speed, address), loop)
+
+    def start(self) -> concurrent.futures.Future:
+        """
+        Starts replaying the recorded notifications. Subscribe to the notifications you need before calling start.
+
+        Returns:
+            a future that completes when all notifications were replayed
+        """
+        task = self._loop.run_async(self._device.start()).result()
+
+        async def await_task():
+            return await task
+
+        return self._loop.run_async(await_task())
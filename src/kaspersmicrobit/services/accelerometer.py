@@ -1,10 +1,13 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import struct
 
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice, ByteData
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+from .samplebatch import SampleBatch
 from typing import Union, Literal, Callable
 from dataclasses import dataclass
 
@@ -22,6 +25,9 @@ Warning:
 """
 
 
+_XYZ = struct.Struct('<hhh')
+
+
 @dataclass
 class AccelerometerData:
     """
@@ -32,17 +38,18 @@ class AccelerometerData:
         y (int): horizontal (from back to front)
         z (int): vertical (from bottom to top)
     """
+    __slots__ = ('x', 'y', 'z')
     x: int
     y: int
     z: int
 
     @staticmethod
     def from_bytes(values: ByteData):
-        return AccelerometerData(
-            int.from_bytes(values[0:2], "little", signed=True),
-            int.from_bytes(values[2:4], "little", signed=True),
-            int.from_bytes(values[4:6], "little", signed=True)
-        )
+        return AccelerometerData(*_XYZ.unpack_from(values))
+
+
+def _period_from_bytes(data: ByteData) -> int:
+    return int.from_bytes(data[0:2], "little")
 
 
 class AccelerometerService:
@@ -112,7 +119,7 @@ class AccelerometerService:
         """
         return self._device.is_service_available(Service.ACCELEROMETER)
 
-    def notify(self, callback: Callable[[AccelerometerData], None]):
+    def notify(self, callback: Callable[[AccelerometerData], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method when you want to be notified of new accelerometer data. How often you
         receive new data depends on the accelerometer period
@@ -120,14 +127,48 @@ class AccelerometerService:
         Args:
             callback (Callable[[AccelerometerData], None]): a function that is called when there is new data
                 from the accelerometer. The new AccelerometerData is passed as an argument to this function
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the accelerometer service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the accelerometer service is running but there was no way to
+                activate accelerometer data notifications (normally does not occur)
+        """
+        return self._device.notify(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                                   lambda sender, data: callback(AccelerometerData.from_bytes(data)), dispatch=dispatch)
+
+    def notify_batch(self, callback: Callable[[SampleBatch], None], max_batch: int = 32, max_latency_ms: int = 100,
+                     dispatch: Dispatch = None) -> Subscription:
+        """
+        Like notify, but you receive the accelerometer data in batches: the callback is called with up to max_batch
+        measurements at once, stored in compact arrays. Use this when you receive a lot of accelerometer data, and
+        handling each measurement separately is too slow (for example to log all data to a file).
+
+        Args:
+            callback (Callable[[SampleBatch], None]): a function that is called with a batch of accelerometer data
+            max_batch (int): the maximum number of measurements in a batch
+            max_latency_ms (int): a batch is handed over at the latest this number of milliseconds after its first
+                measurement was received, even when it is not full yet (0 hands over every measurement right away,
+                None waits until the batch is full). The last, partial batch is handed over on disconnect
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many batches are waiting for, or were dropped by, the callback
 
         Raises:
+            ValueError: When max_batch is smaller than 1 or max_latency_ms is negative
             errors.BluetoothServiceNotFound: When the accelerometer service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the accelerometer service is running but there was no way to
                 activate accelerometer data notifications (normally does not occur)
         """
-        self._device.notify(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
-                            lambda sender, data: callback(AccelerometerData.from_bytes(data)))
+        return self._device.notify_batch(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                                         lambda batch: callback(SampleBatch.from_notification_batch(batch)),
+                                         max_batch, max_latency_ms, dispatch=dispatch)
 
     def read(self) -> AccelerometerData:
         """
@@ -174,4 +215,48 @@ class AccelerometerService:
             errors.BluetoothCharacteristicNotFound: When the accelerometer service is running but there was no way to
                 accelerometer period to be read (normally does not occur)
         """
-        return int.from_bytes(self._device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD)[0:2], "little")
+        return _period_from_bytes(self._device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD))
+
+
+class AsyncAccelerometerService:
+    """
+    The asyncio variant of `AccelerometerService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Notification callbacks are called on the event loop and should not block.
+    """
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the accelerometer Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the accelerometer was found, false if not.
+        """
+        return self._device.is_service_available(Service.ACCELEROMETER)
+
+    async def notify(self, callback: Callable[[AccelerometerData], None]):
+        """
+        See `AccelerometerService.notify`
+        """
+        await self._device.notify(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                                  lambda sender, data: callback(AccelerometerData.from_bytes(data)))
+
+    async def read(self) -> AccelerometerData:
+        """
+        See `AccelerometerService.read`
+        """
+        return AccelerometerData.from_bytes(
+            await self._device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA))
+
+    async def set_period(self, period: AccelerometerPeriod):
+        """
+        See `AccelerometerService.set_period`
+        """
+        await self._device.write(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD, period.to_bytes(2, "little"))
+
+    async def read_period(self) -> int:
+        """
+        See `AccelerometerService.read_period`
+        """
+        return _period_from_bytes(await self._device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD))
@@ -5,7 +5,8 @@ from typing import Callable
 from enum import IntEnum
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
 
 ButtonCallback = Callable[[str], None]
 """
@@ -61,7 +62,7 @@ class ButtonService:
         return self._device.is_service_available(Service.BUTTON)
 
     def on_button_a(self, press: ButtonCallback = None, long_press: ButtonCallback = None,
-                    release: ButtonCallback = None):
+                    release: ButtonCallback = None, dispatch: Dispatch = None) -> Subscription:
         """
         You can call this function if you want to be notified when the A button of your micro:bit is pressed
         (press), long pressed (long_press) or released (release)
@@ -74,17 +75,22 @@ class ButtonService:
             long_press (ButtonCallback): a function that is called when pressed for a long time (at least 2 seconds).
                 the A button is pressed
             release (ButtonCallback): a function called when the A button is released
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the button service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the button service is running but there was no way to get the
                 activate notifications for button A (normally does not occur)
         """
-        self._device.notify(Service.BUTTON, Characteristic.BUTTON_A,
-                            ButtonService._create_button_callback('A', press, long_press, release))
+        return self._device.notify(Service.BUTTON, Characteristic.BUTTON_A,
+                                   ButtonService._create_button_callback('A', press, long_press, release), dispatch=dispatch)
 
     def on_button_b(self, press: ButtonCallback = None, long_press: ButtonCallback = None,
-                    release: ButtonCallback = None):
+                    release: ButtonCallback = None, dispatch: Dispatch = None) -> Subscription:
         """
         You can call this function if you want to be notified when the B button of your micro:bit is pressed
         (press), long pressed (long_press) or released (release)
@@ -97,14 +103,19 @@ class ButtonService:
             long_press (ButtonCallback): a function that is called when pressed for a long time (at least 2 seconds).
                 the B button is pressed
             release (ButtonCallback): a function called when the B button is released
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the button service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the button service is running but there was no way to get the
                 activate notifications for button B (normally does not occur)
         """
-        self._device.notify(Service.BUTTON, Characteristic.BUTTON_B,
-                            ButtonService._create_button_callback('B', press, long_press, release))
+        return self._device.notify(Service.BUTTON, Characteristic.BUTTON_B,
+                                   ButtonService._create_button_callback('B', press, long_press, release), dispatch=dispatch)
 
     def read_button_a(self) -> ButtonState:
         """
@@ -133,3 +144,50 @@ class ButtonService:
                 read the state of button B (normally does not occur)
         """
         return ButtonState(self._device.read(Service.BUTTON, Characteristic.BUTTON_B)[0])
+
+
+class AsyncButtonService:
+    """
+    The asyncio variant of `ButtonService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    The button callbacks are called on the event loop and should not block.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the Bluetooth service button is found on the connected micro:bit.
+
+        Returns:
+            true if the button service was found, false if not.
+        """
+        return self._device.is_service_available(Service.BUTTON)
+
+    async def on_button_a(self, press: ButtonCallback = None, long_press: ButtonCallback = None,
+                          release: ButtonCallback = None):
+        """
+        See `ButtonService.on_button_a`
+        """
+        await self._device.notify(Service.BUTTON, Characteristic.BUTTON_A,
+                                  ButtonService._create_button_callback('A', press, long_press, release))
+
+    async def on_button_b(self, press: ButtonCallback = None, long_press: ButtonCallback = None,
+                          release: ButtonCallback = None):
+        """
+        See `ButtonService.on_button_b`
+        """
+        await self._device.notify(Service.BUTTON, Characteristic.BUTTON_B,
+                                  ButtonService._create_button_callback('B', press, long_press, release))
+
+    async def read_button_a(self) -> ButtonState:
+        """
+        See `ButtonService.read_button_a`
+        """
+        return ButtonState((await self._device.read(Service.BUTTON, Characteristic.BUTTON_A))[0])
+
+    async def read_button_b(self) -> ButtonState:
+        """
+        See `ButtonService.read_button_b`
+        """
+        return ButtonState((await self._device.read(Service.BUTTON, Characteristic.BUTTON_B))[0])
@@ -2,7 +2,7 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from ..bluetoothdevice import BluetoothDevice
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
 
@@ -97,3 +97,51 @@ class DeviceInformationService:
                 to read the manufacturer's name (normally not found)
         """
         return str(self._device.read(Service.DEVICE_INFORMATION, Characteristic.MANUFACTURER_NAME_STRING), "utf-8")
+
+
+class AsyncDeviceInformationService:
+    """
+    The asyncio variant of `DeviceInformationService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the device information Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the device information service was found, false if not.
+        """
+        return self._device.is_service_available(Service.DEVICE_INFORMATION)
+
+    async def read_model_number(self) -> str:
+        """
+        See `DeviceInformationService.read_model_number`
+        """
+        return str(await self._device.read(Service.DEVICE_INFORMATION, Characteristic.MODEL_NUMBER_STRING), "utf-8")
+
+    async def read_serial_number(self) -> str:
+        """
+        See `DeviceInformationService.read_serial_number`
+        """
+        return str(await self._device.read(Service.DEVICE_INFORMATION, Characteristic.SERIAL_NUMBER_STRING), "utf-8")
+
+    async def read_firmware_revision(self) -> str:
+        """
+        See `DeviceInformationService.read_firmware_revision`
+        """
+        return str(await self._device.read(Service.DEVICE_INFORMATION, Characteristic.FIRMWARE_REVISION_STRING), "utf-8")
+
+    async def read_hardware_revision(self) -> str:
+        """
+        See `DeviceInformationService.read_hardware_revision`
+        """
+        return str(await self._device.read(Service.DEVICE_INFORMATION, Characteristic.HARDWARE_REVISION_STRING), "utf-8")
+
+    async def read_manufacturer_name(self) -> str:
+        """
+        See `DeviceInformationService.read_manufacturer_name`
+        """
+        return str(await self._device.read(Service.DEVICE_INFORMATION, Characteristic.MANUFACTURER_NAME_STRING), "utf-8")
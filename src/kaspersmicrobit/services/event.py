@@ -1,11 +1,14 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import struct
 from dataclasses import dataclass
 from typing import List
 
 from ..bluetoothdevice import ByteData
 
+_EVENT = struct.Struct('<HH')
+
 
 @dataclass
 class Event:
@@ -25,26 +28,35 @@ class Event:
 
     @staticmethod
     def from_bytes(values: ByteData):
-        return Event(
-            int.from_bytes(values[0:2], "little"),
-            int.from_bytes(values[2:4], "little")
-        )
+        return Event(*_EVENT.unpack_from(values))
 
     def to_bytes(self) -> bytes:
-        return self.device_id.to_bytes(2, "little") + self.event_value.to_bytes(2, "little")
+        try:
+            return _EVENT.pack(self.device_id, self.event_value)
+        except struct.error as e:
+            raise OverflowError(f'{self} does not fit in 2 unsigned bytes per field') from e
 
     @staticmethod
     def list_from_bytes(values: ByteData) -> List['Event']:
-        result = []
-        for i in range(0, len(values), 4):
-            result.append(Event.from_bytes(values[i:i + 4]))
-
-        return result
+        """
+        Decodes the events in one go, without slicing the data per event. Trailing bytes that do not make up a
+        complete event are ignored.
+        """
+        complete = len(values) - len(values) % _EVENT.size
+        return [Event(device_id, event_value) for device_id, event_value in _EVENT.iter_unpack(memoryview(values)[:complete])]
 
     @staticmethod
     def list_to_bytes(values: List['Event']) -> bytes:
-        result = bytes()
-        for event in values:
-            result += event.to_bytes()
-
-        return result
+        """
+        Encodes the events into one preallocated buffer
+
+        Raises:
+            OverflowError: when a device_id or event_value does not fit in 2 unsigned bytes
+        """
+        result = bytearray(len(values) * _EVENT.size)
+        for offset, event in zip(range(0, len(result), _EVENT.size), values):
+            try:
+                _EVENT.pack_into(result, offset, event.device_id, event.event_value)
+            except struct.error as e:
+                raise OverflowError(f'{event} does not fit in 2 unsigned bytes per field') from e
+        return bytes(result)
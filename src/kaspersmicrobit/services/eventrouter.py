@@ -0,0 +1,180 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+from typing import Callable, Dict, Tuple, List, Optional, Set
+
+from .event import Event
+from ..dispatch import Dispatch, Subscription
+
+logger = logging.getLogger(__name__)
+
+ANY_EVENT = 0
+"""Pass this as event_value to handle every event of a device"""
+
+EventHandler = Callable[[Event], None]
+
+
+class _Routes:
+    """
+    The handlers by (device_id, event_value), shared by EventRouter and AsyncEventRouter
+    """
+
+    def __init__(self):
+        self._handlers: Dict[Tuple[int, int], List[EventHandler]] = {}
+
+    def _add(self, device_id: int, event_value: int, handler: EventHandler) -> List[Event]:
+        """
+        Returns:
+            the requirements that have to be written to the micro:bit to receive the events of the new handler
+        """
+        already_required = self._required()
+        self._handlers.setdefault((device_id, event_value), []).append(handler)
+        return [Event(*key) for key in self._required() - already_required]
+
+    def _remove(self, device_id: int, event_value: int, handler: EventHandler) -> None:
+        handlers = self._handlers.get((device_id, event_value), [])
+        if handler in handlers:
+            handlers.remove(handler)
+        if not handlers:
+            self._handlers.pop((device_id, event_value), None)
+
+    def _required(self) -> Set[Tuple[int, int]]:
+        """
+        The events the micro:bit should send: a device with a handler for ANY_EVENT only needs one requirement
+        """
+        any_event = {device_id for device_id, event_value in self._handlers if event_value == ANY_EVENT}
+        return {(device_id, event_value) for device_id, event_value in self._handlers
+                if event_value == ANY_EVENT or device_id not in any_event}
+
+    def route(self, event: Event) -> None:
+        """
+        Calls the handlers of the event: the handlers of its device_id and event_value, and the handlers of its
+        device_id and ANY_EVENT. An exception raised by a handler is logged, the other handlers are still called.
+
+        Args:
+            event (Event): an event received from the micro:bit
+        """
+        handlers = self._handlers.get((event.device_id, event.event_value))
+        if event.event_value != ANY_EVENT:
+            any_event_handlers = self._handlers.get((event.device_id, ANY_EVENT))
+            if any_event_handlers:
+                handlers = handlers + any_event_handlers if handlers else any_event_handlers
+        if not handlers:
+            return
+        for handler in list(handlers):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Exception in the handler of %s", event)
+
+
+class EventRouter(_Routes):
+    """
+    Calls a handler per kind of event, instead of one callback for all events of the micro:bit. Handlers are
+    registered per device_id and event_value (see `kaspersmicrobit.services.v1_events` and
+    `kaspersmicrobit.services.v2_events`), and found with one dictionary lookup when an event arrives. The router
+    tells the micro:bit to send exactly the events that have a handler, with `EventService.write_client_requirements`.
+
+    Example:
+    ```python
+    router = microbit.events.router()
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, lambda event: print('A clicked'))
+    router.on(v2_events.DEVICE_ID_GESTURE, ANY_EVENT, lambda event: print('gesture', event.event_value))
+    router.start()
+    ```
+    """
+
+    def __init__(self, events: 'EventService'):  # noqa: F821
+        """
+        Args:
+            events (EventService): the event service of the micro:bit
+        """
+        super().__init__()
+        self._events = events
+        self._subscription: Optional[Subscription] = None
+
+    def on(self, device_id: int, event_value: int, handler: EventHandler) -> None:
+        """
+        Calls the handler for every event with the given device_id and event_value. When the router is started, the
+        micro:bit is told right away to send these events.
+
+        Args:
+            device_id (int): the id of the device or component
+            event_value (int): the value of the event, or ANY_EVENT (0) for every event of the device
+            handler: a function that is called with the Event
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the events service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
+                to write the client requirements (normally does not occur)
+        """
+        requirements = self._add(device_id, event_value, handler)
+        if self._subscription and requirements:
+            self._events.write_client_requirements(*requirements)
+
+    def off(self, device_id: int, event_value: int, handler: EventHandler) -> None:
+        """
+        Stops calling a handler. The micro:bit keeps sending the events, they are ignored when there are no handlers
+        left.
+        """
+        self._remove(device_id, event_value, handler)
+
+    def start(self, dispatch: Dispatch = None) -> Subscription:
+        """
+        Tells the micro:bit which events to send, and starts routing them to the handlers
+
+        Args:
+            dispatch (Dispatch): how the handlers are invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the handlers run on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many events are waiting for, or were dropped by, the handlers
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the events service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
+                to activate the notifications for the microbit events (normally does not occur)
+        """
+        if self._subscription is None:
+            self._subscription = self._events.notify_microbit_event(self.route, dispatch=dispatch)
+            self._events.write_client_requirements(*[Event(*key) for key in sorted(self._required())])
+        return self._subscription
+
+
+class AsyncEventRouter(_Routes):
+    """
+    The asyncio counterpart of `EventRouter`, the handlers are called on the event loop and should not block
+    """
+
+    def __init__(self, events: 'AsyncEventService'):  # noqa: F821
+        """
+        Args:
+            events (AsyncEventService): the event service of the micro:bit
+        """
+        super().__init__()
+        self._events = events
+        self._started = False
+
+    async def on(self, device_id: int, event_value: int, handler: EventHandler) -> None:
+        """
+        See `EventRouter.on`
+        """
+        requirements = self._add(device_id, event_value, handler)
+        if self._started and requirements:
+            await self._events.write_client_requirements(*requirements)
+
+    def off(self, device_id: int, event_value: int, handler: EventHandler) -> None:
+        """
+        See `EventRouter.off`
+        """
+        self._remove(device_id, event_value, handler)
+
+    async def start(self) -> None:
+        """
+        See `EventRouter.start`
+        """
+        if not self._started:
+            self._started = True
+            await self._events.notify_microbit_event(self.route)
+            await self._events.write_client_requirements(*[Event(*key) for key in sorted(self._required())])
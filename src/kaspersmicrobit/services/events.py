@@ -1,13 +1,15 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
-
+import asyncio
 from typing import Callable, List
 
-from ..bluetoothdevice import BluetoothDevice
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
 from .event import Event
+from .eventrouter import EventRouter, AsyncEventRouter
 
 
 def _for_each(events: List[Event], callback: Callable[[Event], None]):
@@ -44,7 +46,17 @@ class EventService:
         """
         return self._device.is_service_available(Service.EVENT)
 
-    def notify_microbit_requirements(self, callback: Callable[[Event], None]):
+    def router(self) -> EventRouter:
+        """
+        Creates a router, that calls a handler per device_id and event_value, and tells the micro:bit which events
+        to send. See `kaspersmicrobit.services.eventrouter.EventRouter`
+
+        Returns:
+            EventRouter: a router without handlers, call start after adding handlers
+        """
+        return EventRouter(self)
+
+    def notify_microbit_requirements(self, callback: Callable[[Event], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method when you want to be notified which events the micro:bit would like to receive
         When an event contains an event_value of 0, this means that the micro:bit wants to be informed of each
@@ -54,14 +66,19 @@ class EventService:
 
         Args:
             callback: a function that is called with an Event
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the events service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
                 to activate the notifications for the microbit requirements (normally does not occur)
         """
-        self._device.notify(Characteristic.MICROBIT_REQUIREMENTS,
-                            lambda sender, data: _for_each(Event.list_from_bytes(data), callback))
+        return self._device.notify(Service.EVENT, Characteristic.MICROBIT_REQUIREMENTS,
+                                   lambda sender, data: _for_each(Event.list_from_bytes(data), callback), dispatch=dispatch)
 
     def read_microbit_requirements(self) -> List[Event]:
         """
@@ -81,7 +98,7 @@ class EventService:
         """
         return Event.list_from_bytes(self._device.read(Service.EVENT, Characteristic.MICROBIT_REQUIREMENTS))
 
-    def notify_microbit_event(self, callback: Callable[[Event], None]):
+    def notify_microbit_event(self, callback: Callable[[Event], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method when you want to be notified of events that occur on the micro:bit
         You will only be notified of events that you have indicated with `write_client_requirements`
@@ -89,14 +106,19 @@ class EventService:
 
         Args:
             callback: a function that is called with an Event
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the events service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
                 to activate the notifications for the microbit events (normally does not occur)
         """
-        self._device.notify(Service.EVENT, Characteristic.MICROBIT_EVENT,
-                            lambda sender, data: _for_each(Event.list_from_bytes(data), callback))
+        return self._device.notify(Service.EVENT, Characteristic.MICROBIT_EVENT,
+                                   lambda sender, data: _for_each(Event.list_from_bytes(data), callback), dispatch=dispatch)
 
     def read_microbit_event(self) -> List[Event]:
         """
@@ -130,8 +152,10 @@ class EventService:
             errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
                 to write the client requirements (normally does not occur)
         """
-        for event in events:
-            self._device.write(Service.EVENT, Characteristic.CLIENT_REQUIREMENTS, event.to_bytes())
+        writes = [self._device.write_nowait(Service.EVENT, Characteristic.CLIENT_REQUIREMENTS, event.to_bytes())
+                  for event in events]
+        for write in writes:
+            write.result()
 
     def write_client_event(self, *events: Event):
         """
@@ -147,5 +171,74 @@ class EventService:
             errors.BluetoothCharacteristicNotFound: When the events service is running but there was no way
                 to write the client events (normally does not occur)
         """
-        for event in events:
-            self._device.write(Service.EVENT, Characteristic.CLIENT_EVENT, event.to_bytes())
+        writes = [self._device.write_nowait(Service.EVENT, Characteristic.CLIENT_EVENT, event.to_bytes())
+                  for event in events]
+        for write in writes:
+            write.result()
+
+
+class AsyncEventService:
+    """
+    The asyncio variant of `EventService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Notification callbacks are called on the event loop and should not block.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the event Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the event service was found, false if not.
+        """
+        return self._device.is_service_available(Service.EVENT)
+
+    def router(self) -> AsyncEventRouter:
+        """
+        See `EventService.router`
+        """
+        return AsyncEventRouter(self)
+
+    async def notify_microbit_requirements(self, callback: Callable[[Event], None]):
+        """
+        See `EventService.notify_microbit_requirements`
+        """
+        await self._device.notify(Service.EVENT, Characteristic.MICROBIT_REQUIREMENTS,
+                                  lambda sender, data: _for_each(Event.list_from_bytes(data), callback))
+
+    async def read_microbit_requirements(self) -> List[Event]:
+        """
+        See `EventService.read_microbit_requirements`
+        """
+        return Event.list_from_bytes(await self._device.read(Service.EVENT, Characteristic.MICROBIT_REQUIREMENTS))
+
+    async def notify_microbit_event(self, callback: Callable[[Event], None]):
+        """
+        See `EventService.notify_microbit_event`
+        """
+        await self._device.notify(Service.EVENT, Characteristic.MICROBIT_EVENT,
+                                  lambda sender, data: _for_each(Event.list_from_bytes(data), callback))
+
+    async def read_microbit_event(self) -> List[Event]:
+        """
+        See `EventService.read_microbit_event`
+        """
+        return Event.list_from_bytes(await self._device.read(Service.EVENT, Characteristic.MICROBIT_EVENT))
+
+    async def write_client_requirements(self, *events: Event):
+        """
+        See `EventService.write_client_requirements`
+        """
+        writes = [await self._device.write_nowait(Service.EVENT, Characteristic.CLIENT_REQUIREMENTS, event.to_bytes())
+                  for event in events]
+        await asyncio.gather(*writes)
+
+    async def write_client_event(self, *events: Event):
+        """
+        See `EventService.write_client_event`
+        """
+        writes = [await self._device.write_nowait(Service.EVENT, Characteristic.CLIENT_EVENT, event.to_bytes())
+                  for event in events]
+        await asyncio.gather(*writes)
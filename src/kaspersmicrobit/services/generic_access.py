@@ -2,7 +2,7 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from ..bluetoothdevice import BluetoothDevice
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
 
@@ -38,3 +38,27 @@ class GenericAccessService:
                 to read the device name (normally not present)
         """
         return str(self._device.read(Service.GENERIC_ACCESS, Characteristic.DEVICE_NAME), "utf-8")
+
+
+class AsyncGenericAccessService:
+    """
+    The asyncio variant of `GenericAccessService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the generic access Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the generic access service was found, false if not.
+        """
+        return self._device.is_service_available(Service.GENERIC_ACCESS)
+
+    async def read_device_name(self) -> str:
+        """
+        See `GenericAccessService.read_device_name`
+        """
+        return str(await self._device.read(Service.GENERIC_ACCESS, Characteristic.DEVICE_NAME), "utf-8")
@@ -1,14 +1,31 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import concurrent.futures
+import logging
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
 from enum import Enum, IntEnum
-from typing import Callable, TypeVar, Union, Generic, Type, List
+from typing import Callable, TypeVar, Union, Generic, Type, List, Iterable, Iterator, Dict, Optional, Sequence, \
+    Tuple
 
-from ..bluetoothdevice import BluetoothDevice, ByteData
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
 
+logger = logging.getLogger(__name__)
+
+_PIN_VALUE = struct.Struct('<BB')
+
+PIN_DATA_BYTE_LIMIT = 20
+"""The maximum number of bytes the micro:bit accepts in one PIN_DATA write: 10 pins and their values"""
+
 
 class Pin(IntEnum):
     """
@@ -59,60 +76,136 @@ T = TypeVar('T', bound=PinConfigurationValue)
 
 
 class PinConfiguration(Generic[T]):
+    """
+    The configuration of all pins, stored as a number in which bit n is the configuration of pin n, exactly as it is
+    sent to the micro:bit. A pin can be read and changed by index (`config[Pin.P5] = PinIO.INPUT`), `config[:]`
+    returns the configuration of all pins as a list.
+    """
     NUMBER_OF_PINS = len(Pin)
+    _ALL_PINS = (1 << NUMBER_OF_PINS) - 1
+
+    def __init__(self, configuration_value_type: Type[T], configuration: List[T] = None, bits: int = 0):
+        """
+        Args:
+            configuration_value_type: PinIO or PinAD
+            configuration (List[T]): the configuration of each pin (optional)
+            bits (int): the configuration as a number, bit n is the configuration of pin n (optional)
+        """
+        self._values = (configuration_value_type(0), configuration_value_type(1))
+        self._bits = bits & PinConfiguration._ALL_PINS
+        if configuration:
+            self[:] = configuration
 
-    def __init__(self, configuration_value_type: Type[T], configuration: List[T] = None):
-        self._configuration = configuration if configuration \
-            else [configuration_value_type(0)] * PinConfiguration.NUMBER_OF_PINS
+    @property
+    def bits(self) -> int:
+        """The configuration as a number, bit n is the configuration of pin n"""
+        return self._bits
 
     def __getitem__(self, item) -> T:
-        return self._configuration.__getitem__(item)
+        if isinstance(item, slice):
+            bits = self._bits
+            return [self._values[(bits >> pin) & 1] for pin in range(PinConfiguration.NUMBER_OF_PINS)][item]
+        return self._values[(self._bits >> _pin_index(item)) & 1]
 
     def __setitem__(self, key, value: T):
-        self._configuration.__setitem__(key, value)
+        if isinstance(key, slice):
+            for pin, pin_value in zip(range(PinConfiguration.NUMBER_OF_PINS)[key], value):
+                self._set_bit(pin, pin_value)
+        else:
+            self._set_bit(_pin_index(key), value)
+
+    def __len__(self) -> int:
+        return PinConfiguration.NUMBER_OF_PINS
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self[:])
 
     def __str__(self):
-        return self._configuration.__str__()
+        return self[:].__str__()
+
+    def set(self, pins: Iterable[Pin], value: T) -> 'PinConfiguration[T]':
+        """
+        Configures several pins at once
+
+        Example:
+        ```python
+        config = PinIOConfiguration().set([Pin.P0, Pin.P1, Pin.P2], PinIO.INPUT)
+        ```
+
+        Args:
+            pins: the pins to configure
+            value: the configuration of these pins
+
+        Returns:
+            this configuration
+        """
+        mask = 0
+        for pin in pins:
+            mask |= 1 << _pin_index(pin)
+        self._bits = self._bits | mask if self._values.index(value) else self._bits & ~mask
+        return self
+
+    def pins(self, value: T) -> List[Pin]:
+        """
+        Args:
+            value: a configuration value, for instance PinIO.INPUT
+
+        Returns:
+            the pins with the given configuration
+        """
+        bits = self._bits if self._values.index(value) else ~self._bits
+        return [pin for pin in Pin if (bits >> pin) & 1]
 
     def to_bytes(self) -> bytes:
-        bits = 0
-        for pin in range(PinConfiguration.NUMBER_OF_PINS):
-            bits |= self._configuration[pin].value << pin
+        return self._bits.to_bytes(4, "little")
 
-        return bits.to_bytes(4, "little")
+    def _set_bit(self, pin: int, value: T):
+        if self._values.index(value):
+            self._bits |= 1 << pin
+        else:
+            self._bits &= ~(1 << pin)
+
+    @staticmethod
+    def bits_from_bytes(value: ByteData) -> int:
+        return int.from_bytes(value[0:4], "little") & PinConfiguration._ALL_PINS
 
     @staticmethod
     def list_from_bytes(configuration_value_type: Type[T], value: ByteData) -> List[T]:
-        bits = int.from_bytes(value[0:4], "little")
-        configuration = []
-        for pin in range(PinConfiguration.NUMBER_OF_PINS):
-            configuration.append(configuration_value_type((bits >> pin) & 1))
+        return PinConfiguration(configuration_value_type, bits=PinConfiguration.bits_from_bytes(value))[:]
 
-        return configuration
+
+def _pin_index(pin: int) -> int:
+    return range(PinConfiguration.NUMBER_OF_PINS)[pin]
 
 
 class PinIOConfiguration(PinConfiguration[PinIO]):
     """
     The IO pin configuration. Contains for each pin whether it is used for INPUT or OUTPUT
     """
-    def __init__(self, configuration: List[T] = None):
-        super(PinIOConfiguration, self).__init__(PinIO, configuration=configuration)
+    def __init__(self, configuration: List[T] = None, bits: int = 0):
+        super(PinIOConfiguration, self).__init__(PinIO, configuration=configuration, bits=bits)
+
+    def copy(self) -> 'PinIOConfiguration':
+        return PinIOConfiguration(bits=self._bits)
 
     @staticmethod
     def from_bytes(value: ByteData) -> 'PinIOConfiguration':
-        return PinIOConfiguration(PinConfiguration.list_from_bytes(PinIO, value))
+        return PinIOConfiguration(bits=PinConfiguration.bits_from_bytes(value))
 
 
 class PinADConfiguration(PinConfiguration[PinAD]):
     """
     The AD pin configuration. Contains for each pin whether it is for ANALOG or DIGITAL use
     """
-    def __init__(self, configuration: List[T] = None):
-        super(PinADConfiguration, self).__init__(PinAD, configuration=configuration)
+    def __init__(self, configuration: List[T] = None, bits: int = 0):
+        super(PinADConfiguration, self).__init__(PinAD, configuration=configuration, bits=bits)
+
+    def copy(self) -> 'PinADConfiguration':
+        return PinADConfiguration(bits=self._bits)
 
     @staticmethod
     def from_bytes(value: ByteData) -> 'PinADConfiguration':
-        return PinADConfiguration(PinADConfiguration.list_from_bytes(PinAD, value))
+        return PinADConfiguration(bits=PinConfiguration.bits_from_bytes(value))
 
 
 @dataclass
@@ -133,28 +226,43 @@ class PinValue:
     def from_bytes(ad_config: PinADConfiguration, values: ByteData) -> 'PinValue':
         pin = Pin(int.from_bytes(values[0:1], "little"))
         compressed_value = int.from_bytes(values[1:2], "little")
-        decompressed_value = compressed_value if ad_config[pin] == PinAD.DIGITAL else compressed_value << 2
+        decompressed_value = compressed_value << 2 if (ad_config.bits >> pin) & 1 else compressed_value
         return PinValue(pin, decompressed_value)
 
     def to_bytes(self, ad_config: PinADConfiguration) -> bytes:
-        compressed_value = self.value if ad_config[self.pin] == PinAD.DIGITAL else (self.value >> 2)
+        compressed_value = (self.value >> 2) if (ad_config.bits >> self.pin) & 1 else self.value
         return self.pin.value.to_bytes(1, "little") + compressed_value.to_bytes(1, "little")
 
     @staticmethod
     def list_from_bytes(ad_config: PinADConfiguration, values: ByteData) -> List['PinValue']:
-        result = []
-        for i in range(0, len(values), 2):
-            result.append(PinValue.from_bytes(ad_config, values[i:i+2]))
-
-        return result
+        """
+        Decodes the pin values in one go, without slicing the data per pin. A trailing byte without a value is
+        ignored.
+        """
+        analog = ad_config.bits
+        complete = len(values) - len(values) % _PIN_VALUE.size
+        return [PinValue(Pin(pin), value << 2 if (analog >> pin) & 1 else value)
+                for pin, value in _PIN_VALUE.iter_unpack(memoryview(values)[:complete])]
 
     @staticmethod
     def list_to_bytes(ad_config: PinADConfiguration, values: List['PinValue']) -> bytes:
-        result = bytes()
-        for pin_value in values:
-            result += pin_value.to_bytes(ad_config)
+        """
+        Encodes the pin values into one preallocated buffer
 
-        return result
+        Raises:
+            OverflowError: when a value does not fit in one byte: above 255 for a digital pin, above 1023 for an
+                analog pin
+        """
+        analog = ad_config.bits
+        result = bytearray(len(values) * _PIN_VALUE.size)
+        for offset, pin_value in zip(range(0, len(result), _PIN_VALUE.size), values):
+            pin = pin_value.pin
+            try:
+                _PIN_VALUE.pack_into(result, offset, pin,
+                                     pin_value.value >> 2 if (analog >> pin) & 1 else pin_value.value)
+            except struct.error as e:
+                raise OverflowError(f'The value of {pin_value} does not fit in one byte') from e
+        return bytes(result)
 
 
 @dataclass
@@ -185,6 +293,511 @@ class PwmControlData:
                + self.period.to_bytes(4, "little")
 
 
+class _PinWatch:
+    """
+    A callback of PinChangeDetector, with its own threshold and the value last reported to it
+    """
+    __slots__ = ('callback', 'threshold', 'last')
+
+    def __init__(self, callback: Callable[[PinValue], None], threshold: int):
+        self.callback = callback
+        self.threshold = threshold
+        self.last = -1
+
+
+class PinChangeDetector:
+    """
+    Decodes PIN_DATA notifications and calls a callback per pin, only when the value of that pin changed. The pin
+    values in a notification are compared against the last reported values without decoding the notification to a
+    list of PinValue objects first.
+
+    The first value received for a pin is always reported. After that a value is reported to a callback when it
+    differs more than the threshold of that callback from the last value reported to it, so that a noisy analog pin
+    does not report every notification. Every callback has its own threshold: a coarse callback does not make a
+    fine callback on the same pin coarse.
+
+    The notifications should be handled one at a time and in order, see `IOPinService.on_pin_change`.
+    """
+
+    def __init__(self, ad_configuration: Callable[[], PinADConfiguration]):
+        """
+        Args:
+            ad_configuration: returns the analog-digital configuration the values are decoded with
+        """
+        self._ad_configuration = ad_configuration
+        self._watches: Dict[int, List[_PinWatch]] = {}
+
+    def add(self, pin: Pin, callback: Callable[[PinValue], None], threshold: int = 0) -> None:
+        """
+        Calls callback when the value of pin changes more than threshold
+        """
+        self._watches.setdefault(pin, []).append(_PinWatch(callback, threshold))
+
+    def on_data(self, sender, data: ByteData) -> None:
+        """
+        Handles a PIN_DATA notification: pairs of a pin number and a (compressed) value
+        """
+        analog = self._ad_configuration().bits
+        watches = self._watches
+        for i in range(0, len(data) - 1, 2):
+            pin = data[i]
+            pin_watches = watches.get(pin)
+            if not pin_watches:
+                continue
+            value = data[i + 1] << 2 if (analog >> pin) & 1 else data[i + 1]
+            pin_value = None
+            for watch in pin_watches:
+                if watch.last >= 0 and abs(value - watch.last) <= watch.threshold:
+                    continue
+                watch.last = value
+                if pin_value is None:
+                    pin_value = PinValue(Pin(pin), value)
+                watch.callback(pin_value)
+
+
+class _PinOutputs:
+    """
+    The state shared by PinOutputBuffer and AsyncPinOutputBuffer: the desired value of every pin, the value that
+    was last sent, and a bit mask of the pins that changed since the last flush
+    """
+
+    def __init__(self, ad_configuration: Callable[[], PinADConfiguration]):
+        self._ad_configuration = ad_configuration
+        self._lock = threading.Lock()
+        self._values = array('H', [0] * PinConfiguration.NUMBER_OF_PINS)
+        self._sent = array('h', [-1] * PinConfiguration.NUMBER_OF_PINS)
+        self._dirty = 0
+        self._encoded = bytearray(2 * PinConfiguration.NUMBER_OF_PINS)
+
+    def __getitem__(self, pin: Pin) -> int:
+        return self._values[pin]
+
+    def __setitem__(self, pin: Pin, value: int):
+        self.set(pin, value)
+
+    def set(self, pin: Pin, value: int) -> None:
+        """
+        Sets the value of an output pin, it is sent with the next flush
+
+        Args:
+            pin (Pin): the pin
+            value (int): the value of the pin, 0 or 1 for a digital pin, 0 to 1023 for an analog pin
+
+        Raises:
+            ValueError: when the value is out of range: above 255 for a digital pin, above 1023 for an analog pin
+        """
+        maximum = 1023 if (self._ad_configuration().bits >> pin) & 1 else 255
+        if not 0 <= value <= maximum:
+            raise ValueError(f'The value of {pin!r} should be between 0 and {maximum}, not {value}')
+        with self._lock:
+            if self._values[pin] != value or self._sent[pin] < 0:
+                self._values[pin] = value
+                self._dirty |= 1 << pin
+
+    def update(self, values: Iterable[PinValue]) -> None:
+        """
+        Sets the values of several output pins, see `set`
+        """
+        for pin_value in values:
+            self.set(pin_value.pin, pin_value.value)
+
+    def dirty(self) -> List[Pin]:
+        """
+        Returns:
+            the pins whose value changed since the last flush
+        """
+        dirty = self._dirty
+        return [pin for pin in Pin if (dirty >> pin) & 1]
+
+    def _take_dirty(self) -> bytes:
+        """
+        Encodes the changed pins in the preallocated buffer and marks them as sent. A pin that changed, but encodes
+        to the value that was sent last (an analog value only differing in the 2 bits that are not sent), is left
+        out. The encoded pins are copied while the lock is held, so that a concurrent flush cannot overwrite them.
+
+        Raises:
+            ValueError: when a digital pin has a value above 255, because it was made digital after it was set
+        """
+        with self._lock:
+            analog = self._ad_configuration().bits
+            values = self._values
+            dirty = self._dirty
+            pin = 0
+            while dirty:
+                if dirty & 1 and not (analog >> pin) & 1 and values[pin] > 255:
+                    raise ValueError(f'The value of {Pin(pin)!r} should be between 0 and 255, not {values[pin]}')
+                dirty >>= 1
+                pin += 1
+
+            dirty, self._dirty = self._dirty, 0
+            encoded = self._encoded
+            size = 0
+            pin = 0
+            while dirty:
+                if dirty & 1:
+                    value = values[pin] >> 2 if (analog >> pin) & 1 else values[pin]
+                    if value != self._sent[pin]:
+                        encoded[size] = pin
+                        encoded[size + 1] = value
+                        self._sent[pin] = value
+                        size += 2
+                dirty >>= 1
+                pin += 1
+            return bytes(encoded[:size])
+
+
+class PinOutputBuffer(_PinOutputs):
+    """
+    Keeps the desired value of the output pins, and only sends the pins that changed. Use it for a control loop
+    that computes the values of all pins every tick: set the values, and flush once per tick, or let the buffer
+    flush at a fixed rate. A flush encodes the changed pins in a preallocated buffer and writes them in as few
+    PIN_DATA writes as possible, a flush without changes writes nothing.
+
+    The pins must be configured as PinIO.OUTPUT pins via `IOPinService.write_io_configuration`.
+
+    Example:
+    ```python
+    outputs = microbit.io_pin.output_buffer()
+    while True:
+        outputs[Pin.P0] = 1 if too_cold() else 0
+        outputs[Pin.P1] = fan_speed()
+        outputs.flush()
+        time.sleep(0.1)
+    ```
+    """
+
+    def __init__(self, device: BluetoothDevice, ad_configuration: Callable[[], PinADConfiguration]):
+        """
+        Args:
+            device (BluetoothDevice): the device of the micro:bit
+            ad_configuration: returns the analog-digital configuration the values are encoded with
+        """
+        super().__init__(ad_configuration)
+        self._device = device
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'PinOutputBuffer':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def flush(self) -> int:
+        """
+        Writes the pins that changed since the last flush
+
+        Returns:
+            the number of pins that were written
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the I/O pin service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the I/O pin service is active but there was no way
+                to write the pin data (normally does not occur)
+        """
+        encoded = self._take_dirty()
+        for start in range(0, len(encoded), PIN_DATA_BYTE_LIMIT):
+            self._device.write(Service.IO_PIN, Characteristic.PIN_DATA, encoded[start:start + PIN_DATA_BYTE_LIMIT])
+        return len(encoded) // 2
+
+    def start(self, rate: float) -> 'PinOutputBuffer':
+        """
+        Flushes the buffer rate times per second on a thread of its own, until stop is called
+
+        Args:
+            rate (float): the number of flushes per second
+        """
+        if self._thread is None:
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(1 / rate, self._stop),
+                                            name='kaspersmicrobit-pin-output', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops flushing at a fixed rate, and flushes the pins that changed since the last flush
+        """
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not write the output pins")
+
+
+class AsyncPinOutputBuffer(_PinOutputs):
+    """
+    The asyncio counterpart of `PinOutputBuffer`, flushing at a fixed rate is done by a task on the event loop
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice, ad_configuration: Callable[[], PinADConfiguration]):
+        super().__init__(ad_configuration)
+        self._device = device
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'AsyncPinOutputBuffer':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def flush(self) -> int:
+        """
+        See `PinOutputBuffer.flush`
+        """
+        encoded = self._take_dirty()
+        for start in range(0, len(encoded), PIN_DATA_BYTE_LIMIT):
+            await self._device.write(Service.IO_PIN, Characteristic.PIN_DATA, encoded[start:start + PIN_DATA_BYTE_LIMIT])
+        return len(encoded) // 2
+
+    def start(self, rate: float) -> 'AsyncPinOutputBuffer':
+        """
+        See `PinOutputBuffer.start`
+        """
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run(1 / rate))
+        return self
+
+    async def stop(self) -> None:
+        """
+        See `PinOutputBuffer.stop`
+        """
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Could not write the output pins")
+
+
+Keyframes = Sequence[Tuple[float, int]]
+"""The keyframes of a trajectory: (time in seconds since the start of the trajectory, PWM value 0-1024) tuples"""
+
+
+class _Trajectory:
+    def __init__(self, keyframes: Keyframes, period: int, repeat: bool):
+        if not keyframes:
+            raise ValueError('A trajectory needs at least 1 keyframe')
+        keyframes = sorted(keyframes)
+        self.times = [keyframe_time for keyframe_time, _ in keyframes]
+        self.values = [value for _, value in keyframes]
+        if any(not 0 <= value <= 1024 for value in self.values):
+            raise ValueError('PWM values should be between 0 and 1024')
+        self.period = period
+        self.repeat = repeat
+        self.started: Optional[float] = None
+
+    def value_at(self, elapsed: float) -> Tuple[int, bool]:
+        """
+        Returns:
+            the interpolated value at elapsed seconds since the start, and whether the trajectory is finished
+        """
+        times = self.times
+        duration = times[-1]
+        if self.repeat and duration > 0:
+            elapsed %= duration
+        if elapsed >= duration:
+            return self.values[-1], not self.repeat
+
+        index = bisect_right(times, elapsed)
+        if index == 0:
+            return self.values[0], False
+        start_time, end_time = times[index - 1], times[index]
+        start_value, end_value = self.values[index - 1], self.values[index]
+        return round(start_value + (end_value - start_value) * (elapsed - start_time) / (end_time - start_time)), False
+
+
+class AsyncPwmSequencer:
+    """
+    The asyncio counterpart of `PwmSequencer`
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice, rate: float = 50):
+        """
+        Args:
+            device (AsyncBluetoothDevice): the device of the micro:bit
+            rate (float): the maximum number of times per second the PWM values are updated
+        """
+        self._device = device
+        self._interval = 1 / rate
+        self._trajectories: Dict[Pin, _Trajectory] = {}
+        self._sent: Dict[Pin, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.writes = 0
+        """The number of PWM_CONTROL writes sent to the micro:bit"""
+
+    async def __aenter__(self) -> 'AsyncPwmSequencer':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    def add_trajectory(self, pin: Pin, keyframes: Keyframes, period: int = 20000, repeat: bool = False) -> None:
+        """
+        See `PwmSequencer.add_trajectory`
+        """
+        self._trajectories[pin] = _Trajectory(keyframes, period, repeat)
+
+    def remove_trajectory(self, pin: Pin) -> None:
+        """
+        See `PwmSequencer.remove_trajectory`
+        """
+        self._trajectories.pop(pin, None)
+
+    async def start(self) -> asyncio.Task:
+        """
+        Starts playing the trajectories
+
+        Returns:
+            a task that completes when all trajectories that do not repeat are finished
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """
+        See `PwmSequencer.stop`
+        """
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        next_tick = time.monotonic()
+        while self._trajectories:
+            now = time.monotonic()
+            commands = []
+            for pin, trajectory in list(self._trajectories.items()):
+                if trajectory.started is None:
+                    trajectory.started = now
+                value, finished = trajectory.value_at(now - trajectory.started)
+                if self._sent.get(pin) != (value, trajectory.period):
+                    self._sent[pin] = (value, trajectory.period)
+                    commands.append(PwmControlData(pin, value, trajectory.period))
+                if finished and self._trajectories.get(pin) is trajectory:
+                    del self._trajectories[pin]
+
+            # the characteristic accepts 2 commands per write
+            for i in range(0, len(commands), 2):
+                await self._device.write(Service.IO_PIN, Characteristic.PWM_CONTROL,
+                                         _pwm_control_to_bytes(*commands[i:i + 2]))
+                self.writes += 1
+
+            # when the writes took longer than a tick, the next tick starts right away and skips ahead
+            next_tick = max(next_tick + self._interval, time.monotonic())
+            await asyncio.sleep(next_tick - time.monotonic())
+
+
+class PwmSequencer:
+    """
+    Moves PWM outputs, for instance servos, along trajectories. A trajectory is a list of keyframes: the PWM value a
+    pin should have at a point in time. In between keyframes the value is interpolated linearly.
+
+    The sequencer runs on the Bluetooth event loop, and updates the pins at most rate times per second. Only pins
+    whose value changed are sent, 2 pins per PWM_CONTROL write. When the link can not keep up, intermediate
+    positions are skipped, instead of the motion lagging further and further behind.
+
+    Example:
+    ```python
+    sequencer = microbit.io_pin.pwm_sequencer(rate=50)
+    # a servo on pin 0: 1 ms pulse (51/1024 of 20 ms) to 2 ms pulse (102/1024 of 20 ms) and back in 2 seconds
+    sequencer.add_trajectory(Pin.P0, [(0, 51), (1, 102), (2, 51)], period=20000)
+    sequencer.start().result()
+    ```
+    """
+
+    def __init__(self, device: BluetoothDevice, rate: float = 50):
+        """
+        Args:
+            device (BluetoothDevice): the device of the micro:bit
+            rate (float): the maximum number of times per second the PWM values are updated
+        """
+        async def create(async_device: AsyncBluetoothDevice) -> AsyncPwmSequencer:
+            return AsyncPwmSequencer(async_device, rate)
+
+        self._device = device
+        self._sequencer: AsyncPwmSequencer = device.run_async(create).result()
+
+    def __enter__(self) -> 'PwmSequencer':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def writes(self) -> int:
+        """The number of PWM_CONTROL writes sent to the micro:bit"""
+        return self._sequencer.writes
+
+    def add_trajectory(self, pin: Pin, keyframes: Keyframes, period: int = 20000, repeat: bool = False) -> None:
+        """
+        Sets the trajectory of a pin, replacing its previous trajectory. The trajectory starts when the sequencer is
+        started, or right away when the sequencer is running. Before the first keyframe the pin keeps the value of
+        the first keyframe, after the last keyframe it keeps the value of the last keyframe.
+
+        Args:
+            pin (Pin): the pin
+            keyframes (Keyframes): (time in seconds, PWM value 0-1024) tuples
+            period (int): the PWM period in microseconds (20000, 20 ms, for a servo)
+            repeat (bool): start over after the last keyframe, until the trajectory is removed
+
+        Raises:
+            ValueError: when there are no keyframes or a value is out of range
+        """
+        # the trajectories are played on the Bluetooth event loop, they are only changed on that loop
+        async def add(_):
+            self._sequencer.add_trajectory(pin, keyframes, period, repeat)
+
+        self._device.run_async(add).result()
+
+    def remove_trajectory(self, pin: Pin) -> None:
+        """
+        Stops moving a pin, it keeps the last value that was sent
+        """
+        async def remove(_):
+            self._sequencer.remove_trajectory(pin)
+
+        self._device.run_async(remove).result()
+
+    def start(self) -> concurrent.futures.Future:
+        """
+        Starts playing the trajectories
+
+        Returns:
+            a future that completes when all trajectories that do not repeat are finished
+        """
+        async def play(_):
+            await (await self._sequencer.start())
+
+        return self._device.run_async(play)
+
+    def stop(self) -> None:
+        """
+        Stops playing the trajectories, the pins keep the last values that were sent
+        """
+        self._device.run_async(lambda _: self._sequencer.stop()).result()
+
+
+def _pwm_control_to_bytes(pwm_control1: PwmControlData, pwm_control2: PwmControlData = None) -> bytes:
+    return pwm_control1.to_bytes() + pwm_control2.to_bytes() if pwm_control2 else pwm_control1.to_bytes()
+
+
 class IOPinService:
     """
     This class contains the functions that you can access in connection with the io pins on the edge of the micro:bit
@@ -201,6 +814,10 @@ class IOPinService:
     def __init__(self, device: BluetoothDevice):
         self._pin_ad_config = PinADConfiguration()
         self._device = device
+        self._pin_changes = PinChangeDetector(lambda: self._pin_ad_config)
+        self._pin_changes_subscription: Optional[Subscription] = None
+        self._pin_changes_dispatch: Optional[Dispatch] = None
+        self._notify_data_subscribed = False
 
     def is_available(self) -> bool:
         """
@@ -211,22 +828,88 @@ class IOPinService:
         """
         return self._device.is_service_available(Service.IO_PIN)
 
-    def notify_data(self, callback: Callable[[List[PinValue]], None]):
+    def notify_data(self, callback: Callable[[List[PinValue]], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method when you want to be notified of the value of pins. You need these pins
         previously configured as PinIO.INPUT pins via write_io_configuration. You will be notified when
-        the value changes.
+        the value changes. notify_data can not be combined with `on_pin_change`.
 
         Args:
             callback: a function called with a list of PinValue objects
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
+
+        Raises:
+            ValueError: When pin change callbacks were registered with on_pin_change
+            errors.BluetoothServiceNotFound: When the I/O pin service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the I/O pin service is active but there was no way
+                to activate the notifications for the PIN data (normally does not occur)
+        """
+        if self._pin_changes_subscription is not None:
+            raise ValueError('The pin data is already used by on_pin_change')
+        subscription = self._device.notify(
+            Service.IO_PIN, Characteristic.PIN_DATA,
+            lambda sender, data: callback(PinValue.list_from_bytes(self._pin_ad_config, data)), dispatch=dispatch)
+        self._notify_data_subscribed = True
+        return subscription
+
+    def on_pin_change(self, pin: Pin, callback: Callable[[PinValue], None], threshold: int = 0,
+                      dispatch: Dispatch = None) -> Subscription:
+        """
+        Calls the callback when the value of one pin changes. The pin must be configured as a PinIO.INPUT pin via
+        write_io_configuration. Unlike notify_data, the callback is only called for this pin, and only when its value
+        changed more than the threshold since the last time the callback was called. The first value received is
+        always passed to the callback.
+
+        All pin change callbacks share one subscription to the pin data, with one dispatch. The notifications must
+        be handled one at a time and in order, or a callback could be left with a stale value or miss a change: by
+        default they are handled in order on a thread of their own, and none are dropped. An unordered dispatch
+        (`Dispatch.executor()` without a queue_size) is not allowed. on_pin_change can not be combined with
+        `notify_data`.
+
+        Example:
+        ```python
+        microbit.io_pin.on_pin_change(Pin.P0, lambda pin_value: print(pin_value.value), threshold=8)
+        ```
+
+        Args:
+            pin (Pin): the pin to watch
+            callback: a function called with the PinValue of the pin when it changed
+            threshold (int): the smallest change that is not reported, for instance to ignore noise on an analog
+                pin (0 reports every change)
+            dispatch (Dispatch): how the callbacks are invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callbacks run in order on a thread of their own, fed by a queue without
+                a limit). Only the first call of on_pin_change subscribes, later calls can leave it out or must pass
+                the same dispatch.
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the pin change callbacks
 
         Raises:
+            ValueError: When the dispatch is unordered, or differs from the dispatch of an earlier call, or when
+                notify_data was called
             errors.BluetoothServiceNotFound: When the I/O pin service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the I/O pin service is active but there was no way
                 to activate the notifications for the PIN data (normally does not occur)
         """
-        self._device.notify(Service.IO_PIN, Characteristic.PIN_DATA,
-                            lambda sender, data: callback(PinValue.list_from_bytes(self._pin_ad_config, data)))
+        if self._notify_data_subscribed:
+            raise ValueError('The pin data is already used by notify_data')
+        if self._pin_changes_subscription is None:
+            dispatch = dispatch if dispatch else Dispatch.worker(queue_size=None)
+            if not dispatch.is_ordered():
+                raise ValueError('The pin change callbacks need a dispatch that handles notifications in order')
+        elif dispatch is not None and dispatch != self._pin_changes_dispatch:
+            raise ValueError(f'The pin change callbacks are already dispatched with {self._pin_changes_dispatch}')
+
+        self._pin_changes.add(pin, callback, threshold)
+        if self._pin_changes_subscription is None:
+            self._pin_changes_subscription = self._device.notify(
+                Service.IO_PIN, Characteristic.PIN_DATA, self._pin_changes.on_data, dispatch=dispatch)
+            self._pin_changes_dispatch = dispatch
+        return self._pin_changes_subscription
 
     def read_data(self) -> List[PinValue]:
         """
@@ -259,6 +942,29 @@ class IOPinService:
             self._device.write(Service.IO_PIN, Characteristic.PIN_DATA,
                                PinValue.list_to_bytes(self._pin_ad_config, values))
 
+    def output_buffer(self) -> PinOutputBuffer:
+        """
+        Creates a buffer for the values of the output pins, that only writes the pins that changed, see
+        `PinOutputBuffer`. The values are encoded with the analog-digital configuration that was written last with
+        write_ad_configuration.
+
+        Returns:
+            PinOutputBuffer: an empty buffer
+        """
+        return PinOutputBuffer(self._device, lambda: self._pin_ad_config)
+
+    def pwm_sequencer(self, rate: float = 50) -> PwmSequencer:
+        """
+        Creates a sequencer that moves PWM outputs, for instance servos, along trajectories, see `PwmSequencer`
+
+        Args:
+            rate (float): the maximum number of times per second the PWM values are updated
+
+        Returns:
+            PwmSequencer: a sequencer without trajectories
+        """
+        return PwmSequencer(self._device, rate)
+
     def read_ad_configuration(self) -> PinADConfiguration:
         """
         Returns for each pin whether it is configured as a PinAD.DIGITAL or PinAD.ANALOG pin.
@@ -286,7 +992,7 @@ class IOPinService:
                 to write the analog-digital configuration (normally not present)
         """
         self._device.write(Service.IO_PIN, Characteristic.PIN_AD_CONFIGURATION, config.to_bytes())
-        self._pin_ad_config = PinADConfiguration(config[:])
+        self._pin_ad_config = config.copy()
 
     def read_io_configuration(self) -> PinIOConfiguration:
         """
@@ -336,5 +1042,109 @@ class IOPinService:
             errors.BluetoothCharacteristicNotFound: When the I/O pin service is active but there was no way
                 to write the pwm control data (normally does not occur)
         """
-        data = pwm_control1.to_bytes() + pwm_control2.to_bytes() if pwm_control2 else pwm_control1.to_bytes()
-        self._device.write(Service.IO_PIN, Characteristic.PWM_CONTROL, data)
+        self._device.write(Service.IO_PIN, Characteristic.PWM_CONTROL, _pwm_control_to_bytes(pwm_control1, pwm_control2))
+
+
+class AsyncIOPinService:
+    """
+    The asyncio variant of `IOPinService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Notification callbacks are called on the event loop and should not block.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._pin_ad_config = PinADConfiguration()
+        self._device = device
+        self._pin_changes = PinChangeDetector(lambda: self._pin_ad_config)
+        self._pin_changes_subscribed = False
+        self._notify_data_subscribed = False
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the I/O pin Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the I/O pin service was found, false if not.
+        """
+        return self._device.is_service_available(Service.IO_PIN)
+
+    async def notify_data(self, callback: Callable[[List[PinValue]], None]):
+        """
+        See `IOPinService.notify_data`
+        """
+        if self._pin_changes_subscribed:
+            raise ValueError('The pin data is already used by on_pin_change')
+        await self._device.notify(Service.IO_PIN, Characteristic.PIN_DATA,
+                                  lambda sender, data: callback(PinValue.list_from_bytes(self._pin_ad_config, data)))
+        self._notify_data_subscribed = True
+
+    async def on_pin_change(self, pin: Pin, callback: Callable[[PinValue], None], threshold: int = 0):
+        """
+        See `IOPinService.on_pin_change`
+        """
+        if self._notify_data_subscribed:
+            raise ValueError('The pin data is already used by notify_data')
+        self._pin_changes.add(pin, callback, threshold)
+        if not self._pin_changes_subscribed:
+            await self._device.notify(Service.IO_PIN, Characteristic.PIN_DATA, self._pin_changes.on_data)
+            self._pin_changes_subscribed = True
+
+    async def read_data(self) -> List[PinValue]:
+        """
+        See `IOPinService.read_data`
+        """
+        return PinValue.list_from_bytes(
+            self._pin_ad_config, await self._device.read(Service.IO_PIN, Characteristic.PIN_DATA))
+
+    async def write_data(self, values: List[PinValue]):
+        """
+        See `IOPinService.write_data`
+        """
+        if values:
+            await self._device.write(Service.IO_PIN, Characteristic.PIN_DATA,
+                                     PinValue.list_to_bytes(self._pin_ad_config, values))
+
+    def output_buffer(self) -> AsyncPinOutputBuffer:
+        """
+        See `IOPinService.output_buffer`
+        """
+        return AsyncPinOutputBuffer(self._device, lambda: self._pin_ad_config)
+
+    def pwm_sequencer(self, rate: float = 50) -> AsyncPwmSequencer:
+        """
+        See `IOPinService.pwm_sequencer`
+        """
+        return AsyncPwmSequencer(self._device, rate)
+
+    async def read_ad_configuration(self) -> PinADConfiguration:
+        """
+        See `IOPinService.read_ad_configuration`
+        """
+        return PinADConfiguration.from_bytes(
+            await self._device.read(Service.IO_PIN, Characteristic.PIN_AD_CONFIGURATION))
+
+    async def write_ad_configuration(self, config: PinADConfiguration):
+        """
+        See `IOPinService.write_ad_configuration`
+        """
+        await self._device.write(Service.IO_PIN, Characteristic.PIN_AD_CONFIGURATION, config.to_bytes())
+        self._pin_ad_config = config.copy()
+
+    async def read_io_configuration(self) -> PinIOConfiguration:
+        """
+        See `IOPinService.read_io_configuration`
+        """
+        return PinIOConfiguration.from_bytes(
+            await self._device.read(Service.IO_PIN, Characteristic.PIN_IO_CONFIGURATION))
+
+    async def write_io_configuration(self, config: PinIOConfiguration):
+        """
+        See `IOPinService.write_io_configuration`
+        """
+        await self._device.write(Service.IO_PIN, Characteristic.PIN_IO_CONFIGURATION, config.to_bytes())
+
+    async def write_pwm_control_data(self, pwm_control1: PwmControlData, pwm_control2: PwmControlData = None):
+        """
+        See `IOPinService.write_pwm_control_data`
+        """
+        await self._device.write(Service.IO_PIN, Characteristic.PWM_CONTROL,
+                                 _pwm_control_to_bytes(pwm_control1, pwm_control2))
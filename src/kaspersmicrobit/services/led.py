@@ -1,11 +1,29 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import time
 
 from .leddisplay import LedDisplay
+from .ledanimator import LedAnimator, AsyncLedAnimator
+from .ledtext import TextRenderer
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+
+_DEFAULT_RENDERER = TextRenderer()
+
+
+def _text_to_bytes(text: str) -> bytes:
+    octets = text.encode("utf-8")
+    if len(octets) > 20:
+        raise ValueError('Text too long, maximum 20 characters allowed')
+
+    return octets
+
+
+def _scrolling_delay_from_bytes(data: ByteData) -> int:
+    return int.from_bytes(data[0:2], 'little')
 
 
 class LedService:
@@ -38,6 +56,19 @@ class LedService:
         """
         self._device.write(Service.LED, Characteristic.LED_MATRIX_STATE, led_display.to_bytes())
 
+    def animator(self, fps: float = 30) -> LedAnimator:
+        """
+        Starts an animator, that shows frames on the LED display without waiting for the micro:bit and without
+        falling behind, see `LedAnimator`. Stop the animator when you no longer need it.
+
+        Args:
+            fps (float): the maximum number of frames written per second
+
+        Returns:
+            LedAnimator: the animator, ready to show frames
+        """
+        return LedAnimator(self, fps).start()
+
     def read(self) -> LedDisplay:
         """
         Read the on/off values from the micro:bit LED display
@@ -66,11 +97,33 @@ class LedService:
             errors.BluetoothCharacteristicNotFound: When the led service is active but there was no way
                 to write the LED text (normally does not occur)
         """
-        octets = text.encode("utf-8")
-        if len(octets) > 20:
-            raise ValueError('Text too long, maximum 20 characters allowed')
+        self._device.write(Service.LED, Characteristic.LED_TEXT, _text_to_bytes(text))
+
+    def scroll_text(self, text: str, delay_in_millis: int = 120, renderer: TextRenderer = None):
+        """
+        Let a text of any length scroll by on the LED screen. Unlike `show_text`, the text is rendered on this
+        computer (see `kaspersmicrobit.services.ledtext.TextRenderer`) and the frames are shown one after the
+        other with `show`. This function returns when the text has scrolled by.
+
+        Args:
+            text: The text to be displayed
+            delay_in_millis: the time between two frames, in which the text moves one column, in milliseconds
+            renderer (TextRenderer): renders the text, with your own characters or spacing (optional, by default
+                the built-in font is used)
 
-        self._device.write(Service.LED, Characteristic.LED_TEXT, octets)
+        Raises:
+            errors.BluetoothServiceNotFound: When the LED service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the led service is active but there was no way
+                to write the LED display (normally does not occur)
+        """
+        frames = (renderer if renderer else _DEFAULT_RENDERER).frames(text)
+        started = time.monotonic()
+        previous = None
+        for index, frame in enumerate(frames):
+            time.sleep(max(started + index * delay_in_millis / 1000 - time.monotonic(), 0))
+            if frame.to_bytes() != previous:
+                self.show(frame)
+                previous = frame.to_bytes()
 
     def set_scrolling_delay(self, delay_in_millis: int):
         """
@@ -98,4 +151,71 @@ class LedService:
             errors.BluetoothCharacteristicNotFound: When the led service is active but there was no way
                 to read the scrolling delay (normally does not occur)
         """
-        return int.from_bytes(self._device.read(Service.LED, Characteristic.SCROLLING_DELAY)[0:2], 'little')
+        return _scrolling_delay_from_bytes(self._device.read(Service.LED, Characteristic.SCROLLING_DELAY))
+
+
+class AsyncLedService:
+    """
+    The asyncio variant of `LedService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    """
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the LED Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the LED service was found, false if not.
+        """
+        return self._device.is_service_available(Service.LED)
+
+    async def show(self, led_display: LedDisplay):
+        """
+        See `LedService.show`
+        """
+        await self._device.write(Service.LED, Characteristic.LED_MATRIX_STATE, led_display.to_bytes())
+
+    async def animator(self, fps: float = 30) -> AsyncLedAnimator:
+        """
+        See `LedService.animator`
+        """
+        return await AsyncLedAnimator(self, fps).start()
+
+    async def read(self) -> LedDisplay:
+        """
+        See `LedService.read`
+        """
+        return LedDisplay.from_bytes(await self._device.read(Service.LED, Characteristic.LED_MATRIX_STATE))
+
+    async def show_text(self, text: str):
+        """
+        See `LedService.show_text`
+        """
+        await self._device.write(Service.LED, Characteristic.LED_TEXT, _text_to_bytes(text))
+
+    async def scroll_text(self, text: str, delay_in_millis: int = 120, renderer: TextRenderer = None):
+        """
+        See `LedService.scroll_text`
+        """
+        frames = (renderer if renderer else _DEFAULT_RENDERER).frames(text)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        previous = None
+        for index, frame in enumerate(frames):
+            await asyncio.sleep(max(started + index * delay_in_millis / 1000 - loop.time(), 0))
+            if frame.to_bytes() != previous:
+                await self.show(frame)
+                previous = frame.to_bytes()
+
+    async def set_scrolling_delay(self, delay_in_millis: int):
+        """
+        See `LedService.set_scrolling_delay`
+        """
+        await self._device.write(Service.LED, Characteristic.SCROLLING_DELAY, delay_in_millis.to_bytes(2, 'little'))
+
+    async def get_scrolling_delay(self) -> int:
+        """
+        See `LedService.get_scrolling_delay`
+        """
+        return _scrolling_delay_from_bytes(await self._device.read(Service.LED, Characteristic.SCROLLING_DELAY))
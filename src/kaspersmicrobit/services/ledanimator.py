@@ -0,0 +1,260 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+from .leddisplay import LedDisplay
+
+logger = logging.getLogger(__name__)
+
+
+class LedAnimator:
+    """
+    Shows a stream of frames on the LED display, at most fps frames per second. Use it instead of
+    `LedService.show` when the frames are produced faster than they can be written, for instance by an animation
+    or by a sensor:
+
+    - only the newest frame that was not written yet is kept, older ones are dropped (counted in `dropped`)
+    - a frame that is equal to the last frame that was written is not written again (counted in `skipped`)
+    - the frames are written on a thread of their own, so `show` never waits for the micro:bit
+
+    When a write is slow the animation skips frames, instead of falling further and further behind.
+
+    Example:
+    ```python
+    with KaspersMicrobit.find_one_microbit() as microbit, microbit.led.animator(fps=30) as animator:
+        for frame in frames:
+            animator.show(frame)
+            time.sleep(1 / 60)
+    ```
+    """
+
+    def __init__(self, led: 'LedService', fps: float = 30):  # noqa: F821
+        """
+        Args:
+            led (LedService): the LED service of the micro:bit
+            fps (float): the maximum number of frames written per second
+        """
+        if fps <= 0:
+            raise ValueError('fps should be greater than 0')
+        self._led = led
+        self._interval = 1 / fps
+        self._condition = threading.Condition()
+        self._pending: Optional[bytes] = None
+        self._last_sent: Optional[bytes] = None
+        self._writing = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        """The number of frames that were written to the micro:bit"""
+        self.skipped = 0
+        """The number of frames that were not written because they were equal to the last frame written"""
+        self.dropped = 0
+        """The number of frames that were replaced by a newer frame before they were written"""
+
+    def __enter__(self) -> 'LedAnimator':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def start(self) -> 'LedAnimator':
+        """
+        Starts writing the frames that are shown
+        """
+        with self._condition:
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='kaspersmicrobit-led-animator', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Writes the last frame that was shown, and stops the animator
+
+        Args:
+            timeout (float): the maximum number of seconds to wait for the last frame to be written
+        """
+        self.flush(timeout)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread:
+            thread.join(timeout)
+
+    def show(self, led_display: LedDisplay) -> None:
+        """
+        Shows a frame on the LED display, as soon as the frame rate allows. A frame that was shown before and was
+        not written yet is dropped. This function does not wait for the frame to be written.
+
+        Args:
+            led_display (LedDisplay): the on/off state of the LEDs
+        """
+        frame = bytes(led_display.to_bytes())
+        with self._condition:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = frame
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Waits until the last frame that was shown is written
+
+        Args:
+            timeout (float): the maximum number of seconds to wait
+
+        Returns:
+            True when all frames were written, False when the timeout expired
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._running or (self._pending is None and not self._writing), timeout)
+            return self._pending is None and not self._writing
+
+    def _run(self) -> None:
+        next_write = time.monotonic()
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running or self._pending is not None)
+                # wait for the next frame slot, frames shown in the meantime replace the pending frame
+                while self._running and time.monotonic() < next_write:
+                    self._condition.wait(next_write - time.monotonic())
+                if not self._running:
+                    return
+
+                frame, self._pending = self._pending, None
+                if frame == self._last_sent:
+                    self.skipped += 1
+                    self._condition.notify_all()
+                    continue
+                self._writing = True
+
+            started = time.monotonic()
+            try:
+                self._led.show(LedDisplay.from_bytes(frame))
+                self._last_sent = frame
+                self.sent += 1
+            except Exception:
+                logger.exception("Could not write a frame to the LED display")
+            finally:
+                next_write = started + self._interval
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+
+class AsyncLedAnimator:
+    """
+    The asyncio counterpart of `LedAnimator`, the frames are written by a task on the event loop
+    """
+
+    def __init__(self, led: 'AsyncLedService', fps: float = 30):  # noqa: F821
+        """
+        Args:
+            led (AsyncLedService): the LED service of the micro:bit
+            fps (float): the maximum number of frames written per second
+        """
+        if fps <= 0:
+            raise ValueError('fps should be greater than 0')
+        self._led = led
+        self._interval = 1 / fps
+        self._pending: Optional[bytes] = None
+        self._last_sent: Optional[bytes] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        """See `LedAnimator.sent`"""
+        self.skipped = 0
+        """See `LedAnimator.skipped`"""
+        self.dropped = 0
+        """See `LedAnimator.dropped`"""
+
+    async def __aenter__(self) -> 'AsyncLedAnimator':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def start(self) -> 'AsyncLedAnimator':
+        """
+        See `LedAnimator.start`
+        """
+        if self._task is None or self._task.done():
+            self._changed = asyncio.Event()
+            self._idle = asyncio.Event()
+            if self._pending is None:
+                self._idle.set()
+            else:
+                self._changed.set()
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def stop(self, timeout: float = None) -> None:
+        """
+        See `LedAnimator.stop`
+        """
+        try:
+            await self.flush(timeout)
+        finally:
+            if self._task:
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+                self._task = None
+
+    def show(self, led_display: LedDisplay) -> None:
+        """
+        See `LedAnimator.show`
+        """
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = bytes(led_display.to_bytes())
+        if self._changed:
+            self._idle.clear()
+            self._changed.set()
+
+    async def flush(self, timeout: float = None) -> bool:
+        """
+        See `LedAnimator.flush`
+        """
+        if self._task is None:
+            return self._pending is None
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_write = loop.time()
+        while True:
+            await self._changed.wait()
+            # wait for the next frame slot, frames shown in the meantime replace the pending frame
+            await asyncio.sleep(max(next_write - loop.time(), 0))
+            self._changed.clear()
+            frame, self._pending = self._pending, None
+            if frame is None:
+                continue
+
+            if frame == self._last_sent:
+                self.skipped += 1
+            else:
+                started = loop.time()
+                try:
+                    await self._led.show(LedDisplay.from_bytes(frame))
+                    self._last_sent = frame
+                    self.sent += 1
+                except Exception:
+                    logger.exception("Could not write a frame to the LED display")
+                next_write = started + self._interval
+
+            if self._pending is None:
+                self._idle.set()
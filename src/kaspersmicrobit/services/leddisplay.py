@@ -2,10 +2,36 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from typing import List
+from functools import lru_cache
+from typing import Iterable
 
 from ..bluetoothdevice import ByteData
 
+_ALL_COLUMNS = 0b11111
+
+
+@lru_cache(maxsize=1024)
+def _parse_image(string: str, on: str, off: str) -> bytes:
+    leds = [s == on for s in string if s == on or s == off]
+    if len(leds) != 25:
+        raise ValueError("Image should contain 25 LEDs")
+
+    value = 0
+    for led in leds:
+        value = value << 1 | led
+    return bytes(_int_to_rows(value))
+
+
+def _int_to_rows(value: int) -> bytearray:
+    return bytearray((value >> shift) & _ALL_COLUMNS for shift in (20, 15, 10, 5, 0))
+
+
+def _shift(row: int, columns: int) -> int:
+    """Moves the LEDs of a row to the right, or to the left when columns is negative"""
+    if columns >= 0:
+        return row >> columns
+    return row << -columns & _ALL_COLUMNS
+
 
 class LedDisplay:
     """
@@ -53,6 +79,199 @@ class LedDisplay:
     def from_bytes(value: ByteData):
         return LedDisplay(bytearray(value))
 
+    @staticmethod
+    def from_int(value: int) -> 'LedDisplay':
+        """
+        Creates an LedDisplay from a 25 bit number, with 1 bit per LED. The most significant bit is the LED in row
+        1, column 1, the least significant bit is the LED in row 5, column 5. Written in binary, the number reads
+        like the display:
+
+        ```python
+        HEART = LedDisplay.from_int(0b01010_11111_11111_01110_00100)
+        ```
+
+        Args:
+            value (int): the on/off state of the 25 LEDs
+
+        Returns:
+            An LedDisplay representing the given number
+
+        Raises:
+            ValueError: If the given number does not fit in 25 bits
+        """
+        if not 0 <= value < 1 << 25:
+            raise ValueError("Image should contain 25 LEDs")
+        return LedDisplay(_int_to_rows(value))
+
+    @staticmethod
+    def from_rows(rows: Iterable[int]) -> 'LedDisplay':
+        """
+        Creates an LedDisplay from 5 rows, each row is a number of 5 bits. The most significant bit is the LED in
+        column 1.
+
+        ```python
+        HEART = LedDisplay.from_rows([0b01010, 0b11111, 0b11111, 0b01110, 0b00100])
+        ```
+
+        Args:
+            rows: the on/off state of the LEDs of each row, from the top row to the bottom row
+
+        Returns:
+            An LedDisplay representing the given rows
+
+        Raises:
+            ValueError: If there are not exactly 5 rows, or a row does not fit in 5 bits
+        """
+        display = bytearray(rows)
+        if len(display) != 5 or any(row > _ALL_COLUMNS for row in display):
+            raise ValueError("Image should contain 5 rows of 5 LEDs")
+        return LedDisplay(display)
+
+    def to_int(self) -> int:
+        """
+        Returns:
+            the on/off state of the 25 LEDs as a number, see `LedDisplay.from_int`
+        """
+        value = 0
+        for row in self._display:
+            value = value << 5 | row
+        return value
+
+    @staticmethod
+    def from_numpy(array) -> 'LedDisplay':
+        """
+        Creates an LedDisplay from a 5x5 NumPy array, an element that is true turns the LED on. The first index
+        is the row, the second the column. This requires NumPy to be installed.
+
+        Args:
+            array: a 5x5 array, or anything NumPy can convert to one (for instance nested lists)
+
+        Returns:
+            An LedDisplay representing the given array
+
+        Raises:
+            ValueError: If the given array is not 5x5
+        """
+        import numpy
+
+        leds = numpy.asarray(array, dtype=bool)
+        if leds.shape != (5, 5):
+            raise ValueError("Image should contain 5 rows of 5 LEDs")
+        return LedDisplay(bytearray((numpy.packbits(leds, axis=1)[:, 0] >> 3).tobytes()))
+
+    def to_numpy(self):
+        """
+        Returns the on/off state of the LEDs as a 5x5 NumPy bool array, the first index is the row, the second the
+        column. This requires NumPy to be installed.
+        """
+        import numpy
+
+        rows = numpy.frombuffer(bytes(self._display), dtype=numpy.uint8).reshape(5, 1)
+        return numpy.unpackbits(rows << 3, axis=1)[:, :5].astype(bool)
+
+    def invert(self) -> 'LedDisplay':
+        """
+        Returns:
+            a new LedDisplay with the LEDs that are off turned on, and the LEDs that are on turned off
+        """
+        return LedDisplay(bytearray(~row & _ALL_COLUMNS for row in self._display))
+
+    def __invert__(self) -> 'LedDisplay':
+        return self.invert()
+
+    def __or__(self, other: 'LedDisplay') -> 'LedDisplay':
+        """A new LedDisplay with the LEDs turned on that are on in either display"""
+        if not isinstance(other, LedDisplay):
+            return NotImplemented
+        return LedDisplay(bytearray(a | b for a, b in zip(self._display, other._display)))
+
+    def __and__(self, other: 'LedDisplay') -> 'LedDisplay':
+        """A new LedDisplay with the LEDs turned on that are on in both displays"""
+        if not isinstance(other, LedDisplay):
+            return NotImplemented
+        return LedDisplay(bytearray(a & b for a, b in zip(self._display, other._display)))
+
+    def __xor__(self, other: 'LedDisplay') -> 'LedDisplay':
+        """A new LedDisplay with the LEDs turned on that are on in exactly one of the displays"""
+        if not isinstance(other, LedDisplay):
+            return NotImplemented
+        return LedDisplay(bytearray(a ^ b for a, b in zip(self._display, other._display)))
+
+    def shift_left(self, columns: int = 1, wrap: bool = False) -> 'LedDisplay':
+        """
+        Moves all LEDs to the left. This and the other shift functions return a new LedDisplay, the display itself
+        is not changed.
+
+        Args:
+            columns (int): the number of columns to move, a negative number moves to the right
+            wrap (bool): if True the LEDs that move off the left edge reappear on the right, if False the LEDs on
+                the right are turned off
+
+        Returns:
+            the shifted LedDisplay
+        """
+        if wrap:
+            columns %= 5
+            return LedDisplay(bytearray(
+                (_shift(row, -columns) | _shift(row, 5 - columns)) & _ALL_COLUMNS for row in self._display))
+        return LedDisplay(bytearray(_shift(row, -columns) for row in self._display))
+
+    def shift_right(self, columns: int = 1, wrap: bool = False) -> 'LedDisplay':
+        """
+        Moves all LEDs to the right, see `LedDisplay.shift_left`
+        """
+        return self.shift_left(-columns, wrap)
+
+    def shift_up(self, rows: int = 1, wrap: bool = False) -> 'LedDisplay':
+        """
+        Moves all LEDs up, see `LedDisplay.shift_left`
+
+        Args:
+            rows (int): the number of rows to move, a negative number moves down
+            wrap (bool): if True the LEDs that move off the top reappear at the bottom, if False the LEDs on the
+                bottom are turned off
+
+        Returns:
+            the shifted LedDisplay
+        """
+        if wrap:
+            rows %= 5
+            return LedDisplay(self._display[rows:] + self._display[:rows])
+        if rows >= 0:
+            return LedDisplay(self._display[rows:5] + bytearray(min(rows, 5)))
+        return LedDisplay(bytearray(min(-rows, 5)) + self._display[:max(5 + rows, 0)])
+
+    def shift_down(self, rows: int = 1, wrap: bool = False) -> 'LedDisplay':
+        """
+        Moves all LEDs down, see `LedDisplay.shift_up`
+        """
+        return self.shift_up(-rows, wrap)
+
+    def blit(self, image: 'LedDisplay', row: int = 1, column: int = 1, height: int = 5,
+             width: int = 5) -> 'LedDisplay':
+        """
+        Copies the top left part of an image onto this display, at the given position. LEDs of the image that
+        fall outside the display are left out, so an image can for instance slide in from the left by blitting it
+        at column -3, -2, ... 1.
+
+        Args:
+            image (LedDisplay): the image to copy from
+            row (int): the row where the top of the image is placed (can be less than 1 or greater than 5)
+            column (int): the column where the left side of the image is placed (can be less than 1 or greater
+                than 5)
+            height (int): the number of rows of the image that are copied
+            width (int): the number of columns of the image that are copied
+
+        Returns:
+            a new LedDisplay, with the LEDs of the copied part of the image replacing the LEDs of this display
+        """
+        region = _shift(_ALL_COLUMNS << (5 - min(width, 5)) & _ALL_COLUMNS, column - 1)
+        display = bytearray(self._display)
+        for source in range(max(0, 1 - row), min(height, 6 - row, 5)):
+            target = row - 1 + source
+            display[target] = display[target] & ~region | _shift(image._display[source], column - 1) & region
+        return LedDisplay(display)
+
     @staticmethod
     def image(string: str, on: str = '#', off: str = '.') -> 'LedDisplay':
         """
@@ -73,6 +292,8 @@ class LedDisplay:
         You can choose which characters are used for an LED that is 'on' or 'off' with the 'on' and 'off'
         parameters. The given string must contain exactly 25 'on' and 'off' values, 1 for each LED.
 
+        Every distinct string is only parsed once, creating the same image again only copies 5 bytes.
+
         Args:
             string: the string representing the LED screen
             on: the letter representing an LED that is 'on' ('#' if left blank)
@@ -84,22 +305,7 @@ class LedDisplay:
         Raises:
             ValueError: If the given string does not contain exactly 25 on/off values
         """
-        image: List[bool] = []
-        for s in string:
-            if s == on:
-                image.append(True)
-            elif s == off:
-                image.append(False)
-
-        if len(image) != 25:
-            raise ValueError("Image should contain 25 LEDs")
-
-        leds = LedDisplay()
-        for row in range(1, 6):
-            for column in range(1, 6):
-                leds.set_led(row, column, image[(row-1)*5+column-1])
-
-        return leds
+        return LedDisplay(bytearray(_parse_image(string, on, off)))
 
     def __str__(self):
         string = "\n"
@@ -110,8 +316,30 @@ class LedDisplay:
         return string
 
 
+class _LazyImage:
+    """
+    An image constant that is only parsed the first time it is used
+    """
+
+    def __init__(self, string: str):
+        self._string = string
+        self._name = None
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def __get__(self, instance, owner) -> LedDisplay:
+        image = LedDisplay.image(self._string)
+        # replace this descriptor by the image, later lookups are plain attribute lookups
+        setattr(owner, self._name, image)
+        return image
+
+
 class Image:
-    HEART: LedDisplay = LedDisplay.image("""
+    """
+    Predefined images for the LED display. An image is only created the first time it is used.
+    """
+    HEART: LedDisplay = _LazyImage("""
         . # . # .
         # # # # #
         # # # # #
@@ -119,7 +347,7 @@ class Image:
         . . # . .
     """)
 
-    HEART_SMALL: LedDisplay = LedDisplay.image("""
+    HEART_SMALL: LedDisplay = _LazyImage("""
         . . . . .
         . # . # .
         . # # # .
@@ -127,7 +355,7 @@ class Image:
         . . . . .
     """)
 
-    HAPPY: LedDisplay = LedDisplay.image("""
+    HAPPY: LedDisplay = _LazyImage("""
         . . . . .
         . # . # .
         . . . . .
@@ -135,7 +363,7 @@ class Image:
         . # # # .
     """)
 
-    SMILE: LedDisplay = LedDisplay.image("""
+    SMILE: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . . . .
@@ -143,7 +371,7 @@ class Image:
         . # # # .
     """)
 
-    SAD: LedDisplay = LedDisplay.image("""
+    SAD: LedDisplay = _LazyImage("""
         . . . . .
         . # . # .
         . . . . .
@@ -151,7 +379,7 @@ class Image:
         # . . . #
     """)
 
-    CONFUSED: LedDisplay = LedDisplay.image("""
+    CONFUSED: LedDisplay = _LazyImage("""
         . . . . .
         . # . # .
         . . . . .
@@ -159,7 +387,7 @@ class Image:
         # . # . #
     """)
 
-    ANGRY: LedDisplay = LedDisplay.image("""
+    ANGRY: LedDisplay = _LazyImage("""
         # . . . #
         . # . # .
         . . . . .
@@ -167,7 +395,7 @@ class Image:
         # . # . #
     """)
 
-    ASLEEP: LedDisplay = LedDisplay.image("""
+    ASLEEP: LedDisplay = _LazyImage("""
         . . . . .
         # # . # #
         . . . . .
@@ -175,7 +403,7 @@ class Image:
         . . . . .
     """)
 
-    SURPRISED: LedDisplay = LedDisplay.image("""
+    SURPRISED: LedDisplay = _LazyImage("""
         . # . # .
         . . . . .
         . . # . .
@@ -183,7 +411,7 @@ class Image:
         . . # . .
     """)
 
-    SILLY: LedDisplay = LedDisplay.image("""
+    SILLY: LedDisplay = _LazyImage("""
         # . . . #
         . . . . .
         # # # # #
@@ -191,7 +419,7 @@ class Image:
         . . # # #
     """)
 
-    FABULOUS: LedDisplay = LedDisplay.image("""
+    FABULOUS: LedDisplay = _LazyImage("""
         # # # # #
         # # . # #
         . . . . .
@@ -199,7 +427,7 @@ class Image:
         . # # # .
     """)
 
-    MEH: LedDisplay = LedDisplay.image("""
+    MEH: LedDisplay = _LazyImage("""
         . # . # .
         . . . . .
         . . . # .
@@ -207,7 +435,7 @@ class Image:
         . # . . .
     """)
 
-    YES: LedDisplay = LedDisplay.image("""
+    YES: LedDisplay = _LazyImage("""
         . . . . .
         . . . . #
         . . . # .
@@ -215,7 +443,7 @@ class Image:
         . # . . .
     """)
 
-    NO: LedDisplay = LedDisplay.image("""
+    NO: LedDisplay = _LazyImage("""
         # . . . #
         . # . # .
         . . # . .
@@ -223,7 +451,7 @@ class Image:
         # . . . #
     """)
 
-    CLOCK12: LedDisplay = LedDisplay.image("""
+    CLOCK12: LedDisplay = _LazyImage("""
         . . # . .
         . . # . .
         . . # . .
@@ -231,7 +459,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK1: LedDisplay = LedDisplay.image("""
+    CLOCK1: LedDisplay = _LazyImage("""
         . . . # .
         . . . # .
         . . # . .
@@ -239,7 +467,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK2: LedDisplay = LedDisplay.image("""
+    CLOCK2: LedDisplay = _LazyImage("""
         . . . . .
         . . . # #
         . . # . .
@@ -247,7 +475,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK3: LedDisplay = LedDisplay.image("""
+    CLOCK3: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # # #
@@ -255,7 +483,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK4: LedDisplay = LedDisplay.image("""
+    CLOCK4: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # . .
@@ -263,7 +491,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK5: LedDisplay = LedDisplay.image("""
+    CLOCK5: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # . .
@@ -271,7 +499,7 @@ class Image:
         . . . # .
     """)
 
-    CLOCK6: LedDisplay = LedDisplay.image("""
+    CLOCK6: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # . .
@@ -279,7 +507,7 @@ class Image:
         . . # . .
     """)
 
-    CLOCK7: LedDisplay = LedDisplay.image("""
+    CLOCK7: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # . .
@@ -287,7 +515,7 @@ class Image:
         . # . . .
     """)
 
-    CLOCK8: LedDisplay = LedDisplay.image("""
+    CLOCK8: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         . . # . .
@@ -295,7 +523,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK9: LedDisplay = LedDisplay.image("""
+    CLOCK9: LedDisplay = _LazyImage("""
         . . . . .
         . . . . .
         # # # . .
@@ -303,7 +531,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK10: LedDisplay = LedDisplay.image("""
+    CLOCK10: LedDisplay = _LazyImage("""
         . . . . .
         # # . . .
         . . # . .
@@ -311,7 +539,7 @@ class Image:
         . . . . .
     """)
 
-    CLOCK11: LedDisplay = LedDisplay.image("""
+    CLOCK11: LedDisplay = _LazyImage("""
         . # . . .
         . # . . .
         . . # . .
@@ -319,7 +547,7 @@ class Image:
         . . . . .
     """)
 
-    ARROW_N: LedDisplay = LedDisplay.image("""
+    ARROW_N: LedDisplay = _LazyImage("""
         . . # . .
         . # # # .
         # . # . #
@@ -327,7 +555,7 @@ class Image:
         . . # . .
     """)
 
-    ARROW_NE: LedDisplay = LedDisplay.image("""
+    ARROW_NE: LedDisplay = _LazyImage("""
         . . # # #
         . . . # #
         . . # . #
@@ -335,7 +563,7 @@ class Image:
         # . . . .
     """)
 
-    ARROW_E: LedDisplay = LedDisplay.image("""
+    ARROW_E: LedDisplay = _LazyImage("""
         . . # . .
         . . . # .
         # # # # #
@@ -343,7 +571,7 @@ class Image:
         . . # . .
     """)
 
-    ARROW_SE: LedDisplay = LedDisplay.image("""
+    ARROW_SE: LedDisplay = _LazyImage("""
         # . . . .
         . # . . .
         . . # . #
@@ -351,7 +579,7 @@ class Image:
         . . # # #
     """)
 
-    ARROW_S: LedDisplay = LedDisplay.image("""
+    ARROW_S: LedDisplay = _LazyImage("""
         . . # . .
         . . # . .
         # . # . #
@@ -359,7 +587,7 @@ class Image:
         . . # . .
     """)
 
-    ARROW_SW: LedDisplay = LedDisplay.image("""
+    ARROW_SW: LedDisplay = _LazyImage("""
         . . . . #
         . . . # .
         # . # . .
@@ -367,7 +595,7 @@ class Image:
         # # # . .
     """)
 
-    ARROW_W: LedDisplay = LedDisplay.image("""
+    ARROW_W: LedDisplay = _LazyImage("""
         . . # . .
         . # . . .
         # # # # #
@@ -375,7 +603,7 @@ class Image:
         . . # . .
     """)
 
-    ARROW_NW: LedDisplay = LedDisplay.image("""
+    ARROW_NW: LedDisplay = _LazyImage("""
         # # # . .
         # # . . .
         # . # . .
@@ -383,7 +611,7 @@ class Image:
         . . . . #
     """)
 
-    TRIANGLE: LedDisplay = LedDisplay.image("""
+    TRIANGLE: LedDisplay = _LazyImage("""
         . . . . .
         . . # . .
         . # . # .
@@ -391,7 +619,7 @@ class Image:
         . . . . .
     """)
 
-    TRIANGLE_LEFT: LedDisplay = LedDisplay.image("""
+    TRIANGLE_LEFT: LedDisplay = _LazyImage("""
         # . . . .
         # # . . .
         # . # . .
@@ -399,7 +627,7 @@ class Image:
         # # # # #
     """)
 
-    CHESSBOARD: LedDisplay = LedDisplay.image("""
+    CHESSBOARD: LedDisplay = _LazyImage("""
         . # . # .
         # . # . #
         . # . # .
@@ -407,7 +635,7 @@ class Image:
         . # . # .
     """)
 
-    DIAMOND: LedDisplay = LedDisplay.image("""
+    DIAMOND: LedDisplay = _LazyImage("""
         . . # . .
         . # . # .
         # . . . #
@@ -415,7 +643,7 @@ class Image:
         . . # . .
     """)
 
-    DIAMOND_SMALL: LedDisplay = LedDisplay.image("""
+    DIAMOND_SMALL: LedDisplay = _LazyImage("""
         . . . . .
         . . # . .
         . # . # .
@@ -423,7 +651,7 @@ class Image:
         . . . . .
     """)
 
-    SQUARE: LedDisplay = LedDisplay.image("""
+    SQUARE: LedDisplay = _LazyImage("""
         # # # # #
         # . . . #
         # . . . #
@@ -431,7 +659,7 @@ class Image:
         # # # # #
     """)
 
-    SQUARE_SMALL: LedDisplay = LedDisplay.image("""
+    SQUARE_SMALL: LedDisplay = _LazyImage("""
         . . . . .
         . # # # .
         . # . # .
@@ -439,7 +667,7 @@ class Image:
         . . . . .
     """)
 
-    RABBIT: LedDisplay = LedDisplay.image("""
+    RABBIT: LedDisplay = _LazyImage("""
         # . # . .
         # . # . .
         # # # # .
@@ -447,7 +675,7 @@ class Image:
         # # # # .
     """)
 
-    COW: LedDisplay = LedDisplay.image("""
+    COW: LedDisplay = _LazyImage("""
         # . . . #
         # . . . #
         # # # # #
@@ -455,7 +683,7 @@ class Image:
         . . # . .
     """)
 
-    MUSIC_CROTCHET: LedDisplay = LedDisplay.image("""
+    MUSIC_CROTCHET: LedDisplay = _LazyImage("""
         . . # . .
         . . # . .
         . . # . .
@@ -463,7 +691,7 @@ class Image:
         # # # . .
     """)
 
-    MUSIC_QUAVER: LedDisplay = LedDisplay.image("""
+    MUSIC_QUAVER: LedDisplay = _LazyImage("""
         . . # . .
         . . # # .
         . . # . #
@@ -471,7 +699,7 @@ class Image:
         # # # . .
     """)
 
-    MUSIC_QUAVERS: LedDisplay = LedDisplay.image("""
+    MUSIC_QUAVERS: LedDisplay = _LazyImage("""
         . # # # #
         . # . . #
         . # . . #
@@ -479,7 +707,7 @@ class Image:
         # # . # #
     """)
 
-    PITCHFORK: LedDisplay = LedDisplay.image("""
+    PITCHFORK: LedDisplay = _LazyImage("""
         # . # . #
         # . # . #
         # # # # #
@@ -487,7 +715,7 @@ class Image:
         . . # . .
     """)
 
-    XMAS: LedDisplay = LedDisplay.image("""
+    XMAS: LedDisplay = _LazyImage("""
         . . # . .
         . # # # .
         . . # . .
@@ -495,7 +723,7 @@ class Image:
         # # # # #
     """)
 
-    PACMAN: LedDisplay = LedDisplay.image("""
+    PACMAN: LedDisplay = _LazyImage("""
         . # # # #
         # # . # .
         # # # . .
@@ -503,7 +731,7 @@ class Image:
         . # # # #
     """)
 
-    TARGET: LedDisplay = LedDisplay.image("""
+    TARGET: LedDisplay = _LazyImage("""
         . . # . .
         . # # # .
         # # . # #
@@ -513,7 +741,7 @@ class Image:
 
     # The following images were designed by Abbie Brooks.
 
-    TSHIRT: LedDisplay = LedDisplay.image("""
+    TSHIRT: LedDisplay = _LazyImage("""
         # # . # #
         # # # # #
         . # # # .
@@ -521,7 +749,7 @@ class Image:
         . # # # .
     """)
 
-    ROLLERSKATE: LedDisplay = LedDisplay.image("""
+    ROLLERSKATE: LedDisplay = _LazyImage("""
         . . . # #
         . . . # #
         # # # # #
@@ -529,7 +757,7 @@ class Image:
         . # . # .
     """)
 
-    DUCK: LedDisplay = LedDisplay.image("""
+    DUCK: LedDisplay = _LazyImage("""
         . # # . .
         # # # . .
         . # # # #
@@ -537,7 +765,7 @@ class Image:
         . . . . .
     """)
 
-    HOUSE: LedDisplay = LedDisplay.image("""
+    HOUSE: LedDisplay = _LazyImage("""
         . . # . .
         . # # # .
         # # # # #
@@ -545,7 +773,7 @@ class Image:
         . # . # .
     """)
 
-    TORTOISE: LedDisplay = LedDisplay.image("""
+    TORTOISE: LedDisplay = _LazyImage("""
         . . . . .
         . # # # .
         # # # # #
@@ -553,7 +781,7 @@ class Image:
         . . . . .
     """)
 
-    BUTTERFLY: LedDisplay = LedDisplay.image("""
+    BUTTERFLY: LedDisplay = _LazyImage("""
         # # . # #
         # # # # #
         . . # . .
@@ -561,7 +789,7 @@ class Image:
         # # . # #
     """)
 
-    STICKFIGURE: LedDisplay = LedDisplay.image("""
+    STICKFIGURE: LedDisplay = _LazyImage("""
         . . # . .
         # # # # #
         . . # . .
@@ -569,7 +797,7 @@ class Image:
         # . . . #
     """)
 
-    GHOST: LedDisplay = LedDisplay.image("""
+    GHOST: LedDisplay = _LazyImage("""
         # # # # #
         # . # . #
         # # # # #
@@ -577,7 +805,7 @@ class Image:
         # . # . #
     """)
 
-    SWORD: LedDisplay = LedDisplay.image("""
+    SWORD: LedDisplay = _LazyImage("""
         . . # . .
         . . # . .
         . . # . .
@@ -585,7 +813,7 @@ class Image:
         . . # . .
     """)
 
-    GIRAFFE: LedDisplay = LedDisplay.image("""
+    GIRAFFE: LedDisplay = _LazyImage("""
         # # . . .
         . # . . .
         . # . . .
@@ -593,7 +821,7 @@ class Image:
         . # . # .
     """)
 
-    SKULL: LedDisplay = LedDisplay.image("""
+    SKULL: LedDisplay = _LazyImage("""
         . # # # .
         # . # . #
         # # # # #
@@ -601,7 +829,7 @@ class Image:
         . # # # .
     """)
 
-    UMBRELLA: LedDisplay = LedDisplay.image("""
+    UMBRELLA: LedDisplay = _LazyImage("""
         . # # # .
         # # # # #
         . . # . .
@@ -609,7 +837,7 @@ class Image:
         . # # . .
     """)
 
-    SNAKE: LedDisplay = LedDisplay.image("""
+    SNAKE: LedDisplay = _LazyImage("""
         # # . . .
         # # . # #
         . # . # .
@@ -617,7 +845,7 @@ class Image:
         . . . . .
     """)
 
-    SCISSORS: LedDisplay = LedDisplay.image("""
+    SCISSORS: LedDisplay = _LazyImage("""
         # # . . #
         # # . # .
         . . # . .
@@ -0,0 +1,194 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from functools import lru_cache
+from typing import Dict, Tuple, List, Union
+
+from .leddisplay import LedDisplay
+
+FONT: Dict[str, int] = {
+    ' ': 0,
+    '!': 0b10000_10000_10000_00000_10000,
+    '"': 0b10100_10100_00000_00000_00000,
+    '#': 0b01010_11111_01010_11111_01010,
+    '$': 0b01111_10100_01110_00101_11110,
+    '%': 0b11001_11010_00100_01011_10011,
+    '&': 0b01100_10010_01100_10010_01101,
+    "'": 0b10000_10000_00000_00000_00000,
+    '(': 0b01000_10000_10000_10000_01000,
+    ')': 0b10000_01000_01000_01000_10000,
+    '*': 0b00000_10100_01000_10100_00000,
+    '+': 0b00000_01000_11100_01000_00000,
+    ',': 0b00000_00000_00000_01000_10000,
+    '-': 0b00000_00000_11100_00000_00000,
+    '.': 0b00000_00000_00000_00000_10000,
+    '/': 0b00001_00010_00100_01000_10000,
+    '0': 0b01100_10010_10010_10010_01100,
+    '1': 0b01000_11000_01000_01000_11100,
+    '2': 0b11100_00010_01100_10000_11110,
+    '3': 0b11110_00010_00100_10010_01100,
+    '4': 0b00100_01100_10100_11110_00100,
+    '5': 0b11110_10000_11100_00010_11100,
+    '6': 0b00010_00100_01110_10010_01100,
+    '7': 0b11110_00010_00100_01000_10000,
+    '8': 0b01100_10010_01100_10010_01100,
+    '9': 0b01110_10010_01110_00100_01000,
+    ':': 0b00000_10000_00000_10000_00000,
+    ';': 0b00000_01000_00000_01000_10000,
+    '<': 0b00100_01000_10000_01000_00100,
+    '=': 0b00000_11100_00000_11100_00000,
+    '>': 0b10000_01000_00100_01000_10000,
+    '?': 0b11100_00010_01100_00000_01000,
+    '@': 0b01110_10001_10111_10000_01110,
+    'A': 0b01100_10010_11110_10010_10010,
+    'B': 0b11100_10010_11100_10010_11100,
+    'C': 0b01110_10000_10000_10000_01110,
+    'D': 0b11100_10010_10010_10010_11100,
+    'E': 0b11110_10000_11100_10000_11110,
+    'F': 0b11110_10000_11100_10000_10000,
+    'G': 0b01110_10000_10011_10001_01110,
+    'H': 0b10010_10010_11110_10010_10010,
+    'I': 0b11100_01000_01000_01000_11100,
+    'J': 0b11111_00010_00010_10010_01100,
+    'K': 0b10010_10100_11000_10100_10010,
+    'L': 0b10000_10000_10000_10000_11110,
+    'M': 0b10001_11011_10101_10001_10001,
+    'N': 0b10001_11001_10101_10011_10001,
+    'O': 0b01100_10010_10010_10010_01100,
+    'P': 0b11100_10010_11100_10000_10000,
+    'Q': 0b01100_10010_10010_01100_00110,
+    'R': 0b11100_10010_11100_10010_10001,
+    'S': 0b01110_10000_01100_00010_11100,
+    'T': 0b11111_00100_00100_00100_00100,
+    'U': 0b10010_10010_10010_10010_01100,
+    'V': 0b10001_10001_10001_01010_00100,
+    'W': 0b10001_10001_10101_11011_10001,
+    'X': 0b10010_10010_01100_10010_10010,
+    'Y': 0b10001_01010_00100_00100_00100,
+    'Z': 0b11110_00100_01000_10000_11110,
+    '[': 0b11000_10000_10000_10000_11000,
+    '\\': 0b10000_01000_00100_00010_00001,
+    ']': 0b11000_01000_01000_01000_11000,
+    '^': 0b01000_10100_00000_00000_00000,
+    '_': 0b00000_00000_00000_00000_11111,
+    '`': 0b10000_01000_00000_00000_00000,
+    'a': 0b00000_01110_10010_10010_01111,
+    'b': 0b10000_10000_11100_10010_11100,
+    'c': 0b00000_01110_10000_10000_01110,
+    'd': 0b00010_00010_01110_10010_01110,
+    'e': 0b01100_10010_11100_10000_01110,
+    'f': 0b00110_01000_11100_01000_01000,
+    'g': 0b01110_10010_01110_00010_01100,
+    'h': 0b10000_10000_11100_10010_10010,
+    'i': 0b10000_00000_10000_10000_10000,
+    'j': 0b00010_00000_00010_10010_01100,
+    'k': 0b10000_10100_11000_10100_10010,
+    'l': 0b10000_10000_10000_10000_01000,
+    'm': 0b00000_11011_10101_10001_10001,
+    'n': 0b00000_11100_10010_10010_10010,
+    'o': 0b00000_01100_10010_10010_01100,
+    'p': 0b00000_11100_10010_11100_10000,
+    'q': 0b00000_01110_10010_01110_00010,
+    'r': 0b00000_01110_10000_10000_10000,
+    's': 0b00000_01110_11000_00110_11100,
+    't': 0b01000_11100_01000_01000_00110,
+    'u': 0b00000_10010_10010_10010_01111,
+    'v': 0b00000_10001_10001_01010_00100,
+    'w': 0b00000_10001_10101_10101_01010,
+    'x': 0b00000_10010_01100_01100_10010,
+    'y': 0b00000_10010_01110_00010_01100,
+    'z': 0b00000_11110_00100_01000_11110,
+    '{': 0b01100_01000_11000_01000_01100,
+    '|': 0b10000_10000_10000_10000_10000,
+    '}': 0b11000_01000_01100_01000_11000,
+    '~': 0b00000_01000_10101_00010_00000,
+}
+"""
+The built-in font of `TextRenderer`: the printable ASCII characters as 25 bit numbers, see `LedDisplay.from_int`.
+Characters are as narrow as their LEDs allow, empty columns left and right of a character are left out. An empty
+character, like the space, is 3 columns wide.
+"""
+
+_SPACE_WIDTH = 3
+_UNKNOWN = '?'
+
+Glyph = Tuple[Tuple[int, ...], int]
+
+
+class TextRenderer:
+    """
+    Renders text of any length to the frames of a text that scrolls over the LED display from right to left. Unlike
+    `LedService.show_text`, the text is not limited to 20 characters and you can add your own characters.
+
+    The frames of a text are rendered once and cached: scrolling the same text again only copies the frames.
+
+    Example:
+    ```python
+    renderer = TextRenderer(glyphs={'♥': Image.HEART_SMALL})
+    with KaspersMicrobit.find_one_microbit() as microbit:
+        microbit.led.scroll_text('I ♥ my micro:bit', renderer=renderer)
+    ```
+    """
+
+    def __init__(self, glyphs: Dict[str, Union[LedDisplay, int]] = None, spacing: int = 1, cache_size: int = 128):
+        """
+        Args:
+            glyphs: characters to add to, or to replace in the built-in `FONT`, as an LedDisplay or as a 25 bit
+                number (see `LedDisplay.from_int`)
+            spacing (int): the number of empty columns between two characters
+            cache_size (int): the number of texts of which the frames are kept
+        """
+        self._font: Dict[str, Union[LedDisplay, int]] = dict(FONT)
+        if glyphs:
+            self._font.update(glyphs)
+        self._spacing = spacing
+        self._glyphs: Dict[str, Glyph] = {}
+        self._render = lru_cache(maxsize=cache_size)(self._render_frames)
+
+    def frames(self, text: str) -> List[LedDisplay]:
+        """
+        Renders the frames of a scrolling text: the first frame is empty, in each next frame the text is moved one
+        column to the left, until it has scrolled off the display. Characters that are not in the font are shown
+        as a question mark.
+
+        Args:
+            text (str): the text to render
+
+        Returns:
+            the frames, one for each column the text moves
+        """
+        return [LedDisplay(bytearray(frame)) for frame in self._render(text)]
+
+    def _render_frames(self, text: str) -> Tuple[bytes, ...]:
+        if not text:
+            return ()
+        # the text is laid out as 5 rows of bits, one bit per column, with an empty display before and after it
+        rows = [0] * 5
+        width = 5
+        for index, char in enumerate(text):
+            glyph_rows, glyph_width = self._glyph(char)
+            shift = glyph_width + (self._spacing if index else 0)
+            rows = [row << shift | glyph_row for row, glyph_row in zip(rows, glyph_rows)]
+            width += shift
+        rows = [row << 5 for row in rows]
+        width += 5
+        return tuple(bytes((row >> (width - 5 - offset)) & 0b11111 for row in rows) for offset in range(width - 4))
+
+    def _glyph(self, char: str) -> Glyph:
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            glyph = self._glyphs[char] = _to_glyph(self._font.get(char, self._font[_UNKNOWN]))
+        return glyph
+
+
+def _to_glyph(image: Union[LedDisplay, int]) -> Glyph:
+    value = image if isinstance(image, int) else image.to_int()
+    rows = LedDisplay.from_int(value).to_bytes()
+    columns = 0
+    for row in rows:
+        columns |= row
+    if not columns:
+        return tuple(rows), _SPACE_WIDTH
+    empty_left = 5 - columns.bit_length()
+    empty_right = (columns & -columns).bit_length() - 1
+    return tuple(row >> empty_right for row in rows), 5 - empty_left - empty_right
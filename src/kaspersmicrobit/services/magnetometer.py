@@ -1,12 +1,16 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import struct
 from concurrent.futures import Future
 from dataclasses import dataclass
 from typing import Callable, Literal, Union
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice, ByteData
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+from .samplebatch import SampleBatch
 
 MagnetometerPeriod = Union[
     Literal[1], Literal[2], Literal[5], Literal[10], Literal[20], Literal[80], Literal[160], Literal[640]
@@ -21,6 +25,10 @@ Warning:
 """
 
 
+def _uint16_from_bytes(data: ByteData) -> int:
+    return int.from_bytes(data[0:2], "little")
+
+
 class Calibration:
     """
     A class that allows you to follow up on a calibration
@@ -48,11 +56,42 @@ class Calibration:
             True if the calibration was successful, False if it was unsuccessful
         """
         if not self._result:
-            self._result = int.from_bytes(self._future.result(timeout=timeout)[0:2], "little")
+            self._result = _uint16_from_bytes(self._future.result(timeout=timeout))
 
         return self._result
 
 
+class AsyncCalibration:
+    """
+    The asyncio variant of `Calibration`, returned by `AsyncMagnetometerService.calibrate`
+    """
+    def __init__(self, future: asyncio.Future):
+        self._future = future
+
+    def done(self) -> bool:
+        """
+        Check whether the calibration is still in progress
+
+        Returns:
+            True if the calibration is done, False if it is still in progress
+        """
+        return self._future.done()
+
+    async def wait_for_result(self, timeout=None) -> bool:
+        """
+        Wait for the end of the calibration process
+        Args:
+            timeout: the maximum number of seconds you want to wait for a result
+
+        Returns:
+            True if the calibration was successful, False if it was unsuccessful
+        """
+        return _uint16_from_bytes(await asyncio.wait_for(asyncio.shield(self._future), timeout))
+
+
+_XYZ = struct.Struct('<hhh')
+
+
 @dataclass
 class MagnetometerData:
     """
@@ -63,17 +102,14 @@ class MagnetometerData:
         y (int): horizontal (from back to front)
         z (int): vertical (from bottom to top)
     """
+    __slots__ = ('x', 'y', 'z')
     x: int
     y: int
     z: int
 
     @staticmethod
     def from_bytes(values: ByteData):
-        return MagnetometerData(
-            int.from_bytes(values[0:2], "little", signed=True),
-            int.from_bytes(values[2:4], "little", signed=True),
-            int.from_bytes(values[4:6], "little", signed=True)
-        )
+        return MagnetometerData(*_XYZ.unpack_from(values))
 
 
 class MagnetometerService:
@@ -109,7 +145,7 @@ class MagnetometerService:
         """
         return self._device.is_service_available(Service.MAGNETOMETER)
 
-    def notify_data(self, callback: Callable[[MagnetometerData], None]):
+    def notify_data(self, callback: Callable[[MagnetometerData], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method when you want to be notified of new magnetometer data. How often you
         receive new data depends on the magnetometer period
@@ -120,14 +156,50 @@ class MagnetometerService:
         Args:
             callback (Callable[[MagnetometerData], None]): a function that is called when there is new data
                 are of the magnetometer. The new MagnetometerData is passed as an argument to this function
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the magnetometer service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the magnetometer service is active but there was no way
+                to activate magnetometer data notifications (normally does not occur)
+        """
+        return self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_DATA,
+                                   lambda sender, data: callback(MagnetometerData.from_bytes(data)), dispatch=dispatch)
+
+    def notify_data_batch(self, callback: Callable[[SampleBatch], None], max_batch: int = 32,
+                          max_latency_ms: int = 100, dispatch: Dispatch = None) -> Subscription:
+        """
+        Like notify_data, but you receive the magnetometer data in batches: the callback is called with up to
+        max_batch measurements at once, stored in compact arrays.
+
+        Warning:
+            The micro:bit will not provide any measurements if there has been no calibration
+
+        Args:
+            callback (Callable[[SampleBatch], None]): a function that is called with a batch of magnetometer data
+            max_batch (int): the maximum number of measurements in a batch
+            max_latency_ms (int): a batch is handed over at the latest this number of milliseconds after its first
+                measurement was received, even when it is not full yet (0 hands over every measurement right away,
+                None waits until the batch is full). The last, partial batch is handed over on disconnect
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many batches are waiting for, or were dropped by, the callback
 
         Raises:
+            ValueError: When max_batch is smaller than 1 or max_latency_ms is negative
             errors.BluetoothServiceNotFound: When the magnetometer service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the magnetometer service is active but there was no way
                 to activate magnetometer data notifications (normally does not occur)
         """
-        self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_DATA,
-                            lambda sender, data: callback(MagnetometerData.from_bytes(data)))
+        return self._device.notify_batch(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_DATA,
+                                         lambda batch: callback(SampleBatch.from_notification_batch(batch)),
+                                         max_batch, max_latency_ms, dispatch=dispatch)
 
     def read_data(self) -> MagnetometerData:
         """
@@ -174,10 +246,9 @@ class MagnetometerService:
             errors.BluetoothCharacteristicNotFound: When the magnetometer service is active but there was no way
                 to read the magnetometer period (normally does not occur)
         """
-        return int.from_bytes(
-            self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_PERIOD)[0:2], "little")
+        return _uint16_from_bytes(self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_PERIOD))
 
-    def notify_bearing(self, callback: Callable[[int], None]):
+    def notify_bearing(self, callback: Callable[[int], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method if you want to be informed of the angle in degrees at which the micro:bit is oriented
         is compared to the north.
@@ -188,14 +259,19 @@ class MagnetometerService:
         Args:
             callback (Callable[[int], None]): a function that is called periodically with the angle in degrees
                 compared to the north
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the magnetometer service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the magnetometer service is active but there was no way
                 to activate magnetometer bearing notifications (normally does not occur)
         """
-        self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING,
-                            lambda sender, data: callback(int.from_bytes(data[0:2], "little")))
+        return self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING,
+                                   lambda sender, data: callback(_uint16_from_bytes(data)), dispatch=dispatch)
 
     def read_bearing(self) -> int:
         """
@@ -209,8 +285,7 @@ class MagnetometerService:
             errors.BluetoothCharacteristicNotFound: When the magnetometer service is active but there was no way
                 to read the magnetometer bearing (normally does not occur)
         """
-        return int.from_bytes(
-            self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING)[0:2], 'little')
+        return _uint16_from_bytes(self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING))
 
     def calibrate(self) -> Calibration:
         """
@@ -240,3 +315,75 @@ class MagnetometerService:
         calibration = Calibration(future)
         self._calibration = calibration
         return calibration
+
+
+class AsyncMagnetometerService:
+    """
+    The asyncio variant of `MagnetometerService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Notification callbacks are called on the event loop and should not block.
+    """
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+        self._calibration = None
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the magnetometer Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the magnetometer was found, false if not.
+        """
+        return self._device.is_service_available(Service.MAGNETOMETER)
+
+    async def notify_data(self, callback: Callable[[MagnetometerData], None]):
+        """
+        See `MagnetometerService.notify_data`
+        """
+        await self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_DATA,
+                                  lambda sender, data: callback(MagnetometerData.from_bytes(data)))
+
+    async def read_data(self) -> MagnetometerData:
+        """
+        See `MagnetometerService.read_data`
+        """
+        return MagnetometerData.from_bytes(
+            await self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_DATA))
+
+    async def set_period(self, period: MagnetometerPeriod):
+        """
+        See `MagnetometerService.set_period`
+        """
+        await self._device.write(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_PERIOD, period.to_bytes(2, "little"))
+
+    async def read_period(self) -> int:
+        """
+        See `MagnetometerService.read_period`
+        """
+        return _uint16_from_bytes(await self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_PERIOD))
+
+    async def notify_bearing(self, callback: Callable[[int], None]):
+        """
+        See `MagnetometerService.notify_bearing`
+        """
+        await self._device.notify(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING,
+                                  lambda sender, data: callback(_uint16_from_bytes(data)))
+
+    async def read_bearing(self) -> int:
+        """
+        See `MagnetometerService.read_bearing`
+        """
+        return _uint16_from_bytes(await self._device.read(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_BEARING))
+
+    async def calibrate(self) -> AsyncCalibration:
+        """
+        See `MagnetometerService.calibrate`
+        """
+        if self._calibration and not self._calibration.done():
+            return self._calibration
+
+        future = await self._device.wait_for(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_CALIBRATION)
+        await self._device.write(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_CALIBRATION,
+                                 int.to_bytes(1, 1, 'little'))
+        calibration = AsyncCalibration(future)
+        self._calibration = calibration
+        return calibration
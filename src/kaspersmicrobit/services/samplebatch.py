@@ -0,0 +1,67 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Tuple
+
+from ..batch import NotificationBatch
+
+_SAMPLE_SIZE = 6
+
+
+@dataclass
+class SampleBatch:
+    """
+    A batch of measurements along 3 axes (x, y and z), as sent by the accelerometer or the magnetometer.
+    The values are kept in compact arrays instead of one object per measurement.
+
+    Example:
+    ```python
+    def log(batch: SampleBatch):
+        for timestamp, (x, y, z) in zip(batch.timestamps, batch):
+            print(timestamp, x, y, z)
+
+    microbit.accelerometer.notify_batch(log, max_batch=50, max_latency_ms=500)
+    ```
+
+    Attributes:
+        values (array): the signed 16 bit values x, y, z of the first measurement, followed by x, y, z of the second
+            measurement,... (an array of type 'h')
+        timestamps (array): the time at which each measurement was received, in seconds since the epoch
+            (an array of type 'd')
+    """
+    values: array
+    timestamps: array
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('SampleBatch index out of range')
+        return tuple(self.values[index * 3:index * 3 + 3])
+
+    def as_numpy(self):
+        """
+        Returns the measurements as NumPy arrays, without copying. This requires NumPy to be installed.
+
+        Returns:
+            A tuple with an int16 array of shape (n, 3) with the measurements and a float64 array of shape (n,)
+            with the timestamps
+        """
+        import numpy
+
+        return numpy.frombuffer(self.values, dtype=numpy.int16).reshape(-1, 3), \
+            numpy.frombuffer(self.timestamps, dtype=numpy.float64)
+
+    @staticmethod
+    def from_notification_batch(batch: NotificationBatch) -> 'SampleBatch':
+        values = array('h')
+        values.frombytes(batch.data[:len(batch) * _SAMPLE_SIZE])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return SampleBatch(values, batch.timestamps)
@@ -5,7 +5,16 @@ from typing import Callable
 
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+
+
+def _temperature_from_bytes(data: ByteData) -> int:
+    return int.from_bytes(data[0:1], 'little', signed=True)
+
+
+def _period_from_bytes(data: ByteData) -> int:
+    return int.from_bytes(data[0:2], "little")
 
 
 class TemperatureService:
@@ -30,21 +39,26 @@ class TemperatureService:
         """
         return self._device.is_service_available(Service.TEMPERATURE)
 
-    def notify(self, callback: Callable[[int], None]):
+    def notify(self, callback: Callable[[int], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method whenever you want to be notified of the temperature. How often you receive data
         depends on the period. By default the period is 1 second.
 
         Args:
             callback: a function that is called periodically with the temperature as an argument
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the temperature service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the temperature service is active but there was no way
                 to activate temperature data notifications (normally does not occur)
         """
-        self._device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE,
-                            lambda sender, data: callback(int.from_bytes(data[0:1], 'little', signed=True)))
+        return self._device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE,
+                                   lambda sender, data: callback(_temperature_from_bytes(data)), dispatch=dispatch)
 
     def read(self) -> int:
         """
@@ -58,8 +72,7 @@ class TemperatureService:
             errors.BluetoothCharacteristicNotFound: When the temperature service is active but there was no way
                 to read the temperature (normally does not occur)
         """
-        return int.from_bytes(
-            self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)[0:1], 'little', signed=True)
+        return _temperature_from_bytes(self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE))
 
     def set_period(self, period: int):
         """
@@ -88,5 +101,48 @@ class TemperatureService:
             errors.BluetoothCharacteristicNotFound: When the temperature service is active but there was no way
                 to read the temperature period (normally does not occur)
         """
-        return int.from_bytes(
-            self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE_PERIOD)[0:2], "little")
+        return _period_from_bytes(self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE_PERIOD))
+
+
+class AsyncTemperatureService:
+    """
+    The asyncio variant of `TemperatureService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Notification callbacks are called on the event loop and should not block.
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the temperature Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the temperature service was found, false if not.
+        """
+        return self._device.is_service_available(Service.TEMPERATURE)
+
+    async def notify(self, callback: Callable[[int], None]):
+        """
+        See `TemperatureService.notify`
+        """
+        await self._device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE,
+                                  lambda sender, data: callback(_temperature_from_bytes(data)))
+
+    async def read(self) -> int:
+        """
+        See `TemperatureService.read`
+        """
+        return _temperature_from_bytes(await self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE))
+
+    async def set_period(self, period: int):
+        """
+        See `TemperatureService.set_period`
+        """
+        await self._device.write(Service.TEMPERATURE, Characteristic.TEMPERATURE_PERIOD, period.to_bytes(2, "little"))
+
+    async def read_period(self) -> int:
+        """
+        See `TemperatureService.read_period`
+        """
+        return _period_from_bytes(await self._device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE_PERIOD))
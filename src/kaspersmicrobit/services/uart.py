@@ -1,13 +1,15 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import codecs
 from typing import Callable
 
 from ..bluetoothprofile.characteristics import Characteristic
 from ..bluetoothprofile.services import Service
-from ..bluetoothdevice import BluetoothDevice, ByteData
-
-PDU_BYTE_LIMIT = 20
+from ..dispatch import Dispatch, Subscription
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+from .uartstream import UartStream, AsyncUartStream, PDU_BYTE_LIMIT
 
 
 class UartService:
@@ -18,6 +20,21 @@ class UartService:
     """
     def __init__(self, device: BluetoothDevice):
         self._device = device
+        self.max_chunk_size = PDU_BYTE_LIMIT
+        """
+        The maximum number of bytes the micro:bit accepts in one write. The standard micro:bit firmware accepts 20
+        bytes. Raise this when your firmware accepts more: send and stream then use the largest chunks that fit in
+        the negotiated MTU.
+        """
+
+    def chunk_size(self, without_response: bool = False) -> int:
+        """
+        Returns:
+            the number of bytes sent per write: the largest number that both the micro:bit (see max_chunk_size) and
+            the negotiated MTU allow
+        """
+        return min(self.max_chunk_size,
+                   self._device.max_write_size(Service.UART, Characteristic.RX_CHARACTERISTIC, without_response))
 
     def is_available(self) -> bool:
         """
@@ -28,50 +45,81 @@ class UartService:
         """
         return self._device.is_service_available(Service.UART)
 
-    def receive(self, callback: Callable[[ByteData], None]):
+    def receive(self, callback: Callable[[ByteData], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method if you want to be notified when bytes are sent from the micro:bit
         via the uart service
 
         Args:
             callback (Callable[[ByteData], None]): a function that will be called with the received bytes
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs on a shared thread pool)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
             errors.BluetoothServiceNotFound: When the uart service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the uart service is running but there was no way
                 to activate the notifications of uart data (normally does not occur)
         """
-        self._device.notify(Service.UART, Characteristic.TX_CHARACTERISTIC, lambda sender, data: callback(data))
+        return self._device.notify(Service.UART, Characteristic.TX_CHARACTERISTIC, lambda sender, data: callback(data),
+                                   dispatch=dispatch)
 
-    def receive_string(self, callback: Callable[[str], None]):
+    def receive_string(self, callback: Callable[[str], None], dispatch: Dispatch = None) -> Subscription:
         """
         You can call this method if you want to be notified when a string is sent from the micro:bit
-        via the uart service
+        via the uart service. A character that arrives split over two notifications is passed to the callback once
+        it is complete. Use `stream` to receive lines or messages.
+
+        The notifications are decoded one at a time and in order, an unordered dispatch (`Dispatch.executor()`
+        without a queue_size) is not allowed. By default no text is lost when the callback is slow. A dispatch with
+        a bounded queue can drop notifications, the decoder then replaces a character that was cut in two with a
+        replacement character.
 
         Args:
             callback (Callable[[str], None]): a function that will be called with the received string
+            dispatch (Dispatch): how the callback is invoked, see `kaspersmicrobit.dispatch.Dispatch`
+                (optional, by default the callback runs in order on a thread of its own, fed by a queue without
+                a limit)
+
+        Returns:
+            Subscription: shows how many notifications are waiting for, or were dropped by, the callback
 
         Raises:
+            ValueError: When the dispatch is unordered
             errors.BluetoothServiceNotFound: When the uart service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the uart service is running but there was no way
                 to activate the notifications of uart data (normally does not occur)
         """
-        self.receive(UartService.to_string(callback))
+        dispatch = dispatch if dispatch else Dispatch.worker(queue_size=None)
+        if not dispatch.is_ordered():
+            raise ValueError('receive_string needs a dispatch that handles notifications in order')
+        return self.receive(UartService.to_string(callback), dispatch=dispatch)
 
-    def send(self, data: ByteData):
+    def send(self, data: ByteData, without_response: bool = False):
         """
-        Send bytes via the uart service to the micro:bit
+        Send bytes via the uart service to the micro:bit. Data longer than `chunk_size` is sent in several writes,
+        that are pipelined: the next write starts without waiting for the previous one to be confirmed.
 
         Args:
             data (ByteData): the bytes that are sent
+            without_response (bool): do not let the micro:bit confirm the writes. This is faster, but data can get
+                lost when it arrives faster than the micro:bit reads it (optional, default False)
 
         Raises:
             errors.BluetoothServiceNotFound: When the uart service is not active on the micro:bit
             errors.BluetoothCharacteristicNotFound: When the uart service is running but there was no way
                 to send data via the UART service (normally does not occur)
         """
-        for i in range(0, len(data), PDU_BYTE_LIMIT):
-            self._device.write(Service.UART, Characteristic.RX_CHARACTERISTIC, data[i:i + PDU_BYTE_LIMIT])
+        chunk_size = self.chunk_size(without_response)
+        writes = [
+            self._device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC, data[i:i + chunk_size],
+                                      without_response)
+            for i in range(0, len(data), chunk_size)
+        ]
+        for write in writes:
+            write.result()
 
     def send_string(self, string: str):
         """
@@ -87,10 +135,108 @@ class UartService:
         """
         self.send(UartService.from_string(string))
 
+    def stream(self, buffer_size: int = 64 * 1024, encoding: str = 'utf-8',
+               without_response: bool = False) -> UartStream:
+        """
+        Opens a stream to exchange bytes, strings or lines with the micro:bit, see `UartStream`
+
+        Args:
+            buffer_size (int): the maximum number of received bytes that are kept until they are read
+            encoding (str): the encoding of the strings that are read and written
+            without_response (bool): do not let the micro:bit confirm the writes, see `send`
+
+        Returns:
+            UartStream: the stream, receiving bytes from the micro:bit
+
+        Raises:
+            errors.BluetoothServiceNotFound: When the uart service is not active on the micro:bit
+            errors.BluetoothCharacteristicNotFound: When the uart service is running but there was no way
+                to activate the notifications of uart data (normally does not occur)
+        """
+        return UartStream(self._device, buffer_size, self.chunk_size(without_response), encoding,
+                          without_response).open()
+
     @staticmethod
     def from_string(string: str) -> bytes:
         return string.encode("utf-8")
 
     @staticmethod
     def to_string(callback):
-        return lambda data: callback(str(data, "utf-8"))
+        """
+        Wraps a string callback in a function that decodes received bytes. The decoder keeps the start of a
+        character that is split over two notifications, so the function must be called in the order the bytes
+        were received, one call at a time.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        def decode(data):
+            string = decoder.decode(data)
+            if string:
+                callback(string)
+
+        return decode
+
+
+class AsyncUartService:
+    """
+    The asyncio variant of `UartService`, used by `kaspersmicrobit.AsyncKaspersMicrobit`.
+    Receive callbacks are called on the event loop and should not block.
+    """
+    def __init__(self, device: AsyncBluetoothDevice):
+        self._device = device
+        self.max_chunk_size = PDU_BYTE_LIMIT
+        """See `UartService.max_chunk_size`"""
+
+    def chunk_size(self, without_response: bool = False) -> int:
+        """
+        See `UartService.chunk_size`
+        """
+        return min(self.max_chunk_size,
+                   self._device.max_write_size(Service.UART, Characteristic.RX_CHARACTERISTIC, without_response))
+
+    def is_available(self) -> bool:
+        """
+        Checks whether the UART Bluetooth service is found on the connected micro:bit.
+
+        Returns:
+            true if the uart service was found, false if not.
+        """
+        return self._device.is_service_available(Service.UART)
+
+    async def receive(self, callback: Callable[[ByteData], None]):
+        """
+        See `UartService.receive`
+        """
+        await self._device.notify(Service.UART, Characteristic.TX_CHARACTERISTIC, lambda sender, data: callback(data))
+
+    async def receive_string(self, callback: Callable[[str], None]):
+        """
+        See `UartService.receive_string`
+        """
+        await self.receive(UartService.to_string(callback))
+
+    async def send(self, data: ByteData, without_response: bool = False):
+        """
+        See `UartService.send`
+        """
+        chunk_size = self.chunk_size(without_response)
+        writes = [
+            await self._device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC,
+                                            data[i:i + chunk_size], without_response)
+            for i in range(0, len(data), chunk_size)
+        ]
+        await asyncio.gather(*writes)
+
+    async def send_string(self, string: str):
+        """
+        See `UartService.send_string`
+        """
+        await self.send(UartService.from_string(string))
+
+    async def stream(self, buffer_size: int = 64 * 1024, encoding: str = 'utf-8',
+                     without_response: bool = False) -> AsyncUartStream:
+        """
+        See `UartService.stream`
+        """
+        return await AsyncUartStream(self._device, buffer_size, self.chunk_size(without_response), encoding,
+                                     without_response).open()
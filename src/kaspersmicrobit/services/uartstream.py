@@ -0,0 +1,436 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import codecs
+import concurrent.futures
+import time
+from collections import deque
+from threading import Condition
+from typing import Optional, Deque, List, Iterator
+
+from ..bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice, ByteData
+from ..bluetoothprofile.characteristics import Characteristic
+from ..bluetoothprofile.services import Service
+from ..dispatch import Dispatch
+
+PDU_BYTE_LIMIT = 20
+"""The maximum number of bytes the micro:bit accepts in one UART write"""
+
+
+class ByteRing:
+    """
+    A byte buffer of limited capacity: bytes are appended at the end and taken from the front. Taking bytes only
+    moves the start of the buffer, the consumed bytes are discarded in one go when they make up half of the buffer.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = bytearray()
+        self._start = 0
+
+    def __len__(self) -> int:
+        return len(self._data) - self._start
+
+    def append(self, data: ByteData) -> int:
+        """
+        Appends as many bytes as there is room for
+
+        Returns:
+            the number of bytes appended
+        """
+        accepted = min(len(data), self.capacity - len(self))
+        self._data += memoryview(data)[:accepted]
+        return accepted
+
+    def take(self, size: int) -> bytes:
+        """
+        Removes and returns (at most) size bytes from the front of the buffer
+        """
+        taken = bytes(self._data[self._start:self._start + size])
+        self._start += len(taken)
+        if self._start == len(self._data):
+            self._data.clear()
+            self._start = 0
+        elif self._start > len(self._data) // 2:
+            del self._data[:self._start]
+            self._start = 0
+        return taken
+
+    def find(self, separator: bytes) -> int:
+        """
+        Returns:
+            the position of the separator relative to the front of the buffer, -1 if it is not in the buffer
+        """
+        index = self._data.find(separator, self._start)
+        return index - self._start if index >= 0 else -1
+
+
+class UartStream:
+    """
+    A stream of bytes to and from the micro:bit over the UART service, with an interface like a file or an asyncio
+    StreamReader and StreamWriter. Use it when you want to exchange lines, messages or a continuous stream of data
+    instead of separate notifications:
+
+    - received bytes are collected in a buffer, from which you read when it suits you: as many bytes as you want,
+      a line, or up to a separator of your choice
+    - text is decoded incrementally, so a character that arrives split over two notifications is decoded correctly
+    - writes are split in chunks and pipelined, write blocks when too many writes are in flight, flush waits until
+      everything is written
+
+    The micro:bit can not be asked to slow down: when the buffer is full, received bytes are dropped and counted in
+    `dropped`.
+
+    Example:
+    ```python
+    with KaspersMicrobit.find_one_microbit() as microbit:
+        stream = microbit.uart.stream()
+        stream.write_string("status\\n")
+        for line in stream:
+            print(line)
+    ```
+    """
+
+    def __init__(self, device: BluetoothDevice, buffer_size: int = 64 * 1024, chunk_size: int = PDU_BYTE_LIMIT,
+                 encoding: str = 'utf-8', without_response: bool = False):
+        """
+        Args:
+            device (BluetoothDevice): the device of the micro:bit
+            buffer_size (int): the maximum number of received bytes that are kept until they are read
+            chunk_size (int): the maximum number of bytes sent in one write
+            encoding (str): the encoding of the strings that are read and written
+            without_response (bool): do not let the micro:bit confirm the writes, see `UartService.send`
+        """
+        self._device = device
+        self._chunk_size = chunk_size
+        self._encoding = encoding
+        self._without_response = without_response
+        self._ring = ByteRing(buffer_size)
+        self._condition = Condition()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._writes: Deque[concurrent.futures.Future] = deque()
+        self._closed = False
+        self.dropped = 0
+        """The number of received bytes that were dropped because the buffer was full"""
+
+    def open(self) -> 'UartStream':
+        """
+        Starts receiving the bytes sent by the micro:bit
+        """
+        self._device.notify(Service.UART, Characteristic.TX_CHARACTERISTIC, lambda sender, data: self._received(data),
+                            dispatch=Dispatch.inline())
+        return self
+
+    def __enter__(self) -> 'UartStream':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the received lines, as strings without the line end, until the stream is closed
+        """
+        while True:
+            try:
+                yield self.readline_string().rstrip('\r\n')
+            except EOFError:
+                return
+
+    def read(self, size: int = -1, timeout: float = None) -> bytes:
+        """
+        Waits until bytes are received and returns them
+
+        Args:
+            size (int): the maximum number of bytes to return, -1 to return all received bytes
+            timeout (float): the maximum number of seconds to wait (optional)
+
+        Returns:
+            at least one, and at most size bytes
+
+        Raises:
+            TimeoutError: when nothing was received within the timeout
+            EOFError: when the stream is closed
+        """
+        with self._condition:
+            self._wait_until(lambda: len(self._ring) > 0, timeout)
+            return self._ring.take(len(self._ring) if size < 0 else size)
+
+    def readexactly(self, size: int, timeout: float = None) -> bytes:
+        """
+        Waits until size bytes are received and returns them
+
+        Raises:
+            TimeoutError: when size bytes were not received within the timeout
+            EOFError: when the stream is closed
+        """
+        with self._condition:
+            self._wait_until(lambda: len(self._ring) >= size, timeout)
+            return self._ring.take(size)
+
+    def readuntil(self, separator: bytes = b'\n', timeout: float = None) -> bytes:
+        """
+        Waits until the separator is received, and returns all bytes up to and including the separator
+
+        Raises:
+            TimeoutError: when the separator was not received within the timeout
+            EOFError: when the stream is closed
+            ValueError: when the buffer is full and does not contain the separator
+        """
+        with self._condition:
+            def separator_found():
+                if self._ring.find(separator) >= 0:
+                    return True
+                if len(self._ring) >= self._ring.capacity:
+                    raise ValueError(f'No separator {separator!r} found in {self._ring.capacity} bytes')
+                return False
+
+            self._wait_until(separator_found, timeout)
+            return self._ring.take(self._ring.find(separator) + len(separator))
+
+    def readline(self, timeout: float = None) -> bytes:
+        """
+        Waits until a line is received, and returns it including the line end b'\\n'. See `readuntil`
+        """
+        return self.readuntil(b'\n', timeout)
+
+    def read_string(self, timeout: float = None) -> str:
+        """
+        Waits until text is received and returns all received text. Bytes of a character that is not complete yet
+        are kept until the rest of the character is received.
+
+        Raises:
+            TimeoutError: when nothing was received within the timeout
+            EOFError: when the stream is closed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            text = self._decoder.decode(self.read(timeout=_remaining(deadline)))
+            if text:
+                return text
+
+    def readline_string(self, timeout: float = None) -> str:
+        """
+        Waits until a line is received, and returns it as a string including the line end. See `readuntil`
+        """
+        return self._decoder.decode(self.readline(timeout))
+
+    def write(self, data: ByteData) -> None:
+        """
+        Starts sending bytes to the micro:bit, and returns without waiting until they are sent, unless too many
+        writes are in flight. Use flush to wait until everything is sent.
+
+        Raises:
+            Exception: the error of an earlier write that failed
+        """
+        self._check_writes()
+        for i in range(0, len(data), self._chunk_size):
+            self._writes.append(self._device.write_nowait(
+                Service.UART, Characteristic.RX_CHARACTERISTIC, data[i:i + self._chunk_size], self._without_response))
+
+    def write_string(self, string: str) -> None:
+        """
+        Starts sending a string to the micro:bit, see `write`
+        """
+        self.write(string.encode(self._encoding))
+
+    def flush(self, timeout: float = None) -> None:
+        """
+        Waits until everything that was written is sent
+
+        Raises:
+            Exception: the error of a write that failed
+        """
+        writes, self._writes = self._writes, deque()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for write in writes:
+            write.result(_remaining(deadline))
+
+    def close(self) -> None:
+        """
+        Sends what was written, and stops receiving. Readers that are waiting get an EOFError.
+        """
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+
+    def _received(self, data: bytearray) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self.dropped += len(data) - self._ring.append(data)
+            self._condition.notify_all()
+
+    def _wait_until(self, predicate, timeout: Optional[float]) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            if self._closed:
+                raise EOFError('The UART stream is closed')
+            if not self._condition.wait(_remaining(deadline)) and deadline is not None and not predicate():
+                raise TimeoutError(f'Nothing received from the micro:bit within {timeout} seconds')
+
+    def _check_writes(self) -> None:
+        while self._writes and self._writes[0].done():
+            self._writes.popleft().result()
+
+
+class AsyncUartStream:
+    """
+    The asyncio counterpart of `UartStream`, with the methods of an asyncio StreamReader (read, readexactly,
+    readuntil, readline) and StreamWriter (write, drain, close).
+
+    Example:
+    ```python
+    async with AsyncKaspersMicrobit(address) as microbit:
+        stream = await microbit.uart.stream()
+        stream.write(b"status\\n")
+        await stream.drain()
+        print(await stream.readline())
+    ```
+    """
+
+    def __init__(self, device: AsyncBluetoothDevice, buffer_size: int = 64 * 1024, chunk_size: int = PDU_BYTE_LIMIT,
+                 encoding: str = 'utf-8', without_response: bool = False):
+        """
+        See `UartStream`
+        """
+        self._device = device
+        self._chunk_size = chunk_size
+        self._encoding = encoding
+        self._without_response = without_response
+        self._ring = ByteRing(buffer_size)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self._data_received: Optional[asyncio.Event] = None
+        self._pending = bytearray()
+        self._sender: Optional[asyncio.Task] = None
+        self._closed = False
+        self.dropped = 0
+        """The number of received bytes that were dropped because the buffer was full"""
+
+    async def open(self) -> 'AsyncUartStream':
+        """
+        Starts receiving the bytes sent by the micro:bit
+        """
+        self._data_received = asyncio.Event()
+        await self._device.notify(Service.UART, Characteristic.TX_CHARACTERISTIC,
+                                  lambda sender, data: self._received(data))
+        return self
+
+    async def read(self, n: int = -1) -> bytes:
+        """
+        See `UartStream.read`
+        """
+        await self._wait_until(lambda: len(self._ring) > 0)
+        return self._ring.take(len(self._ring) if n < 0 else n)
+
+    async def readexactly(self, n: int) -> bytes:
+        """
+        See `UartStream.readexactly`
+        """
+        await self._wait_until(lambda: len(self._ring) >= n)
+        return self._ring.take(n)
+
+    async def readuntil(self, separator: bytes = b'\n') -> bytes:
+        """
+        See `UartStream.readuntil`
+        """
+        def separator_found():
+            if self._ring.find(separator) >= 0:
+                return True
+            if len(self._ring) >= self._ring.capacity:
+                raise ValueError(f'No separator {separator!r} found in {self._ring.capacity} bytes')
+            return False
+
+        await self._wait_until(separator_found)
+        return self._ring.take(self._ring.find(separator) + len(separator))
+
+    async def readline(self) -> bytes:
+        """
+        See `UartStream.readline`
+        """
+        return await self.readuntil(b'\n')
+
+    async def read_string(self) -> str:
+        """
+        See `UartStream.read_string`
+        """
+        while True:
+            text = self._decoder.decode(await self.read())
+            if text:
+                return text
+
+    async def readline_string(self) -> str:
+        """
+        See `UartStream.readline_string`
+        """
+        return self._decoder.decode(await self.readline())
+
+    def write(self, data: ByteData) -> None:
+        """
+        Adds bytes to be sent to the micro:bit. Like with an asyncio StreamWriter, call drain to wait until they
+        are sent.
+        """
+        self._pending += data
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.ensure_future(self._send())
+
+    def write_string(self, string: str) -> None:
+        """
+        Adds a string to be sent to the micro:bit, see `write`
+        """
+        self.write(string.encode(self._encoding))
+
+    async def drain(self) -> None:
+        """
+        Waits until everything that was written is sent
+
+        Raises:
+            Exception: the error of a write that failed
+        """
+        while self._sender is not None:
+            sender = self._sender
+            await sender
+            if sender is self._sender:
+                self._sender = None
+
+    async def close(self) -> None:
+        """
+        Sends what was written, and stops receiving. Readers that are waiting get an EOFError.
+        """
+        try:
+            await self.drain()
+        finally:
+            self._closed = True
+            if self._data_received:
+                self._data_received.set()
+
+    async def _send(self) -> None:
+        # bytes written while the last writes are in flight are sent by this same sender, so drain waits for them
+        while self._pending:
+            writes: List[asyncio.Future] = []
+            while self._pending:
+                chunk = bytes(self._pending[:self._chunk_size])
+                del self._pending[:self._chunk_size]
+                writes.append(await self._device.write_nowait(
+                    Service.UART, Characteristic.RX_CHARACTERISTIC, chunk, self._without_response))
+            await asyncio.gather(*writes)
+
+    def _received(self, data: bytearray) -> None:
+        if self._closed:
+            return
+        self.dropped += len(data) - self._ring.append(data)
+        self._data_received.set()
+
+    async def _wait_until(self, predicate) -> None:
+        while not predicate():
+            if self._closed:
+                raise EOFError('The UART stream is closed')
+            self._data_received.clear()
+            await self._data_received.wait()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
@@ -0,0 +1,48 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Callable
+
+from .bluetoothprofile.characteristics import Characteristic
+from .bluetoothprofile.services import Service
+
+
+class GattOperation(Enum):
+    """The operations on a micro:bit that are reported to trace listeners, see `TraceEvent`"""
+    READ = 'read'
+    """A characteristic was read"""
+    WRITE = 'write'
+    """A characteristic was written"""
+    NOTIFY = 'notify'
+    """Notifications of a characteristic were enabled"""
+    NOTIFICATION = 'notification'
+    """A notification was received"""
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """
+    Describes one operation on a micro:bit, see `BluetoothDevice.add_trace_listener`
+
+    Attributes:
+        operation (GattOperation): what happened
+        address (str): the address of the micro:bit
+        service (Service): the service of the characteristic
+        characteristic (Characteristic): the characteristic
+        size (int): the number of bytes read, written or received
+        latency (float): how long the operation took in seconds, None for a received notification
+        error (Exception): the exception that made the operation fail, None when it succeeded
+    """
+    operation: GattOperation
+    address: str
+    service: Service
+    characteristic: Characteristic
+    size: int
+    latency: Optional[float] = None
+    error: Optional[Exception] = None
+
+
+TraceListener = Callable[[TraceEvent], None]
+"""A function that is called with a TraceEvent for every operation on a micro:bit"""
@@ -0,0 +1,91 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from kaspersmicrobit import AsyncKaspersMicrobit
+from kaspersmicrobit.bluetoothdevice import AsyncBluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.services.accelerometer import AccelerometerData
+from kaspersmicrobit.services.io_pin import Pin, PinValue
+from kaspersmicrobit.services.leddisplay import Image
+
+
+@pytest.fixture
+def device():
+    device = Mock(spec=AsyncBluetoothDevice)
+    device.read = AsyncMock()
+    device.write = AsyncMock()
+    device.notify = AsyncMock()
+    device.max_write_size.return_value = 20
+    return device
+
+
+def test_async_accelerometer_read_uses_the_same_codec(device):
+    device.read.return_value = bytearray.fromhex("e8 03 18 fc 00 00")
+
+    data = asyncio.run(AsyncKaspersMicrobit(device).accelerometer.read())
+
+    device.read.assert_awaited_with(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    assert data == AccelerometerData(1000, -1000, 0)
+
+
+def test_async_accelerometer_notify_decodes_data(device):
+    received = []
+
+    asyncio.run(AsyncKaspersMicrobit(device).accelerometer.notify(received.append))
+    service, characteristic, callback = device.notify.call_args.args
+    callback(None, bytearray.fromhex("01 00 02 00 03 00"))
+
+    assert (service, characteristic) == (Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    assert received == [AccelerometerData(1, 2, 3)]
+
+
+def test_async_temperature_read(device):
+    device.read.return_value = bytearray.fromhex("ff")
+
+    assert asyncio.run(AsyncKaspersMicrobit(device).temperature.read()) == -1
+
+
+def test_async_led_show(device):
+    asyncio.run(AsyncKaspersMicrobit(device).led.show(Image.HEART))
+
+    device.write.assert_awaited_with(Service.LED, Characteristic.LED_MATRIX_STATE, Image.HEART.to_bytes())
+
+
+def test_async_led_show_text_too_long(device):
+    with pytest.raises(ValueError):
+        asyncio.run(AsyncKaspersMicrobit(device).led.show_text('this text is way too long'))
+
+
+def test_async_uart_send_pipelines_chunks(device):
+    async def write_nowait(*args):
+        return asyncio.ensure_future(device.write(*args))
+
+    device.write_nowait = AsyncMock(side_effect=write_nowait)
+
+    asyncio.run(AsyncKaspersMicrobit(device).uart.send(bytes(range(45))))
+
+    assert [c.args[2] for c in device.write.await_args_list] == [bytes(range(20)), bytes(range(20, 40)),
+                                                                 bytes(range(40, 45))]
+
+
+def test_async_io_pin_on_pin_change(device):
+    microbit = AsyncKaspersMicrobit(device)
+    changes = []
+
+    async def subscribe():
+        await microbit.io_pin.on_pin_change(Pin.P3, changes.append)
+        await microbit.io_pin.on_pin_change(Pin.P4, changes.append)
+
+    asyncio.run(subscribe())
+    device.notify.assert_awaited_once()
+    callback = device.notify.call_args.args[2]
+    callback(None, bytearray.fromhex("03 01 04 00"))
+    callback(None, bytearray.fromhex("03 01 04 01"))
+
+    assert changes == [PinValue(Pin.P3, 1), PinValue(Pin.P4, 0), PinValue(Pin.P4, 1)]
@@ -0,0 +1,180 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import threading
+from array import array
+from unittest.mock import Mock, patch
+
+import pytest
+
+from kaspersmicrobit.batch import NotificationBatcher, NotificationBatch
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.dispatch import Dispatch
+from kaspersmicrobit.services.accelerometer import AccelerometerService
+from kaspersmicrobit.services.samplebatch import SampleBatch
+from tests.test_bluetoothdevice import setup_characteristic, invoke_callback
+
+
+@pytest.fixture
+def client():
+    with patch('bleak.BleakClient', autospec=True) as client:
+        client.return_value.address = 'AA:BB'
+        yield client.return_value
+
+
+def test_batch_is_delivered_when_full():
+    delivered = []
+
+    async def add_samples():
+        batcher = NotificationBatcher(lambda sender, batch: delivered.append(batch), max_batch=2, max_latency=10)
+        for i in range(5):
+            batcher.add('sender', bytearray([i]))
+
+    asyncio.run(add_samples())
+
+    assert [bytes(batch.data) for batch in delivered] == [b'\x00\x01', b'\x02\x03']
+    assert all(len(batch.timestamps) == 2 for batch in delivered)
+
+
+def test_batch_is_delivered_after_max_latency():
+    delivered = []
+
+    async def add_samples():
+        batcher = NotificationBatcher(lambda sender, batch: delivered.append((sender, batch)), max_batch=100,
+                                      max_latency=0.01)
+        batcher.add('sender', bytearray([1]))
+        batcher.add('sender', bytearray([2]))
+        await asyncio.sleep(0.05)
+
+    asyncio.run(add_samples())
+
+    assert len(delivered) == 1
+    sender, batch = delivered[0]
+    assert sender == 'sender'
+    assert bytes(batch.data) == b'\x01\x02'
+
+
+def test_zero_max_latency_delivers_every_notification_right_away():
+    delivered = []
+
+    async def add_samples():
+        batcher = NotificationBatcher(lambda sender, batch: delivered.append(batch), max_batch=100, max_latency=0)
+        batcher.add('sender', bytearray([1]))
+        assert [bytes(batch.data) for batch in delivered] == [b'\x01']
+        batcher.add('sender', bytearray([2]))
+
+    asyncio.run(add_samples())
+
+    assert [bytes(batch.data) for batch in delivered] == [b'\x01', b'\x02']
+
+
+def test_invalid_batch_settings():
+    with pytest.raises(ValueError):
+        NotificationBatcher(print, max_batch=10, max_latency=-0.001)
+    with pytest.raises(ValueError):
+        NotificationBatcher(print, max_batch=0)
+
+
+def test_close_delivers_the_partial_batch():
+    delivered = []
+
+    async def add_samples():
+        batcher = NotificationBatcher(lambda sender, batch: delivered.append(batch), max_batch=100)
+        batcher.add('sender', bytearray([1]))
+        batcher.close()
+        batcher.add('sender', bytearray([2]))
+        batcher.close()
+
+    asyncio.run(add_samples())
+
+    assert [bytes(batch.data) for batch in delivered] == [b'\x01']
+
+
+def test_the_partial_batch_is_delivered_on_disconnect(client):
+    setup_characteristic(client, Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    device = BluetoothDevice(client)
+    delivered = []
+    done = threading.Event()
+
+    def received(batch):
+        delivered.append(bytes(batch.data))
+        done.set()
+
+    device.notify_batch(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, received, max_batch=10,
+                        max_latency_ms=None, dispatch=Dispatch.worker())
+    sender, callback = client.start_notify.call_args.args
+    invoke_callback(device, callback, sender=sender, data=b'\x01\x02').result(1)
+    device.disconnect()
+
+    assert done.wait(1)
+    assert delivered == [b'\x01\x02']
+
+
+def test_the_partial_batch_is_delivered_when_subscribing_again(client):
+    setup_characteristic(client, Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    device = BluetoothDevice(client)
+    delivered = []
+
+    device.notify_batch(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                        lambda batch: delivered.append(bytes(batch.data)), max_batch=10, dispatch=Dispatch.inline())
+    sender, callback = client.start_notify.call_args.args
+    invoke_callback(device, callback, sender=sender, data=b'\x01\x02').result(1)
+    device.notify(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, print)
+
+    assert delivered == [b'\x01\x02']
+
+
+def test_notify_batch_rejects_a_negative_max_latency(client):
+    setup_characteristic(client, Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    device = BluetoothDevice(client)
+
+    with pytest.raises(ValueError):
+        device.notify_batch(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, print, max_latency_ms=-1)
+    client.start_notify.assert_not_called()
+
+
+def test_sample_batch_from_notification_batch():
+    batch = SampleBatch.from_notification_batch(NotificationBatch(
+        bytearray.fromhex("e8 03 18 fc 00 00 01 00 02 00 03 00"), array('d', [1.0, 2.0])))
+
+    assert len(batch) == 2
+    assert batch[0] == (1000, -1000, 0)
+    assert batch[-1] == (1, 2, 3)
+    assert list(batch) == [(1000, -1000, 0), (1, 2, 3)]
+    assert list(batch.timestamps) == [1.0, 2.0]
+
+
+def test_sample_batch_index_out_of_range():
+    batch = SampleBatch.from_notification_batch(NotificationBatch(bytearray(6), array('d', [1.0])))
+
+    with pytest.raises(IndexError):
+        batch[1]
+
+
+def test_sample_batch_as_numpy():
+    numpy = pytest.importorskip('numpy')
+    batch = SampleBatch.from_notification_batch(NotificationBatch(
+        bytearray.fromhex("e8 03 18 fc 00 00 01 00 02 00 03 00"), array('d', [1.0, 2.0])))
+
+    values, timestamps = batch.as_numpy()
+
+    assert values.shape == (2, 3)
+    assert values.dtype == numpy.int16
+    assert values.tolist() == [[1000, -1000, 0], [1, 2, 3]]
+    assert timestamps.tolist() == [1.0, 2.0]
+
+
+def test_accelerometer_notify_batch():
+    device = Mock(spec=BluetoothDevice)
+    received = []
+
+    AccelerometerService(device).notify_batch(received.append, max_batch=10, max_latency_ms=20)
+    service, characteristic, callback, max_batch, max_latency_ms = device.notify_batch.call_args.args
+    callback(NotificationBatch(bytearray.fromhex("01 00 02 00 03 00"), array('d', [1.0])))
+
+    assert (service, characteristic) == (Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    assert (max_batch, max_latency_ms) == (10, 20)
+    assert received[0][0] == (1, 2, 3)
@@ -3,7 +3,11 @@
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import asyncio
 import inspect
+import logging
 import re
+import threading
+import time
+import timeit
 from typing import List, Union, Callable, Awaitable
 from unittest.mock import patch
 from uuid import UUID
@@ -13,7 +17,9 @@ import pytest
 from bleak.backends.descriptor import BleakGATTDescriptor
 from bleak.backends.service import BleakGATTService
 
-from kaspersmicrobit.bluetoothdevice import BluetoothDevice, ThreadEventLoop
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice, ThreadEventLoop, AsyncBluetoothDevice, ThreadEventLoopPool, \
+    LoopAssignment, GattOperation
+from kaspersmicrobit.dispatch import Dispatch, OverflowPolicy
 from kaspersmicrobit.errors import BluetoothCharacteristicNotFound, BluetoothServiceNotFound
 from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
 from kaspersmicrobit.bluetoothprofile.services import Service
@@ -133,6 +139,96 @@ def test_notify_if_call_on_device_in_callback_it_does_not_block(client):
     client.read_gatt_char.assert_called_with(characteristic)
 
 
+def test_notify_inline_calls_callback_on_the_event_loop_thread(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    callback_thread = None
+
+    def callback(sender, data):
+        nonlocal callback_thread
+        callback_thread = threading.current_thread()
+
+    device = BluetoothDevice(client)
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, callback, dispatch=Dispatch.inline())
+    characteristic, new_callback = client.start_notify.call_args.args
+
+    assert not inspect.iscoroutinefunction(new_callback)
+    invoke_callback(device, new_callback, sender=characteristic, data=b'the data').result(1)
+    assert callback_thread is not threading.current_thread()
+    assert callback_thread.name == device._loop.run_async(get_current_thread_name()).result(1)
+
+
+async def get_current_thread_name():
+    return threading.current_thread().name
+
+
+def test_notify_worker_calls_callback_in_order_on_a_dedicated_thread(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    received = []
+    all_received = threading.Event()
+
+    def callback(sender, data):
+        received.append((threading.current_thread().name, bytes(data)))
+        if len(received) == 3:
+            all_received.set()
+
+    device = BluetoothDevice(client)
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, callback, dispatch=Dispatch.worker(queue_size=10))
+    characteristic, new_callback = client.start_notify.call_args.args
+
+    for data in [b'1', b'2', b'3']:
+        invoke_callback(device, new_callback, sender=characteristic, data=data).result(1)
+
+    assert all_received.wait(1)
+    assert [data for _, data in received] == [b'1', b'2', b'3']
+    assert {name for name, _ in received} == {f'{client.address} {Characteristic.TEMPERATURE}'}
+
+    device.disconnect()
+    assert device._workers == []
+
+
+def test_notify_returns_subscription_with_dropped_notifications(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    blocked = threading.Event()
+
+    device = BluetoothDevice(client)
+    subscription = device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: blocked.wait(),
+                                 dispatch=Dispatch.worker(queue_size=1, overflow=OverflowPolicy.DROP_NEWEST))
+    characteristic, new_callback = client.start_notify.call_args.args
+
+    for data in [b'1', b'2', b'3', b'4']:
+        invoke_callback(device, new_callback, sender=characteristic, data=data).result(1)
+
+    assert subscription.received() == 4
+    assert subscription.dropped() >= 2
+    blocked.set()
+    device.disconnect()
+
+
+def test_notify_batch_delivers_batches_in_order(client):
+    setup_characteristic(client, Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA)
+    client.start_notify.return_value = None
+    received = []
+    all_received = threading.Event()
+
+    def callback(batch):
+        received.append(bytes(batch.data))
+        if len(received) == 2:
+            all_received.set()
+
+    device = BluetoothDevice(client)
+    device.notify_batch(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, callback, max_batch=2)
+    characteristic, new_callback = client.start_notify.call_args.args
+
+    for data in [b'1', b'2', b'3', b'4']:
+        invoke_callback(device, new_callback, sender=characteristic, data=data).result(1)
+
+    assert all_received.wait(1)
+    assert received == [b'12', b'34']
+
+
 def invoke_callback(
         device: BluetoothDevice,
         fn: Callable[[BleakGATTCharacteristic, bytearray], Union[None, Awaitable[None]]],
@@ -225,11 +321,308 @@ def test_is_service_available(client):
     assert not device.is_service_available(Service.ACCELEROMETER)
 
 
-def setup_characteristic(client, service, characteristic):
+def test_characteristics_are_cached_after_connect(client):
+    gatt_characteristic = setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    client.read_gatt_char.return_value = b'test device name'
+    device = BluetoothDevice(client)
+    device.connect()
+
+    with patch.object(BleakGATTServiceCollection, 'get_service') as get_service:
+        device.read(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+        device.read(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+
+    get_service.assert_not_called()
+    client.read_gatt_char.assert_called_with(gatt_characteristic)
+
+
+def test_characteristic_cache_is_invalidated_when_services_are_rediscovered(client):
+    setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    client.read_gatt_char.return_value = b'test device name'
+    device = BluetoothDevice(client)
+    device.connect()
+
+    new_gatt_characteristic = setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    device.read(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+
+    client.read_gatt_char.assert_called_with(new_gatt_characteristic)
+
+
+def test_characteristic_cache_is_cleared_on_disconnect(client):
+    setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    device = BluetoothDevice(client)
+    device.connect()
+
+    device.disconnect()
+
+    assert device._device._gatt_characteristics == {}
+
+
+def test_benchmark_cached_characteristic_lookup(client):
+    setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    device = AsyncBluetoothDevice(client)
+    device._cache_gatt_characteristics()
+    number = 20000
+
+    uncached = timeit.timeit(
+        lambda: device._lookup_gatt_attribute(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME), number=number)
+    cached = timeit.timeit(
+        lambda: device._find_gatt_attribute(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME), number=number)
+
+    logging.getLogger(__name__).info(
+        "characteristic lookup: uncached %.2f µs/call, cached %.2f µs/call",
+        uncached / number * 1e6, cached / number * 1e6)
+    with patch.object(device, '_lookup_gatt_attribute') as lookup:
+        device._find_gatt_attribute(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+    lookup.assert_not_called()
+
+
+def test_async_read(client):
+    client.read_gatt_char.return_value = b'test device name'
+    gatt_characteristic = setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+
+    read_result = asyncio.run(AsyncBluetoothDevice(client).read(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME))
+
+    client.read_gatt_char.assert_awaited_with(gatt_characteristic)
+    assert read_result == b'test device name'
+
+
+def test_async_write(client):
+    client.write_gatt_char.return_value = None
+    gatt_characteristic = setup_characteristic(client, Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME)
+
+    asyncio.run(
+        AsyncBluetoothDevice(client).write(Service.DEVICE_INFORMATION, Characteristic.DEVICE_NAME, b'device name'))
+
+    client.write_gatt_char.assert_awaited_with(gatt_characteristic, b'device name')
+
+
+def test_async_notify_calls_callback_directly_on_the_event_loop(client):
+    gatt_characteristic = setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+
+    received = []
+
+    def callback(sender, data):
+        received.append(data)
+
+    asyncio.run(AsyncBluetoothDevice(client).notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, callback))
+    characteristic, new_callback = client.start_notify.call_args.args
+    new_callback(characteristic, b'the data')
+
+    client.start_notify.assert_awaited()
+    assert characteristic == gatt_characteristic
+    assert received == [b'the data']
+
+
+def test_notification_listeners_see_every_notification(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    heard = []
+
+    def listener(service, characteristic, data):
+        heard.append((service, characteristic, data))
+
+    device = BluetoothDevice(client)
+    device.add_notification_listener(listener)
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: None)
+    characteristic, new_callback = client.start_notify.call_args.args
+
+    invoke_callback(device, new_callback, sender=characteristic, data=b'1').result(1)
+    device.remove_notification_listener(listener)
+    invoke_callback(device, new_callback, sender=characteristic, data=b'2').result(1)
+
+    assert heard == [(Service.TEMPERATURE, Characteristic.TEMPERATURE, b'1')]
+
+
+def test_async_wait_for_completes_with_first_notification_and_unsubscribes(client):
+    gatt_characteristic = setup_characteristic(client, Service.MAGNETOMETER, Characteristic.MAGNETOMETER_CALIBRATION)
+    client.start_notify.return_value = None
+    client.stop_notify.return_value = None
+
+    async def wait_for():
+        future = await AsyncBluetoothDevice(client).wait_for(Service.MAGNETOMETER, Characteristic.MAGNETOMETER_CALIBRATION)
+        characteristic, callback = client.start_notify.call_args.args
+        assert not future.done()
+        callback(characteristic, b'the data you were waiting for')
+        callback(characteristic, b'ignored')
+        return await future
+
+    assert asyncio.run(wait_for()) == b'the data you were waiting for'
+    client.stop_notify.assert_awaited_with(gatt_characteristic)
+
+
+def setup_characteristic(client, service, characteristic, properties=()):
     gatt_service = BleakGATTService(service, 1, service.value)
-    gatt_characteristic = BleakGATTCharacteristic(characteristic, 0, characteristic.value, [],  lambda: 0, gatt_service)
+    gatt_characteristic = BleakGATTCharacteristic(
+        characteristic, 0, characteristic.value, list(properties), lambda: 0, gatt_service)
     gatt_service.add_characteristic(gatt_characteristic)
     collection = BleakGATTServiceCollection()
     collection.add_service(gatt_service)
     client.services = collection
     return gatt_characteristic
+
+
+def test_thread_event_loop_pool_round_robin():
+    pool = ThreadEventLoopPool(size=2, lag_interval=None)
+
+    first, second, third = (pool.for_device(address) for address in ['a', 'b', 'c'])
+
+    assert first is pool.loops[0]
+    assert second is pool.loops[1]
+    assert third is pool.loops[0]
+    assert pool.for_device('b') is second
+    assert pool.devices() == {'a': 'kaspersmicrobit-loop-0', 'b': 'kaspersmicrobit-loop-1', 'c': 'kaspersmicrobit-loop-0'}
+
+
+def test_thread_event_loop_pool_address_hash_is_stable():
+    addresses = [f'E1:2A:3B:4C:5D:{i:02X}' for i in range(20)]
+
+    first = ThreadEventLoopPool(size=3, assignment=LoopAssignment.ADDRESS_HASH, lag_interval=None)
+    second = ThreadEventLoopPool(size=3, assignment=LoopAssignment.ADDRESS_HASH, lag_interval=None)
+
+    assert first.devices() == {}
+    assert [first.loops.index(first.for_device(a)) for a in addresses] == \
+        [second.loops.index(second.for_device(a)) for a in addresses]
+    assert len({first.loops.index(first.for_device(a)) for a in addresses}) == 3
+
+
+def test_bluetooth_device_runs_on_the_loop_of_its_address(client):
+    client.address = 'AA:BB'
+    pool = ThreadEventLoopPool(size=2, lag_interval=None)
+    pool.for_device('other')
+
+    device = BluetoothDevice(client, pool)
+
+    assert device._loop is pool.loops[1]
+
+
+def test_thread_event_loop_measures_lag():
+    loop = ThreadEventLoop(lag_interval=0.01)
+    time.sleep(0.05)
+
+    def block():
+        time.sleep(0.1)
+
+    loop.loop.call_soon_threadsafe(block)
+    time.sleep(0.2)
+
+    lag = loop.lag()
+    assert lag.samples >= 2
+    assert lag.max >= 0.05
+    assert ThreadEventLoop().lag() is None
+
+
+def test_trace_listener_receives_structured_events(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.address = 'AA:BB'
+    client.read_gatt_char.return_value = bytearray(b'\x15')
+    client.write_gatt_char.side_effect = [None, OSError('disconnected')]
+    client.start_notify.return_value = None
+    events = []
+    device = BluetoothDevice(client)
+
+    device.add_trace_listener(events.append)
+    device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    device.write(Service.TEMPERATURE, Characteristic.TEMPERATURE, b'\x01\x02')
+    with pytest.raises(OSError):
+        device.write(Service.TEMPERATURE, Characteristic.TEMPERATURE, b'\x01\x02')
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: None)
+    sender, callback = client.start_notify.call_args.args
+    invoke_callback(device, callback, sender=sender, data=b'\x16').result(1)
+    device.remove_trace_listener(events.append)
+    device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+
+    assert [(e.operation, e.address, e.characteristic, e.size) for e in events] == [
+        (GattOperation.READ, 'AA:BB', Characteristic.TEMPERATURE, 1),
+        (GattOperation.WRITE, 'AA:BB', Characteristic.TEMPERATURE, 2),
+        (GattOperation.WRITE, 'AA:BB', Characteristic.TEMPERATURE, 2),
+        (GattOperation.NOTIFY, 'AA:BB', Characteristic.TEMPERATURE, 0),
+        (GattOperation.NOTIFICATION, 'AA:BB', Characteristic.TEMPERATURE, 1),
+    ]
+    assert all(e.latency >= 0 for e in events[:4])
+    assert events[4].latency is None
+    assert isinstance(events[2].error, OSError)
+
+
+def test_reads_and_writes_are_not_logged_at_info_level(client, caplog):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.read_gatt_char.return_value = bytearray(b'\x15')
+    device = BluetoothDevice(client)
+
+    with caplog.at_level(logging.INFO, logger='kaspersmicrobit.bluetoothdevice'):
+        device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+        device.write(Service.TEMPERATURE, Characteristic.TEMPERATURE, b'\x01')
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger='kaspersmicrobit.bluetoothdevice'):
+        device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    assert 'data=' in caplog.records[-1].getMessage()
+
+
+def test_write_without_response_when_the_characteristic_supports_it(client):
+    gatt_characteristic = setup_characteristic(client, Service.UART, Characteristic.RX_CHARACTERISTIC,
+                                               ['write', 'write-without-response'])
+    device = BluetoothDevice(client)
+
+    device.write(Service.UART, Characteristic.RX_CHARACTERISTIC, b'abc', without_response=True)
+    client.write_gatt_char.assert_awaited_with(gatt_characteristic, b'abc', response=False)
+
+    gatt_characteristic = setup_characteristic(client, Service.LED, Characteristic.LED_TEXT, ['write'])
+    device.write(Service.LED, Characteristic.LED_TEXT, b'abc', without_response=True)
+    client.write_gatt_char.assert_awaited_with(gatt_characteristic, b'abc')
+
+
+def test_write_nowait_keeps_a_limited_number_of_writes_in_flight(client):
+    setup_characteristic(client, Service.UART, Characteristic.RX_CHARACTERISTIC)
+    in_flight = 0
+    most_in_flight = 0
+    written = []
+
+    async def write_gatt_char(gatt_characteristic, data):
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        written.append(data)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+
+    client.write_gatt_char.side_effect = write_gatt_char
+    device = BluetoothDevice(client, max_writes_in_flight=3)
+
+    futures = [device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC, bytes([i])) for i in range(10)]
+    for future in futures:
+        future.result(1)
+
+    assert written == [bytes([i]) for i in range(10)]
+    assert most_in_flight == 3
+
+
+def test_a_cancelled_write_nowait_future_is_left_alone(client, caplog):
+    setup_characteristic(client, Service.UART, Characteristic.RX_CHARACTERISTIC)
+    written = []
+
+    async def write_gatt_char(gatt_characteristic, data):
+        await asyncio.sleep(0.05)
+        written.append(data)
+
+    client.write_gatt_char.side_effect = write_gatt_char
+    device = BluetoothDevice(client)
+
+    cancelled = device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC, b'abc')
+    assert cancelled.cancel()
+    device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC, b'def').result(1)
+
+    assert cancelled.cancelled()
+    assert written == [b'abc', b'def']
+    assert 'InvalidStateError' not in caplog.text
+
+
+def test_write_nowait_future_fails_when_the_write_fails(client):
+    setup_characteristic(client, Service.UART, Characteristic.RX_CHARACTERISTIC)
+    client.write_gatt_char.side_effect = OSError('disconnected')
+    device = BluetoothDevice(client)
+
+    future = device.write_nowait(Service.UART, Characteristic.RX_CHARACTERISTIC, b'abc')
+
+    with pytest.raises(OSError):
+        future.result(1)
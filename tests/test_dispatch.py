@@ -0,0 +1,202 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from kaspersmicrobit.dispatch import NotificationWorker, Dispatch, DispatchMode, NotificationBuffer, OverflowPolicy, \
+    ExecutorDrain, Subscription
+
+
+def test_default_dispatch_is_executor():
+    assert Dispatch().mode == DispatchMode.EXECUTOR
+    assert not Dispatch().is_buffered()
+
+
+def test_latest_is_buffered():
+    assert Dispatch.latest().is_buffered()
+
+
+def test_only_an_unbuffered_executor_is_unordered():
+    assert not Dispatch().is_ordered()
+    assert Dispatch.executor(queue_size=10).is_ordered()
+    assert Dispatch.latest().is_ordered()
+    assert Dispatch.inline().is_ordered()
+    assert Dispatch.worker().is_ordered()
+
+
+def fill(buffer: NotificationBuffer, items):
+    return [buffer.put(item) for item in items]
+
+
+def drain(buffer: NotificationBuffer):
+    result = []
+    item = buffer.poll()
+    while item is not None:
+        result.append(item)
+        item = buffer.poll()
+    return result
+
+
+def test_buffer_drop_newest():
+    buffer = NotificationBuffer(2, OverflowPolicy.DROP_NEWEST)
+
+    assert fill(buffer, [1, 2, 3, 4]) == [True, True, False, False]
+    assert drain(buffer) == [1, 2]
+    assert buffer.dropped == 2
+    assert buffer.received == 4
+
+
+def test_subscription_counts_drops_after_the_queue_drained():
+    buffer = NotificationBuffer(queue_size=1)
+    subscription = Subscription(None, None, buffer)
+    fill(buffer, ['a', 'b'])
+    assert buffer.poll() == 'a'
+
+    assert subscription.pending() == 0
+    assert subscription.dropped() == 1
+    assert subscription.received() == 2
+
+
+def test_buffer_drop_oldest():
+    buffer = NotificationBuffer(2, OverflowPolicy.DROP_OLDEST)
+
+    fill(buffer, [1, 2, 3, 4])
+
+    assert drain(buffer) == [3, 4]
+    assert buffer.dropped == 2
+
+
+def test_buffer_latest_keeps_only_one_item_whatever_the_queue_size():
+    buffer = NotificationBuffer(10, OverflowPolicy.LATEST)
+
+    fill(buffer, [1, 2, 3, 4])
+
+    assert drain(buffer) == [4]
+    assert buffer.dropped == 3
+
+
+def test_buffer_unbounded():
+    buffer = NotificationBuffer()
+
+    fill(buffer, range(1000))
+
+    assert len(buffer) == 1000
+    assert buffer.dropped == 0
+
+
+def test_buffer_block_waits_until_there_is_room():
+    buffer = NotificationBuffer(1, OverflowPolicy.BLOCK)
+    buffer.put(1)
+    producer = threading.Thread(target=buffer.put, args=(2,))
+    producer.start()
+
+    producer.join(0.1)
+    assert producer.is_alive()
+
+    assert buffer.get() == 1
+    producer.join(1)
+    assert not producer.is_alive()
+    assert buffer.get() == 2
+    assert buffer.dropped == 0
+
+
+def test_closed_buffer_returns_remaining_items_then_none():
+    buffer = NotificationBuffer()
+    fill(buffer, [1, 2])
+
+    buffer.close()
+
+    assert buffer.get() == 1
+    assert buffer.get() == 2
+    assert buffer.get() is None
+
+
+def test_worker_drops_notifications_when_queue_is_full():
+    blocked = threading.Event()
+    received = []
+
+    def callback(data):
+        blocked.wait()
+        received.append(data)
+
+    worker = NotificationWorker(callback, NotificationBuffer(2, OverflowPolicy.DROP_NEWEST))
+    accepted = [worker.submit(i) for i in range(5)]
+    blocked.set()
+    worker.stop()
+    worker.join(1)
+
+    assert accepted.count(False) >= 2
+    assert received == [i for i, ok in enumerate(accepted) if ok]
+
+
+def test_worker_keeps_running_after_exception_in_callback():
+    received = []
+
+    def callback(data):
+        if data == 1:
+            raise ValueError('oops')
+        received.append(data)
+
+    worker = NotificationWorker(callback, NotificationBuffer())
+    for i in range(3):
+        worker.submit(i)
+    worker.stop()
+    worker.join(1)
+
+    assert received == [0, 2]
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor() as executor:
+        yield executor
+
+
+def test_executor_drain_calls_callback_in_order_one_at_a_time(executor):
+    received = []
+    running = 0
+    max_running = 0
+    done = threading.Event()
+
+    def callback(data):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        received.append(data)
+        running -= 1
+        if data == 99:
+            done.set()
+
+    drain = ExecutorDrain(callback, NotificationBuffer(), executor)
+    for i in range(100):
+        drain.submit(i)
+
+    assert done.wait(1)
+    assert received == list(range(100))
+    assert max_running == 1
+
+
+def test_executor_drain_with_latest_skips_stale_notifications(executor):
+    blocked = threading.Event()
+    received = []
+    done = threading.Event()
+
+    def callback(data):
+        blocked.wait()
+        received.append(data)
+        if data == 9:
+            done.set()
+
+    buffer = NotificationBuffer(overflow=OverflowPolicy.LATEST)
+    drain = ExecutorDrain(callback, buffer, executor)
+    for i in range(10):
+        drain.submit(i)
+    blocked.set()
+
+    assert done.wait(1)
+    assert received[-1] == 9
+    assert len(received) <= 2
+    assert buffer.dropped == 10 - len(received)
@@ -1,10 +1,17 @@
 #  This Source Code Form is subject to the terms of the Mozilla Public
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import random
+import time
+
+import pytest
 
 from kaspersmicrobit.services.event import Event
 import kaspersmicrobit.services.v1_events as v1_events
 
+logger = logging.getLogger(__name__)
+
 
 class TestEvent:
     def test_to_bytes(self):
@@ -28,3 +35,58 @@ class TestEvent:
             Event(v1_events.DEVICE_ID_DISPLAY, v1_events.EVENT_DISPLAY_ANIMATION_COMPLETE)
         ]
         assert Event.list_from_bytes(bytearray.fromhex("0d 00 08 00 07 00 01 00")) == events
+
+
+def test_list_roundtrip_with_random_events():
+    generator = random.Random(2024)
+    for size in (0, 1, 2, 17, 1000):
+        events = [Event(generator.randrange(1 << 16), generator.randrange(1 << 16)) for _ in range(size)]
+
+        encoded = Event.list_to_bytes(events)
+
+        assert len(encoded) == 4 * size
+        assert encoded == b''.join(event.to_bytes() for event in events)
+        assert Event.list_from_bytes(encoded) == events
+        assert Event.list_from_bytes(bytearray(encoded)) == events
+
+
+def test_list_from_bytes_ignores_an_incomplete_event():
+    assert Event.list_from_bytes(bytearray.fromhex("0d 00 08 00 07 00")) == [Event(13, 8)]
+
+
+def concatenating_list_to_bytes(events):
+    """the encoder before it used a preallocated buffer"""
+    result = bytes()
+    for event in events:
+        result += event.device_id.to_bytes(2, "little") + event.event_value.to_bytes(2, "little")
+    return result
+
+
+def test_benchmark_event_list_codecs():
+    generator = random.Random(7)
+    for size in (100, 1000, 10000):
+        events = [Event(generator.randrange(1 << 16), generator.randrange(1 << 16)) for _ in range(size)]
+
+        start = time.perf_counter()
+        concatenated = concatenating_list_to_bytes(events)
+        concatenating = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encoded = Event.list_to_bytes(events)
+        encoding = time.perf_counter() - start
+
+        start = time.perf_counter()
+        decoded = Event.list_from_bytes(encoded)
+        decoding = time.perf_counter() - start
+
+        assert encoded == concatenated
+        assert decoded == events
+        logger.info("%5d events: concatenating %.2f ms, list_to_bytes %.2f ms, list_from_bytes %.2f ms",
+                    size, concatenating * 1000, encoding * 1000, decoding * 1000)
+
+
+def test_values_that_do_not_fit_raise_overflow_error():
+    with pytest.raises(OverflowError):
+        Event(1 << 16, 1).to_bytes()
+    with pytest.raises(OverflowError):
+        Event.list_to_bytes([Event(1, 2), Event(1, -1)])
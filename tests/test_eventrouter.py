@@ -0,0 +1,115 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+from unittest.mock import Mock, AsyncMock
+
+import kaspersmicrobit.services.v2_events as v2_events
+from kaspersmicrobit.services.event import Event
+from kaspersmicrobit.services.eventrouter import EventRouter, AsyncEventRouter, ANY_EVENT
+from kaspersmicrobit.services.events import EventService, AsyncEventService
+
+BUTTON_A_CLICK = Event(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK)
+BUTTON_A_DOWN = Event(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_DOWN)
+SHAKE = Event(v2_events.DEVICE_ID_GESTURE, v2_events.EVENT_GESTURE_SHAKE)
+
+
+def route_events(events, *received):
+    callback = events.notify_microbit_event.call_args.args[0]
+    for event in received:
+        callback(event)
+
+
+def test_handlers_are_called_per_device_id_and_event_value():
+    events = Mock(spec=EventService)
+    router = EventRouter(events)
+    clicks, gestures = [], []
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, clicks.append)
+    router.on(v2_events.DEVICE_ID_GESTURE, ANY_EVENT, gestures.append)
+    router.start()
+
+    route_events(events, BUTTON_A_DOWN, BUTTON_A_CLICK, SHAKE, Event(v2_events.DEVICE_ID_BUTTON_B, 1))
+
+    assert clicks == [BUTTON_A_CLICK]
+    assert gestures == [SHAKE]
+
+
+def test_any_event_handlers_are_called_after_specific_handlers():
+    router = EventRouter(Mock(spec=EventService))
+    calls = []
+    router.on(v2_events.DEVICE_ID_BUTTON_A, ANY_EVENT, lambda event: calls.append('any'))
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, lambda event: calls.append('click'))
+
+    router.route(BUTTON_A_CLICK)
+    router.route(BUTTON_A_DOWN)
+
+    assert calls == ['click', 'any', 'any']
+
+
+def test_exactly_the_handled_events_are_required():
+    events = Mock(spec=EventService)
+    router = EventRouter(events)
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, print)
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_DOWN, print)
+    router.on(v2_events.DEVICE_ID_GESTURE, v2_events.EVENT_GESTURE_SHAKE, print)
+    router.on(v2_events.DEVICE_ID_GESTURE, ANY_EVENT, print)
+    router.on(v2_events.DEVICE_ID_GESTURE, ANY_EVENT, print)
+
+    router.start()
+
+    events.write_client_requirements.assert_called_once_with(
+        BUTTON_A_DOWN, BUTTON_A_CLICK, Event(v2_events.DEVICE_ID_GESTURE, ANY_EVENT))
+
+
+def test_handlers_added_after_start_are_required_right_away():
+    events = Mock(spec=EventService)
+    router = EventRouter(events)
+    router.start()
+
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, print)
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, print)
+
+    assert events.write_client_requirements.call_args_list[-1].args == (BUTTON_A_CLICK,)
+    assert events.write_client_requirements.call_count == 2
+
+
+def test_a_failing_handler_does_not_stop_the_others():
+    router = EventRouter(Mock(spec=EventService))
+    calls = []
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, lambda event: 1 / 0)
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, calls.append)
+
+    router.route(BUTTON_A_CLICK)
+
+    assert calls == [BUTTON_A_CLICK]
+
+
+def test_off_removes_a_handler():
+    router = EventRouter(Mock(spec=EventService))
+    calls = []
+    router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, calls.append)
+    router.off(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, calls.append)
+
+    router.route(BUTTON_A_CLICK)
+
+    assert calls == []
+
+
+def test_async_router():
+    events = Mock(spec=AsyncEventService)
+    events.notify_microbit_event = AsyncMock()
+    events.write_client_requirements = AsyncMock()
+    clicks = []
+
+    async def route():
+        router = AsyncEventRouter(events)
+        await router.on(v2_events.DEVICE_ID_BUTTON_A, v2_events.EVENT_BUTTON_CLICK, clicks.append)
+        await router.start()
+        await router.on(v2_events.DEVICE_ID_GESTURE, ANY_EVENT, clicks.append)
+
+    asyncio.run(route())
+    route_events(events, BUTTON_A_CLICK, SHAKE)
+
+    assert clicks == [BUTTON_A_CLICK, SHAKE]
+    assert [call.args for call in events.write_client_requirements.await_args_list] == \
+        [(BUTTON_A_CLICK,), (Event(v2_events.DEVICE_ID_GESTURE, ANY_EVENT),)]
@@ -0,0 +1,96 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import threading
+from unittest.mock import AsyncMock, Mock
+
+from kaspersmicrobit import AsyncKaspersMicrobit
+from kaspersmicrobit.bluetoothdevice import AsyncBluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.dispatch import Dispatch
+from kaspersmicrobit.fleet import MicrobitFleet, AsyncMicrobitFleet
+from kaspersmicrobit.services.leddisplay import Image
+
+
+def microbit(address, connect=None):
+    device = Mock(spec=AsyncBluetoothDevice)
+    device.address.return_value = address
+    device.connect = connect if connect else AsyncMock()
+    device.disconnect = AsyncMock()
+    device.read = AsyncMock()
+    device.write = AsyncMock()
+    device.notify = AsyncMock()
+    return AsyncKaspersMicrobit(device)
+
+
+def test_connects_at_most_max_concurrent_connects_at_a_time():
+    connecting = 0
+    most_connecting = 0
+
+    async def connect():
+        nonlocal connecting, most_connecting
+        connecting += 1
+        most_connecting = max(most_connecting, connecting)
+        await asyncio.sleep(0.01)
+        connecting -= 1
+
+    fleet = AsyncMicrobitFleet([microbit(f'{i}', connect) for i in range(10)], max_concurrent_connects=3)
+    failures = asyncio.run(fleet.connect())
+
+    assert failures == {}
+    assert len(fleet.connected) == 10
+    assert most_connecting == 3
+
+
+def test_microbits_that_fail_to_connect_are_left_out():
+    error = OSError('not found')
+    fleet = MicrobitFleet([microbit('ok'), microbit('broken', AsyncMock(side_effect=error))])
+
+    assert fleet.connect() == {'broken': error}
+    assert [m.address() for m in fleet.connected] == ['ok']
+    fleet.disconnect()
+    assert fleet.connected == []
+
+
+def test_a_cancelled_connect_is_a_failure():
+    fleet = MicrobitFleet([microbit('ok'), microbit('cancelled', AsyncMock(side_effect=asyncio.CancelledError))])
+
+    failures = fleet.connect()
+    assert list(failures) == ['cancelled']
+    assert isinstance(failures['cancelled'], asyncio.CancelledError)
+    assert [m.address() for m in fleet.connected] == ['ok']
+    fleet.disconnect()
+
+
+def test_run_sends_a_command_to_all_microbits():
+    microbits = [microbit('a'), microbit('b')]
+
+    with MicrobitFleet(microbits) as fleet:
+        results = fleet.run(lambda m: m.led.show(Image.HEART))
+
+    assert results == {'a': None, 'b': None}
+    for m in microbits:
+        m._device.write.assert_awaited_once_with(
+            Service.LED, Characteristic.LED_MATRIX_STATE, Image.HEART.to_bytes())
+
+
+def test_notifications_are_merged_and_tagged_with_the_address():
+    microbits = [microbit('a'), microbit('b')]
+    received = []
+    done = threading.Event()
+
+    def callback(address, temperature):
+        received.append((address, temperature))
+        if len(received) == 2:
+            done.set()
+
+    with MicrobitFleet(microbits) as fleet:
+        fleet.notify(lambda m, cb: m.temperature.notify(cb), callback, dispatch=Dispatch.worker())
+        for m, temperature in zip(microbits, [b'\x15', b'\x16']):
+            notify_callback = m._device.notify.call_args.args[2]
+            notify_callback(None, temperature)
+        assert done.wait(1)
+
+    assert sorted(received) == [('a', 21), ('b', 22)]
@@ -2,8 +2,22 @@
 #  License, v. 2.0. If a copy of the MPL was not distributed with this
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import asyncio
+import random
+import threading
+import time
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
+from kaspersmicrobit.dispatch import Dispatch
 from kaspersmicrobit.services.io_pin import Pin, PinValue, PwmControlData, PinIO, PinAD, PinConfiguration, \
-    PinIOConfiguration, PinADConfiguration
+    PinIOConfiguration, PinADConfiguration, PinChangeDetector, IOPinService, PinOutputBuffer, AsyncPinOutputBuffer, \
+    PwmSequencer, AsyncPwmSequencer, AsyncIOPinService
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from tests.test_bluetoothdevice import setup_characteristic
 
 
 class TestPinValue:
@@ -38,6 +52,29 @@ class TestPinValue:
         value = PinValue.from_bytes(ad_config, bytearray.fromhex("10 01"))
         assert value == PinValue(Pin.P16, 1)
 
+    def test_list_roundtrip_with_random_values(self):
+        generator = random.Random(2024)
+        ad_config = PinADConfiguration(bits=generator.getrandbits(PinConfiguration.NUMBER_OF_PINS))
+        for size in (0, 1, 10, 500):
+            pins = [generator.choice(list(Pin)) for _ in range(size)]
+            values = [PinValue(pin, generator.randrange(1024) if ad_config[pin] == PinAD.ANALOG
+                               else generator.randrange(256)) for pin in pins]
+
+            encoded = PinValue.list_to_bytes(ad_config, values)
+
+            assert encoded == b''.join(value.to_bytes(ad_config) for value in values)
+            decoded = PinValue.list_from_bytes(ad_config, encoded)
+            assert decoded == [PinValue(v.pin, v.value & ~3 if ad_config[v.pin] == PinAD.ANALOG else v.value)
+                               for v in values]
+            assert decoded == [PinValue.from_bytes(ad_config, encoded[i:i + 2]) for i in range(0, len(encoded), 2)]
+
+    def test_list_from_bytes_ignores_a_pin_without_value(self):
+        assert PinValue.list_from_bytes(PinADConfiguration(), bytearray.fromhex("03 01 04")) == [PinValue(Pin.P3, 1)]
+
+    def test_values_that_do_not_fit_raise_overflow_error(self):
+        with pytest.raises(OverflowError):
+            PinValue.list_to_bytes(PinADConfiguration(), [PinValue(Pin.P0, 256)])
+
 
 class TestPinIOConfiguration:
     def test_default_is_all_output(self):
@@ -107,3 +144,386 @@ class TestPwmControlData:
     def test_from_bytes(self):
         value = PwmControlData.from_bytes(bytearray.fromhex("0E 0A 00 87 D6 12 00"))
         assert value == PwmControlData(Pin.P14, 10, 1234567)
+
+
+class TestPinConfigurationBits:
+    def test_bits_is_the_configuration_as_sent_to_the_microbit(self):
+        pins = PinIOConfiguration()
+        pins[Pin.P0] = PinIO.INPUT
+        pins[Pin.P20] = PinIO.INPUT
+        assert pins.bits == 1 | 1 << 18
+        assert PinIOConfiguration(bits=pins.bits).to_bytes() == pins.to_bytes()
+
+    def test_set_configures_several_pins_at_once(self):
+        pins = PinADConfiguration().set([Pin.P0, Pin.P5, Pin.P10, Pin.P15], PinAD.ANALOG)
+        assert pins.to_bytes() == bytearray.fromhex("21 84 00 00")
+
+        pins.set([Pin.P5, Pin.P10], PinAD.DIGITAL)
+        assert pins.pins(PinAD.ANALOG) == [Pin.P0, Pin.P15]
+        assert len(pins.pins(PinAD.DIGITAL)) == PinConfiguration.NUMBER_OF_PINS - 2
+
+    def test_list_and_slice_access_still_work(self):
+        expected = [PinIO.OUTPUT] * PinConfiguration.NUMBER_OF_PINS
+        expected[3] = PinIO.INPUT
+        pins = PinIOConfiguration(expected)
+
+        assert pins[:] == expected
+        assert pins[2:4] == [PinIO.OUTPUT, PinIO.INPUT]
+        assert pins[-1] == PinIO.OUTPUT
+        assert list(pins) == expected
+        assert len(pins) == PinConfiguration.NUMBER_OF_PINS
+
+        pins[0:2] = [PinIO.INPUT, PinIO.INPUT]
+        assert pins.pins(PinIO.INPUT) == [Pin.P0, Pin.P1, Pin.P3]
+
+    def test_unused_bits_are_ignored(self):
+        pins = PinIOConfiguration.from_bytes(bytearray.fromhex("00 00 F8 FF"))
+        assert pins.bits == 0
+        assert PinConfiguration.list_from_bytes(PinIO, bytearray.fromhex("01 00 00 00"))[0] == PinIO.INPUT
+
+    def test_copy_is_independent(self):
+        pins = PinADConfiguration().set([Pin.P1], PinAD.ANALOG)
+        copy = pins.copy()
+        pins[Pin.P1] = PinAD.DIGITAL
+        assert copy[Pin.P1] == PinAD.ANALOG
+
+
+class TestPinChangeDetector:
+    def test_only_changes_of_watched_pins_are_reported(self):
+        detector = PinChangeDetector(PinADConfiguration)
+        changes = []
+        detector.add(Pin.P1, changes.append)
+
+        detector.on_data(None, bytearray.fromhex("00 01 01 00"))
+        detector.on_data(None, bytearray.fromhex("00 00 01 00"))
+        detector.on_data(None, bytearray.fromhex("01 01 00 01"))
+
+        assert changes == [PinValue(Pin.P1, 0), PinValue(Pin.P1, 1)]
+
+    def test_analog_changes_within_the_threshold_are_ignored(self):
+        ad_config = PinADConfiguration().set([Pin.P2], PinAD.ANALOG)
+        detector = PinChangeDetector(lambda: ad_config)
+        changes = []
+        detector.add(Pin.P2, lambda pin_value: changes.append(pin_value.value), threshold=8)
+
+        for compressed in (0x10, 0x11, 0x12, 0x13, 0x0D):
+            detector.on_data(None, bytes([2, compressed]))
+
+        # 0x10 << 2 = 64, then 68 and 72 differ 8 or less from 64, 76 differs 12, 52 differs 24
+        assert changes == [64, 76, 52]
+
+    def test_every_callback_has_its_own_threshold(self):
+        ad_config = PinADConfiguration().set([Pin.P0], PinAD.ANALOG)
+        detector = PinChangeDetector(lambda: ad_config)
+        fine, coarse = [], []
+        detector.add(Pin.P0, lambda pin_value: fine.append(pin_value.value))
+        detector.add(Pin.P0, lambda pin_value: coarse.append(pin_value.value), threshold=50)
+
+        for compressed in (0x10, 0x11, 0x12, 0x20):
+            detector.on_data(None, bytes([0, compressed]))
+
+        assert fine == [64, 68, 72, 128]
+        assert coarse == [64, 128]
+
+
+def test_on_pin_change_shares_one_subscription():
+    device = Mock(spec=BluetoothDevice)
+    service = IOPinService(device)
+    p0, p1 = [], []
+
+    subscription = service.on_pin_change(Pin.P0, p0.append)
+    assert service.on_pin_change(Pin.P1, p1.append) is subscription
+
+    device.notify.assert_called_once()
+    callback = device.notify.call_args.args[2]
+    callback(None, bytearray.fromhex("00 01 01 01"))
+    callback(None, bytearray.fromhex("00 01 01 00"))
+
+    assert p0 == [PinValue(Pin.P0, 1)]
+    assert p1 == [PinValue(Pin.P1, 1), PinValue(Pin.P1, 0)]
+
+
+def test_on_pin_change_handles_notifications_in_order():
+    device = Mock(spec=BluetoothDevice)
+    service = IOPinService(device)
+
+    service.on_pin_change(Pin.P0, print)
+
+    dispatch = device.notify.call_args.kwargs['dispatch']
+    assert dispatch.is_ordered()
+    assert dispatch.queue_size is None
+
+
+def test_on_pin_change_rejects_an_unordered_dispatch():
+    device = Mock(spec=BluetoothDevice)
+    service = IOPinService(device)
+
+    with pytest.raises(ValueError):
+        service.on_pin_change(Pin.P0, print, dispatch=Dispatch.executor())
+    device.notify.assert_not_called()
+
+
+def test_on_pin_change_rejects_a_different_dispatch_on_later_calls():
+    device = Mock(spec=BluetoothDevice)
+    service = IOPinService(device)
+
+    service.on_pin_change(Pin.P0, print, dispatch=Dispatch.inline())
+    service.on_pin_change(Pin.P1, print)
+    service.on_pin_change(Pin.P2, print, dispatch=Dispatch.inline())
+    with pytest.raises(ValueError):
+        service.on_pin_change(Pin.P3, print, dispatch=Dispatch.worker())
+    device.notify.assert_called_once()
+
+
+def test_on_pin_change_and_notify_data_can_not_be_combined():
+    device = Mock(spec=BluetoothDevice)
+    service = IOPinService(device)
+    service.on_pin_change(Pin.P0, print)
+    with pytest.raises(ValueError):
+        service.notify_data(print)
+
+    service = IOPinService(device)
+    service.notify_data(print)
+    with pytest.raises(ValueError):
+        service.on_pin_change(Pin.P0, print)
+    assert device.notify.call_count == 2
+
+
+def test_async_on_pin_change_and_notify_data_can_not_be_combined():
+    async def combine():
+        device = AsyncMock(spec=AsyncBluetoothDevice)
+        service = AsyncIOPinService(device)
+        await service.on_pin_change(Pin.P0, print)
+        with pytest.raises(ValueError):
+            await service.notify_data(print)
+
+        service = AsyncIOPinService(device)
+        await service.notify_data(print)
+        with pytest.raises(ValueError):
+            await service.on_pin_change(Pin.P0, print)
+        assert device.notify.await_count == 2
+
+    asyncio.run(combine())
+
+
+class TestPinOutputBuffer:
+    def written(self, device):
+        return [call.args[2] for call in device.write.call_args_list]
+
+    def test_only_changed_pins_are_written(self):
+        device = Mock(spec=BluetoothDevice)
+        outputs = PinOutputBuffer(device, PinADConfiguration)
+
+        outputs[Pin.P0] = 1
+        outputs[Pin.P2] = 0
+        assert outputs.dirty() == [Pin.P0, Pin.P2]
+        assert outputs.flush() == 2
+
+        outputs[Pin.P0] = 1
+        outputs[Pin.P2] = 1
+        assert outputs.flush() == 1
+        assert outputs.flush() == 0
+
+        assert self.written(device) == [bytes.fromhex("00 01 02 00"), bytes.fromhex("02 01")]
+
+    def test_analog_values_that_encode_the_same_are_not_written(self):
+        device = Mock(spec=BluetoothDevice)
+        ad_config = PinADConfiguration().set([Pin.P1], PinAD.ANALOG)
+        outputs = PinOutputBuffer(device, lambda: ad_config)
+
+        outputs.update([PinValue(Pin.P1, 1020)])
+        outputs.flush()
+        outputs[Pin.P1] = 1023
+        outputs.flush()
+
+        assert self.written(device) == [bytes.fromhex("01 FF")]
+        assert outputs[Pin.P1] == 1023
+
+    def test_many_pins_are_split_over_several_writes(self):
+        device = Mock(spec=BluetoothDevice)
+        outputs = PinOutputBuffer(device, PinADConfiguration)
+
+        outputs.update(PinValue(pin, 1) for pin in Pin)
+
+        assert outputs.flush() == len(Pin)
+        assert [len(data) for data in self.written(device)] == [20, 18]
+
+    def test_values_out_of_range(self):
+        ad_config = PinADConfiguration().set([Pin.P1], PinAD.ANALOG)
+        outputs = PinOutputBuffer(Mock(spec=BluetoothDevice), lambda: ad_config)
+        with pytest.raises(ValueError):
+            outputs[Pin.P0] = 256
+        with pytest.raises(ValueError):
+            outputs[Pin.P1] = 1024
+        outputs[Pin.P1] = 1023
+
+    def test_a_digital_value_above_255_is_not_truncated(self):
+        device = Mock(spec=BluetoothDevice)
+        ad_config = PinADConfiguration().set([Pin.P0], PinAD.ANALOG)
+        outputs = PinOutputBuffer(device, lambda: ad_config)
+        outputs[Pin.P0] = 256
+        ad_config[Pin.P0] = PinAD.DIGITAL
+
+        with pytest.raises(ValueError):
+            outputs.flush()
+        device.write.assert_not_called()
+        assert outputs.dirty() == [Pin.P0]
+
+    def test_concurrent_flushes_send_every_pin_once(self):
+        device = Mock(spec=BluetoothDevice)
+        outputs = PinOutputBuffer(device, PinADConfiguration)
+        flushed = []
+
+        def flush():
+            for _ in range(200):
+                outputs.update(PinValue(pin, random.randint(0, 255)) for pin in Pin)
+                flushed.append(outputs.flush())
+
+        threads = [threading.Thread(target=flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        written = self.written(device)
+        assert sum(len(data) // 2 for data in written) == sum(flushed)
+        # the pins of a flush are encoded in order, a flush overwriting another one would mix them up
+        assert all(list(data[0::2]) == sorted(set(data[0::2])) for data in written)
+
+    def test_flushes_at_a_fixed_rate(self):
+        device = Mock(spec=BluetoothDevice)
+        outputs = PinOutputBuffer(device, PinADConfiguration).start(rate=100)
+        outputs[Pin.P0] = 1
+        time.sleep(0.1)
+        outputs[Pin.P1] = 1
+        outputs.stop()
+
+        assert self.written(device) == [bytes.fromhex("00 01"), bytes.fromhex("01 01")]
+
+    def test_async_buffer(self):
+        device = Mock(spec=AsyncBluetoothDevice)
+        device.write = AsyncMock()
+
+        async def control():
+            async with AsyncPinOutputBuffer(device, PinADConfiguration).start(rate=100) as outputs:
+                outputs[Pin.P3] = 1
+                await asyncio.sleep(0.1)
+                outputs[Pin.P3] = 0
+                outputs[Pin.P4] = 1
+
+        asyncio.run(control())
+
+        assert self.written(device) == [bytes.fromhex("03 01"), bytes.fromhex("03 00 04 01")]
+
+
+class FakeClient:
+    """Stands in for a BleakClient, remembering the PWM commands that were written"""
+
+    def __init__(self, write_time: float = 0.0):
+        self.address = 'AA:BB'
+        self.mtu_size = 23
+        self.services = None
+        self.write_time = write_time
+        self.commands = []
+        setup_characteristic(self, Service.IO_PIN, Characteristic.PWM_CONTROL, ['write'])
+
+    async def connect(self):
+        pass
+
+    async def write_gatt_char(self, gatt_characteristic, data, response=None):
+        await asyncio.sleep(self.write_time)
+        self.commands.append([PwmControlData.from_bytes(data[i:i + 7]) for i in range(0, len(data), 7)])
+
+
+class TestPwmSequencer:
+    def test_values_are_interpolated_between_keyframes(self):
+        sequencer = AsyncPwmSequencer(Mock(spec=AsyncBluetoothDevice))
+        sequencer.add_trajectory(Pin.P0, [(1.0, 100), (0.0, 0), (2.0, 100)])
+        trajectory = sequencer._trajectories[Pin.P0]
+
+        assert trajectory.value_at(-1) == (0, False)
+        assert trajectory.value_at(0.25) == (25, False)
+        assert trajectory.value_at(1.5) == (100, False)
+        assert trajectory.value_at(3) == (100, True)
+
+    def test_repeating_trajectories_start_over(self):
+        sequencer = AsyncPwmSequencer(Mock(spec=AsyncBluetoothDevice))
+        sequencer.add_trajectory(Pin.P0, [(0, 0), (1, 100)], repeat=True)
+
+        assert sequencer._trajectories[Pin.P0].value_at(2.5) == (50, False)
+
+    def test_invalid_trajectories(self):
+        sequencer = AsyncPwmSequencer(Mock(spec=AsyncBluetoothDevice))
+        with pytest.raises(ValueError):
+            sequencer.add_trajectory(Pin.P0, [])
+        with pytest.raises(ValueError):
+            sequencer.add_trajectory(Pin.P0, [(0, 1025)])
+
+    def test_trajectories_are_changed_on_the_event_loop(self):
+        client = FakeClient()
+        device = BluetoothDevice(client)
+        device.connect()
+        sequencer = PwmSequencer(device)
+        threads = []
+        add_trajectory, remove_trajectory = AsyncPwmSequencer.add_trajectory, AsyncPwmSequencer.remove_trajectory
+        sequencer._sequencer.add_trajectory = lambda *args: \
+            threads.append(threading.current_thread()) or add_trajectory(sequencer._sequencer, *args)
+        sequencer._sequencer.remove_trajectory = lambda *args: \
+            threads.append(threading.current_thread()) or remove_trajectory(sequencer._sequencer, *args)
+
+        sequencer.add_trajectory(Pin.P0, [(0, 10)])
+        sequencer.remove_trajectory(Pin.P0)
+        with pytest.raises(ValueError):
+            sequencer.add_trajectory(Pin.P0, [])
+
+        assert len(threads) == 3
+        assert threading.current_thread() not in threads
+        assert not sequencer._sequencer._trajectories
+
+    def test_changed_pins_are_coalesced_two_per_write(self):
+        client = FakeClient()
+        device = BluetoothDevice(client)
+        device.connect()
+        sequencer = PwmSequencer(device, rate=50)
+        for pin in (Pin.P0, Pin.P1, Pin.P2):
+            sequencer.add_trajectory(pin, [(0, 10), (0.1, 50)])
+        sequencer.add_trajectory(Pin.P3, [(0, 7)], period=1000)
+
+        sequencer.start().result(2)
+
+        first_tick = client.commands[:2]
+        assert [len(commands) for commands in first_tick] == [2, 2]
+        assert first_tick[1][1] == PwmControlData(Pin.P3, 7, 1000)
+        # the steady pin is only sent once, the final values are always sent
+        assert sum(c.pin == Pin.P3 for commands in client.commands for c in commands) == 1
+        assert [c.value for commands in client.commands for c in commands if c.pin == Pin.P0][-1] == 50
+        assert all(len(commands) <= 2 for commands in client.commands)
+        assert sequencer.writes == len(client.commands)
+
+    def test_slow_writes_skip_intermediate_values(self):
+        client = FakeClient(write_time=0.05)
+        device = BluetoothDevice(client)
+        device.connect()
+        sequencer = PwmSequencer(device, rate=100)
+        sequencer.add_trajectory(Pin.P0, [(0, 0), (0.3, 300)])
+
+        start = time.monotonic()
+        sequencer.start().result(2)
+
+        assert time.monotonic() - start < 0.6
+        values = [commands[0].value for commands in client.commands]
+        assert len(values) < 10
+        assert values[-1] == 300
+
+    def test_stop_a_repeating_trajectory(self):
+        client = FakeClient()
+        device = BluetoothDevice(client)
+        device.connect()
+        sequencer = PwmSequencer(device)
+        sequencer.add_trajectory(Pin.P0, [(0, 0), (0.1, 100)], repeat=True)
+        finished = sequencer.start()
+        time.sleep(0.1)
+        sequencer.stop()
+
+        assert finished.cancelled()
+        assert client.commands
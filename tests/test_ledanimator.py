@@ -0,0 +1,125 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from kaspersmicrobit.services.led import LedService, AsyncLedService
+from kaspersmicrobit.services.ledanimator import LedAnimator, AsyncLedAnimator
+from kaspersmicrobit.services.leddisplay import Image, LedDisplay
+
+
+def frames_written(led):
+    return [bytes(c.args[0].to_bytes()) for c in led.show.call_args_list]
+
+
+def test_fps_must_be_positive():
+    with pytest.raises(ValueError):
+        LedAnimator(Mock(spec=LedService), fps=0)
+
+
+def test_latest_frame_wins_while_a_write_is_slow():
+    led = Mock(spec=LedService)
+    release = threading.Event()
+    led.show.side_effect = lambda display: release.wait(5)
+
+    with LedAnimator(led, fps=1000) as animator:
+        animator.show(Image.HEART)
+        time.sleep(0.05)  # the heart is being written
+        animator.show(Image.SAD)
+        animator.show(Image.HAPPY)
+        animator.show(Image.SMILE)
+        release.set()
+        assert animator.flush(5)
+
+    assert frames_written(led) == [bytes(Image.HEART.to_bytes()), bytes(Image.SMILE.to_bytes())]
+    assert animator.sent == 2
+    assert animator.dropped == 2
+
+
+def test_frames_equal_to_the_last_frame_written_are_skipped():
+    led = Mock(spec=LedService)
+
+    with LedAnimator(led, fps=1000) as animator:
+        animator.show(Image.HEART)
+        animator.flush(5)
+        animator.show(LedDisplay.from_bytes(Image.HEART.to_bytes()))
+        animator.flush(5)
+        animator.show(Image.SAD)
+
+    assert frames_written(led) == [bytes(Image.HEART.to_bytes()), bytes(Image.SAD.to_bytes())]
+    assert animator.skipped == 1
+
+
+def test_writes_are_paced_to_the_frame_rate():
+    led = Mock(spec=LedService)
+    times = []
+    led.show.side_effect = lambda display: times.append(time.monotonic())
+
+    with LedAnimator(led, fps=20) as animator:
+        for i in range(5):
+            display = LedDisplay()
+            display.set_led(1, i + 1)
+            animator.show(display)
+            animator.flush(5)
+
+    assert len(times) == 5
+    assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+
+
+def test_a_failing_write_does_not_stop_the_animator():
+    led = Mock(spec=LedService)
+    led.show.side_effect = [OSError('link lost'), None]
+
+    with LedAnimator(led, fps=1000) as animator:
+        animator.show(Image.HEART)
+        animator.flush(5)
+        animator.show(Image.HEART)
+
+    assert led.show.call_count == 2
+    assert animator.sent == 1
+
+
+def test_flush_times_out():
+    led = Mock(spec=LedService)
+    release = threading.Event()
+    led.show.side_effect = lambda display: release.wait(5)
+
+    animator = LedAnimator(led).start()
+    animator.show(Image.HEART)
+    assert not animator.flush(0.05)
+    release.set()
+    animator.stop()
+
+
+def test_async_animator():
+    led = AsyncMock(spec=AsyncLedService)
+
+    async def animate():
+        async with AsyncLedAnimator(led, fps=1000) as animator:
+            animator.show(Image.HEART)
+            animator.show(Image.SAD)
+            await animator.flush(5)
+            animator.show(Image.SAD)
+            await animator.flush(5)
+            animator.show(Image.HAPPY)
+        return animator
+
+    animator = asyncio.run(animate())
+
+    assert frames_written(led) == [bytes(Image.SAD.to_bytes()), bytes(Image.HAPPY.to_bytes())]
+    assert (animator.sent, animator.skipped, animator.dropped) == (2, 1, 1)
+
+
+def test_led_service_starts_an_animator():
+    device = Mock()
+    animator = LedService(device).animator(fps=1000)
+    animator.show(Image.HEART)
+    animator.stop()
+
+    device.write.assert_called_once()
+    assert animator.sent == 1
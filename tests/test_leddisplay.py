@@ -4,7 +4,7 @@
 
 import pytest
 
-from kaspersmicrobit.services.leddisplay import LedDisplay
+from kaspersmicrobit.services.leddisplay import LedDisplay, Image
 
 
 def test_get_led_returns_true_if_led_is_on():
@@ -128,3 +128,124 @@ def test_image_should_not_have_more_than_25_leds():
              . . . . .
              . . . . . .
             """)
+
+
+def test_from_int_reads_like_the_display():
+    image = LedDisplay.from_int(0b01000_00100_10100_00010_00001)
+
+    assert image.to_bytes() == bytearray.fromhex("08 04 14 02 01")
+    assert image.to_int() == 0b01000_00100_10100_00010_00001
+
+
+def test_from_int_should_fit_in_25_bits():
+    with pytest.raises(ValueError):
+        LedDisplay.from_int(1 << 25)
+    with pytest.raises(ValueError):
+        LedDisplay.from_int(-1)
+
+
+def test_from_rows():
+    image = LedDisplay.from_rows([0b01000, 0b00100, 0b10100, 0b00010, 0b00001])
+
+    assert image.to_bytes() == bytearray.fromhex("08 04 14 02 01")
+
+
+def test_from_rows_should_have_5_rows_of_5_leds():
+    with pytest.raises(ValueError):
+        LedDisplay.from_rows([0, 0, 0, 0])
+    with pytest.raises(ValueError):
+        LedDisplay.from_rows([0, 0, 0, 0, 0b100000])
+
+
+def test_cached_images_are_copies():
+    string = """
+     # . . . .
+     . . . . .
+     . . . . .
+     . . . . .
+     . . . . .
+    """
+    image1 = LedDisplay.image(string)
+    image1.set_led(5, 5)
+
+    image2 = LedDisplay.image(string)
+    assert image2.led(1, 1)
+    assert not image2.led(5, 5)
+
+
+def test_image_constants_are_created_once_when_first_used():
+    assert Image.HEART is Image.HEART
+    assert Image.HEART.to_int() == 0b01010_11111_11111_01110_00100
+    assert isinstance(vars(Image)['HEART'], LedDisplay)
+
+
+def test_invert_and_combine():
+    image = LedDisplay.from_int(0b11111_00000_11111_00000_10101)
+    other = LedDisplay.from_int(0b11000_11000_00000_00000_00111)
+
+    assert image.invert().to_int() == 0b00000_11111_00000_11111_01010
+    assert (~image).to_int() == image.invert().to_int()
+    assert (image | other).to_int() == 0b11111_11000_11111_00000_10111
+    assert (image & other).to_int() == 0b11000_00000_00000_00000_00101
+    assert (image ^ other).to_int() == 0b00111_11000_11111_00000_10010
+
+
+def test_shift_left_and_right():
+    image = LedDisplay.from_rows([0b10001, 0b01000, 0b00100, 0b00010, 0b00011])
+
+    assert list(image.shift_left().to_bytes()) == [0b00010, 0b10000, 0b01000, 0b00100, 0b00110]
+    assert list(image.shift_left(wrap=True).to_bytes()) == [0b00011, 0b10000, 0b01000, 0b00100, 0b00110]
+    assert list(image.shift_right(2).to_bytes()) == [0b00100, 0b00010, 0b00001, 0b00000, 0b00000]
+    assert list(image.shift_right(2, wrap=True).to_bytes()) == [0b01100, 0b00010, 0b00001, 0b10000, 0b11000]
+    assert image.shift_left(5).to_int() == 0
+    assert image.shift_left(-1).to_int() == image.shift_right().to_int()
+
+
+def test_shift_up_and_down():
+    image = LedDisplay.from_rows([1, 2, 3, 4, 5])
+
+    assert list(image.shift_up().to_bytes()) == [2, 3, 4, 5, 0]
+    assert list(image.shift_up(wrap=True).to_bytes()) == [2, 3, 4, 5, 1]
+    assert list(image.shift_down(2).to_bytes()) == [0, 0, 1, 2, 3]
+    assert list(image.shift_down(2, wrap=True).to_bytes()) == [4, 5, 1, 2, 3]
+    assert image.shift_down(9).to_int() == 0
+
+
+def test_shift_does_not_change_the_display():
+    image = LedDisplay.from_rows([1, 2, 3, 4, 5])
+    image.shift_up().set_led(1, 1)
+    image.shift_left(wrap=True).set_led(1, 1)
+
+    assert list(image.to_bytes()) == [1, 2, 3, 4, 5]
+
+
+def test_blit_copies_part_of_an_image():
+    dot = LedDisplay.from_rows([0b11000, 0b11000, 0, 0, 0])
+    background = LedDisplay.from_int((1 << 25) - 1)
+
+    assert list(LedDisplay().blit(dot, row=4, column=4).to_bytes()) == [0, 0, 0, 0b00011, 0b00011]
+    assert list(background.blit(dot, row=2, column=2, height=2, width=2).to_bytes()) == \
+        [0b11111, 0b11111, 0b11111, 0b11111, 0b11111]
+    assert list(background.blit(LedDisplay(), row=2, column=2, height=2, width=3).to_bytes()) == \
+        [0b11111, 0b10001, 0b10001, 0b11111, 0b11111]
+
+
+def test_blit_clips_at_the_edges():
+    image = LedDisplay.from_rows([0b10101] * 5)
+
+    assert list(LedDisplay().blit(image, row=-2, column=-1).to_bytes()) == [0b10100, 0b10100, 0, 0, 0]
+    assert list(LedDisplay().blit(image, row=5, column=5).to_bytes()) == [0, 0, 0, 0, 0b00001]
+    assert LedDisplay().blit(image, row=6).to_int() == 0
+
+
+def test_numpy_roundtrip():
+    numpy = pytest.importorskip('numpy')
+    image = LedDisplay.from_rows([0b10001, 0b01000, 0b00100, 0b00010, 0b00011])
+
+    array = image.to_numpy()
+    assert array.shape == (5, 5)
+    assert array.dtype == numpy.bool_
+    assert array[0, 0] and array[0, 4] and not array[0, 1]
+    assert list(LedDisplay.from_numpy(array).to_bytes()) == list(image.to_bytes())
+    with pytest.raises(ValueError):
+        LedDisplay.from_numpy(numpy.zeros((4, 5)))
@@ -0,0 +1,87 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+from unittest.mock import Mock
+
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.services.led import LedService, AsyncLedService
+from kaspersmicrobit.services.leddisplay import LedDisplay, Image
+from kaspersmicrobit.services.ledtext import TextRenderer, FONT
+
+
+def columns(frames):
+    """the leftmost column of every frame, as a 5 bit number"""
+    return [sum(((row >> 4) & 1) << (4 - i) for i, row in enumerate(frame.to_bytes())) for frame in frames]
+
+
+def test_every_printable_ascii_character_is_in_the_font():
+    assert set(FONT) == {chr(c) for c in range(32, 127)}
+    assert all(0 <= glyph < 1 << 25 for glyph in FONT.values())
+
+
+def test_text_scrolls_in_from_the_right_and_out_to_the_left():
+    frames = TextRenderer().frames('I')
+
+    # 5 empty columns, 'I' is 3 columns wide, 5 empty columns: 13 columns make 9 frames
+    assert len(frames) == 9
+    assert frames[0].to_int() == 0
+    assert frames[-1].to_int() == 0
+    assert list(frames[1].to_bytes()) == [0b00001, 0, 0, 0, 0b00001]
+    assert list(frames[5].to_bytes()) == [0b11100, 0b01000, 0b01000, 0b01000, 0b11100]
+
+
+def test_characters_are_separated_by_spacing():
+    assert columns(TextRenderer().frames('..'))[5:8] == [0b00001, 0, 0b00001]
+    assert columns(TextRenderer(spacing=3).frames('..'))[5:10] == [0b00001, 0, 0, 0, 0b00001]
+
+
+def test_space_is_3_columns_wide():
+    assert columns(TextRenderer().frames('. .'))[5:12] == [0b00001, 0, 0, 0, 0, 0, 0b00001]
+
+
+def test_unknown_characters_are_shown_as_question_mark():
+    renderer = TextRenderer()
+
+    assert [f.to_int() for f in renderer.frames('♥')] == [f.to_int() for f in renderer.frames('?')]
+
+
+def test_custom_glyphs():
+    renderer = TextRenderer(glyphs={'♥': Image.HEART, 'o': 0b11111_10001_10001_10001_11111})
+
+    assert renderer.frames('♥')[5].to_int() == Image.HEART.to_int()
+    assert renderer.frames('o')[5].to_int() == 0b11111_10001_10001_10001_11111
+
+
+def test_frames_are_cached_but_returned_as_copies():
+    renderer = TextRenderer()
+    frames = renderer.frames('Hello')
+    frames[5].set_led(1, 1, False)
+
+    assert renderer.frames('Hello')[5].led(1, 1)
+    assert renderer.frames('') == []
+
+
+def test_scroll_text_shows_frames_and_skips_repeated_frames():
+    device = Mock()
+    LedService(device).scroll_text(' .', delay_in_millis=1)
+
+    written = [call.args[2] for call in device.write.call_args_list]
+    assert all(call.args[:2] == (Service.LED, Characteristic.LED_MATRIX_STATE) for call in device.write.call_args_list)
+    # the first 5 frames are empty, the space is not written 4 times
+    assert len(written) == len(TextRenderer().frames(' .')) - 4
+    assert all(a != b for a, b in zip(written, written[1:]))
+
+
+def test_async_scroll_text():
+    device = Mock()
+
+    async def write(service, characteristic, data):
+        pass
+
+    device.write.side_effect = write
+    asyncio.run(AsyncLedService(device).scroll_text('A', delay_in_millis=1))
+
+    assert device.write.call_args_list[-1].args[2] == LedDisplay().to_bytes()
+    assert device.write.call_count == len(TextRenderer().frames('A'))
@@ -0,0 +1,183 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import random
+import threading
+import timeit
+from unittest.mock import patch
+
+import pytest
+
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.dispatch import Dispatch
+from kaspersmicrobit.metrics import LatencyHistogram, to_prometheus
+from tests.test_bluetoothdevice import setup_characteristic, invoke_callback
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def client():
+    with patch('bleak.BleakClient', autospec=True) as client:
+        client.return_value.address = 'AA:BB'
+        yield client.return_value
+
+
+def test_histogram_percentiles_are_accurate_to_a_few_percent():
+    random.seed(7)
+    durations = sorted(random.uniform(0.0001, 0.5) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for duration in durations:
+        histogram.record(duration)
+
+    for percentile in (50, 90, 99):
+        exact = durations[int(percentile / 100 * len(durations)) - 1]
+        assert histogram.percentile(percentile) == pytest.approx(exact, rel=0.07)
+    assert histogram.percentile(100) == max(durations)
+    assert histogram.stats().count == 10_000
+
+
+def test_stats_is_none_when_metrics_are_disabled(client):
+    assert BluetoothDevice(client).stats() is None
+
+
+def test_stats_counts_operations_per_characteristic(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.read_gatt_char.return_value = bytearray(b'\x15')
+    client.start_notify.return_value = None
+    device = BluetoothDevice(client)
+    device.enable_metrics()
+    handled = threading.Event()
+
+    device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    device.write(Service.TEMPERATURE, Characteristic.TEMPERATURE, b'\x01\x02')
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: handled.set(),
+                  dispatch=Dispatch.worker())
+    sender, callback = client.start_notify.call_args.args
+    invoke_callback(device, callback, sender=sender, data=b'\x16').result(1)
+    assert handled.wait(1)
+
+    stats = device.stats()
+    temperature = stats.characteristic(Characteristic.TEMPERATURE)
+    assert stats.address == 'AA:BB'
+    assert (temperature.reads, temperature.writes, temperature.notifications) == (2, 1, 1)
+    assert (temperature.bytes_read, temperature.bytes_written, temperature.bytes_received) == (2, 2, 1)
+    assert temperature.read_latency.count == 2
+    assert temperature.write_latency.count == 1
+    assert temperature.dropped == 0
+    assert temperature.notifications_per_second > 0
+    assert stats.characteristic(Characteristic.BUTTON_A) is None
+
+    for _ in range(50):
+        if device.stats().characteristic(Characteristic.TEMPERATURE).callback_duration:
+            break
+        threading.Event().wait(0.01)
+    assert device.stats().characteristic(Characteristic.TEMPERATURE).callback_duration.count == 1
+
+    device.disable_metrics()
+    assert device.stats() is None
+
+
+def test_pending_is_unknown_without_a_queue(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    device = BluetoothDevice(client)
+    device.enable_metrics()
+
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: None)
+    stats = device.stats()
+    assert stats.characteristic(Characteristic.TEMPERATURE).pending is None
+    assert 'kaspersmicrobit_pending_notifications{' not in to_prometheus([stats])
+
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: None,
+                  dispatch=Dispatch.worker())
+    stats = device.stats()
+    assert stats.characteristic(Characteristic.TEMPERATURE).pending == 0
+    assert 'kaspersmicrobit_pending_notifications{address="AA:BB",characteristic="TEMPERATURE"} 0' \
+        in to_prometheus([stats])
+    device.disconnect()
+
+
+def test_dropped_notifications_are_counted_after_the_queue_drained(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    device = BluetoothDevice(client)
+    device.enable_metrics()
+    started, release = threading.Event(), threading.Event()
+    handled = []
+
+    def slow_callback(sender, data):
+        started.set()
+        release.wait(1)
+        handled.append(data)
+
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, slow_callback, dispatch=Dispatch.worker(1))
+    sender, callback = client.start_notify.call_args.args
+    invoke_callback(device, callback, sender=sender, data=b'\x15').result(1)
+    assert started.wait(1)
+    for data in (b'\x16', b'\x17'):
+        invoke_callback(device, callback, sender=sender, data=data).result(1)
+    release.set()
+    for _ in range(100):
+        if len(handled) == 2:
+            break
+        threading.Event().wait(0.01)
+
+    temperature = device.stats().characteristic(Characteristic.TEMPERATURE)
+    assert handled == [b'\x15', b'\x16']
+    assert (temperature.pending, temperature.dropped) == (0, 1)
+    device.disconnect()
+
+
+def test_callbacks_are_no_longer_timed_after_disable(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.start_notify.return_value = None
+    device = BluetoothDevice(client)
+    metrics = device.enable_metrics()
+    handled = []
+    device.notify(Service.TEMPERATURE, Characteristic.TEMPERATURE, lambda sender, data: handled.append(data),
+                  dispatch=Dispatch.inline())
+    sender, callback = client.start_notify.call_args.args
+
+    device.disable_metrics()
+    invoke_callback(device, callback, sender=sender, data=b'\x16').result(1)
+
+    assert handled == [b'\x16']
+    assert metrics.stats().characteristic(Characteristic.TEMPERATURE).callback_duration is None
+
+
+def test_prometheus_text_format(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.read_gatt_char.return_value = bytearray(b'\x15')
+    device = BluetoothDevice(client)
+    device.enable_metrics()
+    device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+
+    text = to_prometheus([device.stats()])
+
+    assert '# TYPE kaspersmicrobit_operations_total counter' in text
+    assert 'kaspersmicrobit_operations_total{address="AA:BB",characteristic="TEMPERATURE",operation="read"} 1' in text
+    assert 'kaspersmicrobit_read_latency_seconds_count{address="AA:BB",characteristic="TEMPERATURE"} 1' in text
+    assert 'kaspersmicrobit_read_latency_seconds{address="AA:BB",characteristic="TEMPERATURE",quantile="0.99"}' in text
+    assert 'kaspersmicrobit_write_latency_seconds_count' not in text
+    assert text.endswith('\n')
+
+
+def test_benchmark_read_overhead_of_metrics(client):
+    setup_characteristic(client, Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    client.read_gatt_char.return_value = bytearray(b'\x15')
+    device = BluetoothDevice(client)
+
+    def read():
+        device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+
+    disabled = min(timeit.repeat(read, number=500, repeat=3))
+    device.enable_metrics()
+    enabled = min(timeit.repeat(read, number=500, repeat=3))
+
+    logger.info("read: %.1f µs without metrics, %.1f µs with metrics", disabled / 500 * 1e6, enabled / 500 * 1e6)
+    assert device.stats().characteristic(Characteristic.TEMPERATURE).reads == 1500
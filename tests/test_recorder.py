@@ -0,0 +1,134 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import threading
+import time
+from unittest.mock import patch, Mock
+
+import pytest
+
+from kaspersmicrobit import KaspersMicrobit
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.recorder import NotificationRecorder, NotificationLog, RecordedNotification
+from tests.test_bluetoothdevice import setup_characteristic, invoke_callback
+
+
+@pytest.fixture
+def client():
+    with patch('bleak.BleakClient', autospec=True) as client:
+        yield client.return_value
+
+
+def test_records_can_be_read_back(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    with NotificationRecorder(path) as recorder:
+        recorder.record('AA:BB', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, b'\x01\x02', 10.0)
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 11.0)
+        recorder.record('CC:DD', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, b'', 12.0)
+
+    with NotificationLog(path) as log:
+        assert len(log) == 3
+        assert log[1] == RecordedNotification(11.0, 'AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01')
+        assert log[-1].address == 'CC:DD'
+        assert log[2].data == b''
+        assert log.timestamp(0) == 10.0
+        assert [notification.data for notification in log] == [b'\x01\x02', b'\x01', b'']
+        assert log.channels() == [
+            ('AA:BB', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA),
+            ('AA:BB', Service.BUTTON, Characteristic.BUTTON_A),
+            ('CC:DD', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA),
+        ]
+
+
+def test_recording_to_an_existing_file_appends(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    with NotificationRecorder(path) as recorder:
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 1.0)
+    with NotificationRecorder(path) as recorder:
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_B, b'\x02', 2.0)
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x00', 3.0)
+
+    with NotificationLog(path) as log:
+        assert [(n.characteristic, n.data) for n in log] == [
+            (Characteristic.BUTTON_A, b'\x01'),
+            (Characteristic.BUTTON_B, b'\x02'),
+            (Characteristic.BUTTON_A, b'\x00'),
+        ]
+
+
+def test_partially_written_record_is_ignored(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    with NotificationRecorder(path) as recorder:
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 1.0)
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x02', 2.0)
+    with open(path, 'r+b') as file:
+        file.truncate(path.stat().st_size - 1)
+
+    with NotificationLog(path) as log:
+        assert [n.data for n in log] == [b'\x01']
+
+
+def test_records_are_buffered_until_flush(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    recorder = NotificationRecorder(path, fsync_interval=None)
+    recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 1.0)
+    assert path.stat().st_size == 0
+
+    recorder.flush()
+    assert len(NotificationLog(path)) == 1
+    recorder.close()
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'something else')
+
+    with pytest.raises(ValueError):
+        NotificationLog(path)
+
+
+def test_attach_records_notifications_of_a_device(client, tmp_path):
+    setup_characteristic(client, Service.BUTTON, Characteristic.BUTTON_A)
+    client.start_notify.return_value = None
+    client.address = 'AA:BB'
+    path = tmp_path / 'session.kmbr'
+    device = BluetoothDevice(client)
+
+    with NotificationRecorder(path) as recorder:
+        recorder.attach(device)
+        device.notify(Service.BUTTON, Characteristic.BUTTON_A, lambda sender, data: None)
+        sender, callback = client.start_notify.call_args.args
+        invoke_callback(device, callback, sender=sender, data=bytearray(b'\x01')).result(1)
+        recorder.detach(device)
+        invoke_callback(device, callback, sender=sender, data=bytearray(b'\x00')).result(1)
+
+    with NotificationLog(path) as log:
+        assert [(n.address, n.characteristic, n.data) for n in log] == [('AA:BB', Characteristic.BUTTON_A, b'\x01')]
+
+
+def test_the_file_is_written_and_synced_by_the_writer_thread(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    synced_on = []
+    with patch('kaspersmicrobit.recorder.os.fsync', side_effect=lambda fd: synced_on.append(threading.current_thread())):
+        with NotificationRecorder(path, buffer_size=1, fsync_interval=0.01) as recorder:
+            recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 1.0)
+            deadline = time.monotonic() + 5
+            while not synced_on and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert path.stat().st_size > 0
+
+    assert synced_on[0].name == 'kaspersmicrobit-recorder'
+    assert threading.current_thread() not in synced_on[:-1]
+
+
+def test_attach_a_kaspersmicrobit(tmp_path):
+    device = Mock(spec=BluetoothDevice)
+    device.address.return_value = 'AA:BB'
+
+    with NotificationRecorder(tmp_path / 'session.kmbr') as recorder:
+        recorder.attach(KaspersMicrobit(device))
+
+    device.add_notification_listener.assert_called_once()
+    device.remove_notification_listener.assert_called_once()
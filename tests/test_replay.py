@@ -0,0 +1,168 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import struct
+import threading
+import time
+
+import pytest
+
+from kaspersmicrobit import KaspersMicrobit
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.dispatch import Dispatch
+from kaspersmicrobit.recorder import NotificationRecorder, NotificationLog
+from kaspersmicrobit.replay import ReplayBluetoothDevice, AS_FAST_AS_POSSIBLE
+from kaspersmicrobit.services.accelerometer import AccelerometerData
+
+logger = logging.getLogger(__name__)
+
+
+def xyz(x, y, z):
+    return struct.pack('<hhh', x, y, z)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / 'session.kmbr'
+    with NotificationRecorder(path) as recorder:
+        for i in range(10):
+            recorder.record('AA:BB', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                            xyz(i, -i, 1000), 100.0 + i * 0.02)
+        recorder.record('AA:BB', Service.BUTTON, Characteristic.BUTTON_A, b'\x01', 100.5)
+        recorder.record('CC:DD', Service.BUTTON, Characteristic.BUTTON_B, b'\x02', 100.6)
+    return path
+
+
+def test_replays_notifications_through_kaspersmicrobit(recording):
+    device = ReplayBluetoothDevice(recording, speed=AS_FAST_AS_POSSIBLE)
+    received = []
+    done = threading.Event()
+
+    with KaspersMicrobit(device) as microbit:
+        microbit.accelerometer.notify(received.append, dispatch=Dispatch.worker())
+        microbit.buttons.on_button_a(press=lambda button: done.set())
+        device.start().result(1)
+        assert done.wait(1)
+        # the button and the accelerometer callbacks run on different threads
+        deadline = time.monotonic() + 1
+        while len(received) < 10 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert received == [AccelerometerData(i, -i, 1000) for i in range(10)]
+
+
+def test_replays_one_device_of_the_recording(recording):
+    device = ReplayBluetoothDevice(recording, speed=AS_FAST_AS_POSSIBLE, address='CC:DD')
+    device.connect()
+    future = device.wait_for(Service.BUTTON, Characteristic.BUTTON_B)
+    device.start().result(1)
+
+    assert future.result(1) == b'\x02'
+    assert device.is_service_available(Service.BUTTON)
+    assert not device.is_service_available(Service.ACCELEROMETER)
+    device.disconnect()
+
+
+def test_replay_keeps_the_timing_at_the_given_speed(recording):
+    device = ReplayBluetoothDevice(recording, speed=5)
+    now = 0.0
+    delays = []
+
+    async def sleep(delay):
+        nonlocal now
+        delays.append(delay)
+        now += delay
+
+    device._device._clock = lambda: now
+    device._device._sleep = sleep
+    device.connect()
+    device.start().result(1)
+    device.disconnect()
+
+    # 10 accelerometer notifications 20 ms apart, then button A 320 ms after the last one, at 5 times the speed
+    assert delays == pytest.approx([0.0] + [0.004] * 9 + [0.064])
+
+
+def test_speed_must_be_greater_than_zero(recording):
+    for speed in (0, -1):
+        with pytest.raises(ValueError):
+            ReplayBluetoothDevice(recording, speed=speed)
+
+
+def test_an_exception_in_a_callback_does_not_stop_the_replay(recording, caplog):
+    device = ReplayBluetoothDevice(recording, speed=AS_FAST_AS_POSSIBLE)
+    received = []
+
+    def fail(sender, data):
+        received.append(data)
+        raise RuntimeError('callback failed')
+
+    async def fail_async(sender, data):
+        raise RuntimeError('async callback failed')
+
+    device.connect()
+    device._loop.run_async(device._device.notify(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA, fail))
+    device._loop.run_async(device._device.notify(Service.BUTTON, Characteristic.BUTTON_A, fail_async))
+    button_a = device.wait_for(Service.BUTTON, Characteristic.BUTTON_A)
+    device.start().result(1)
+
+    assert button_a.result(1) == b'\x01'
+    assert len(received) == 10
+    assert 'callback failed' in caplog.text
+    assert 'async callback failed' in caplog.text
+    device.disconnect()
+
+
+def test_a_recording_opened_from_a_path_is_closed_on_disconnect(recording):
+    device = ReplayBluetoothDevice(recording, speed=AS_FAST_AS_POSSIBLE)
+    device.connect()
+    log = device._device._log
+    device.disconnect()
+
+    assert log._mmap.closed
+
+    with NotificationLog(recording) as log:
+        device = ReplayBluetoothDevice(log, speed=AS_FAST_AS_POSSIBLE)
+        device.connect()
+        device.disconnect()
+        assert not log._mmap.closed
+
+
+def test_reads_return_written_or_replayed_values(recording):
+    device = ReplayBluetoothDevice(recording, speed=AS_FAST_AS_POSSIBLE)
+    device.connect()
+
+    assert device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA) == \
+        xyz(0, 0, 1000)
+    device.start().result(1)
+    assert device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA) == \
+        xyz(9, -9, 1000)
+
+    device.write(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD, b'\x50\x00')
+    assert device.read(Service.ACCELEROMETER, Characteristic.ACCELEROMETER_PERIOD) == b'\x50\x00'
+    with pytest.raises(LookupError):
+        device.read(Service.TEMPERATURE, Characteristic.TEMPERATURE)
+    device.disconnect()
+
+
+def test_benchmark_replay_dispatch(tmp_path):
+    path = tmp_path / 'benchmark.kmbr'
+    count = 20_000
+    with NotificationRecorder(path) as recorder:
+        for i in range(count):
+            recorder.record('AA:BB', Service.ACCELEROMETER, Characteristic.ACCELEROMETER_DATA,
+                            xyz(i % 1000, 0, 0), i / 1000)
+
+    for dispatch in (Dispatch.inline(), Dispatch.worker(queue_size=None), Dispatch.latest()):
+        device = ReplayBluetoothDevice(path, speed=AS_FAST_AS_POSSIBLE)
+        received = []
+        with KaspersMicrobit(device) as microbit:
+            microbit.accelerometer.notify(received.append, dispatch=dispatch)
+            start = time.perf_counter()
+            device.start().result(30)
+            elapsed = time.perf_counter() - start
+
+        logger.info("replayed %d notifications with %s in %.3fs (%.0f/s)", count, dispatch, elapsed, count / elapsed)
+        assert received
@@ -0,0 +1,52 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import logging
+import timeit
+
+import pytest
+
+from kaspersmicrobit.services.accelerometer import AccelerometerData
+from kaspersmicrobit.services.magnetometer import MagnetometerData
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.mark.parametrize('data_type', [AccelerometerData, MagnetometerData])
+def test_from_bytes(data_type):
+    assert data_type.from_bytes(bytearray.fromhex("e8 03 18 fc ff 7f")) == data_type(1000, -1000, 32767)
+
+
+@pytest.mark.parametrize('data_type', [AccelerometerData, MagnetometerData])
+def test_from_bytes_accepts_memoryview(data_type):
+    assert data_type.from_bytes(memoryview(bytearray.fromhex("01 00 02 00 03 00"))) == data_type(1, 2, 3)
+
+
+@pytest.mark.parametrize('data_type', [AccelerometerData, MagnetometerData])
+def test_data_has_no_instance_dict(data_type):
+    data = data_type(1, 2, 3)
+
+    assert not hasattr(data, '__dict__')
+    with pytest.raises(AttributeError):
+        data.w = 4
+
+
+def decode_with_int_from_bytes(data_type, values):
+    return data_type(
+        int.from_bytes(values[0:2], "little", signed=True),
+        int.from_bytes(values[2:4], "little", signed=True),
+        int.from_bytes(values[4:6], "little", signed=True)
+    )
+
+
+@pytest.mark.parametrize('data_type', [AccelerometerData, MagnetometerData])
+def test_benchmark_decode(data_type):
+    payload = bytearray.fromhex("e8 03 18 fc 00 00")
+    number = 20000
+
+    sliced = timeit.timeit(lambda: decode_with_int_from_bytes(data_type, payload), number=number)
+    unpacked = timeit.timeit(lambda: data_type.from_bytes(payload), number=number)
+
+    logger.info("%s decode: int.from_bytes %.2f µs/sample, struct %.2f µs/sample",
+                data_type.__name__, sliced / number * 1e6, unpacked / number * 1e6)
+    assert data_type.from_bytes(payload) == decode_with_int_from_bytes(data_type, payload)
@@ -0,0 +1,83 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import logging
+import math
+import time
+
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.services.uart import UartService
+from tests.test_bluetoothdevice import setup_characteristic
+
+logger = logging.getLogger(__name__)
+
+
+class FakeClient:
+    """
+    Stands in for a BleakClient on a link with the given MTU, where every write packet takes packet_time seconds
+    """
+
+    def __init__(self, mtu_size: int, packet_time: float = 0.001):
+        self.address = 'AA:BB'
+        self.mtu_size = mtu_size
+        self.packet_time = packet_time
+        self.services = None
+        self.written = bytearray()
+        self.writes = 0
+        setup_characteristic(self, Service.UART, Characteristic.RX_CHARACTERISTIC, ['write'])
+
+    async def connect(self):
+        pass
+
+    async def write_gatt_char(self, gatt_characteristic, data, response=None):
+        assert len(data) <= self.mtu_size - 3
+        await asyncio.sleep(self.packet_time)
+        self.written += data
+        self.writes += 1
+
+
+def test_mtu_is_read_after_connect():
+    device = BluetoothDevice(FakeClient(mtu_size=247))
+    assert device.mtu() == 23
+
+    device.connect()
+
+    assert device.mtu() == 247
+    assert device.max_write_size(Service.UART, Characteristic.RX_CHARACTERISTIC) == 244
+
+
+def test_uart_chunks_are_limited_by_the_microbit_and_the_mtu():
+    client = FakeClient(mtu_size=100)
+    device = BluetoothDevice(client)
+    device.connect()
+    uart = UartService(device)
+
+    uart.send(bytes(100))
+    assert client.writes == 5
+
+    uart.max_chunk_size = 512
+    uart.send(bytes(100))
+    assert client.writes == 5 + 2
+    assert client.written == bytes(200)
+
+
+def test_benchmark_uart_send_at_various_mtus():
+    data = bytes(range(256)) * 8
+    throughput = {}
+    for mtu in (23, 64, 185, 247):
+        client = FakeClient(mtu_size=mtu)
+        device = BluetoothDevice(client, max_writes_in_flight=1)
+        device.connect()
+        uart = UartService(device)
+        uart.max_chunk_size = 512
+
+        start = time.perf_counter()
+        uart.send(data)
+        throughput[mtu] = len(data) / (time.perf_counter() - start)
+
+        assert client.written == data
+        assert client.writes == math.ceil(len(data) / (mtu - 3))
+        logger.info("uart send at MTU %d: %d writes, %.0f bytes/s", mtu, client.writes, throughput[mtu])
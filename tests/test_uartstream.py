@@ -0,0 +1,199 @@
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+import asyncio
+import concurrent.futures
+import threading
+from unittest.mock import Mock, AsyncMock
+
+import pytest
+
+from kaspersmicrobit.bluetoothdevice import BluetoothDevice, AsyncBluetoothDevice
+from kaspersmicrobit.bluetoothprofile.characteristics import Characteristic
+from kaspersmicrobit.bluetoothprofile.services import Service
+from kaspersmicrobit.dispatch import Dispatch
+from kaspersmicrobit.services.uart import UartService
+from kaspersmicrobit.services.uartstream import ByteRing, AsyncUartStream
+
+
+def completed(*args):
+    future = concurrent.futures.Future()
+    future.set_result(None)
+    return future
+
+
+@pytest.fixture
+def device():
+    device = Mock(spec=BluetoothDevice)
+    device.write_nowait.side_effect = completed
+    device.max_write_size.return_value = 20
+    return device
+
+
+def receive(device, *packets):
+    callback = device.notify.call_args.args[2]
+    for packet in packets:
+        callback(None, bytearray(packet))
+
+
+def test_byte_ring():
+    ring = ByteRing(8)
+
+    assert ring.append(b'abcdef') == 6
+    assert ring.take(4) == b'abcd'
+    assert ring.append(b'ghijklm') == 6
+    assert ring.find(b'j') == 5
+    assert ring.take(100) == b'efghijkl'
+    assert len(ring) == 0
+    assert ring.find(b'a') == -1
+
+
+def test_reads_lines_split_over_notifications(device):
+    stream = UartService(device).stream()
+
+    receive(device, b'first li', b'ne\nsecond', b' line\nthi')
+
+    assert stream.readline() == b'first line\n'
+    assert stream.readline_string() == 'second line\n'
+    assert stream.read() == b'thi'
+
+
+def test_decodes_characters_split_over_notifications(device):
+    stream = UartService(device).stream()
+    euro = '€'.encode('utf-8')
+
+    receive(device, b'1 ' + euro[:1])
+    assert stream.read_string() == '1 '
+    receive(device, euro[1:] + b'!')
+    assert stream.read_string() == '€!'
+
+
+def test_receive_string_decodes_characters_split_over_notifications():
+    received = []
+    to_string = UartService.to_string(received.append)
+    smiley = '😀'.encode('utf-8')
+
+    to_string(smiley[:3])
+    to_string(smiley[3:])
+
+    assert received == ['😀']
+
+
+def test_receive_string_decodes_notifications_in_order_without_dropping_them():
+    device = Mock(spec=BluetoothDevice)
+
+    UartService(device).receive_string(print)
+
+    dispatch = device.notify.call_args.kwargs['dispatch']
+    assert dispatch.is_ordered()
+    assert dispatch.queue_size is None
+
+
+def test_receive_string_rejects_an_unordered_dispatch():
+    device = Mock(spec=BluetoothDevice)
+
+    with pytest.raises(ValueError):
+        UartService(device).receive_string(print, dispatch=Dispatch.executor())
+    device.notify.assert_not_called()
+
+
+def test_read_times_out(device):
+    stream = UartService(device).stream()
+
+    with pytest.raises(TimeoutError):
+        stream.readline(timeout=0.01)
+
+
+def test_waiting_reader_is_woken_by_received_data_and_close(device):
+    stream = UartService(device).stream()
+    lines = []
+    reader = threading.Thread(target=lambda: lines.extend(stream))
+    reader.start()
+
+    receive(device, b'one\r\ntwo', b'\n')
+    stream.close()
+    reader.join(1)
+
+    assert lines == ['one', 'two']
+
+
+def test_drops_bytes_when_the_buffer_is_full(device):
+    stream = UartService(device).stream(buffer_size=4)
+
+    receive(device, b'abc', b'def')
+
+    assert stream.dropped == 2
+    assert stream.read() == b'abcd'
+    receive(device, b'abcd')
+    with pytest.raises(ValueError):
+        stream.readline(timeout=0.01)
+
+
+def test_writes_are_chunked_and_flushed(device):
+    stream = UartService(device).stream()
+
+    stream.write_string('x' * 45)
+    stream.flush()
+
+    assert [c.args[2] for c in device.write_nowait.call_args_list] == [b'x' * 20, b'x' * 20, b'x' * 5]
+
+
+def test_write_errors_are_raised_on_flush(device):
+    failed = concurrent.futures.Future()
+    failed.set_exception(OSError('disconnected'))
+    device.write_nowait.side_effect = lambda *args: failed
+    stream = UartService(device).stream()
+
+    stream.write(b'abc')
+
+    with pytest.raises(OSError):
+        stream.flush()
+
+
+def test_async_stream_reads_and_writes():
+    device = Mock(spec=AsyncBluetoothDevice)
+    device.notify = AsyncMock()
+    device.write = AsyncMock()
+    device.max_write_size.return_value = 20
+
+    async def write_nowait(*args):
+        return asyncio.ensure_future(device.write(*args))
+
+    device.write_nowait = AsyncMock(side_effect=write_nowait)
+
+    async def exchange():
+        stream = await AsyncUartStream(device).open()
+        stream.write(b'hello ')
+        stream.write_string('world\n')
+        await stream.drain()
+        line = asyncio.ensure_future(stream.readline())
+        receive(device, b'hi ', b'there\n')
+        return await line
+
+    assert asyncio.run(exchange()) == b'hi there\n'
+    device.write.assert_awaited_once_with(Service.UART, Characteristic.RX_CHARACTERISTIC, b'hello world\n', False)
+
+
+def test_async_stream_drains_bytes_written_while_a_write_is_in_flight():
+    device = Mock(spec=AsyncBluetoothDevice)
+    device.notify = AsyncMock()
+    device.max_write_size.return_value = 20
+
+    async def exchange():
+        in_flight = asyncio.get_running_loop().create_future()
+        sent = []
+
+        async def write_nowait(service, characteristic, data, without_response):
+            sent.append(data)
+            return in_flight if len(sent) == 1 else asyncio.sleep(0)
+
+        device.write_nowait = AsyncMock(side_effect=write_nowait)
+        stream = await AsyncUartStream(device).open()
+        stream.write(b'first')
+        await asyncio.sleep(0.01)  # the first chunk is in flight
+        stream.write(b'second')
+        asyncio.get_running_loop().call_later(0.01, in_flight.set_result, None)
+        await stream.drain()
+        return sent
+
+    assert asyncio.run(exchange()) == [b'first', b'second']